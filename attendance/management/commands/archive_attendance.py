@@ -0,0 +1,53 @@
+import os
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.utils import timezone
+from attendance.partitions import (MONTHS_AHEAD, add_months, archivable_months, archive_month, detach_month,
+                                   ensure_partitions, is_partitioned)
+
+
+class Command(BaseCommand):
+    help = ('Archives attendance months older than the retention window to gzipped CSV files and removes them; '
+            'on a partitioned table also creates the partitions for the coming months')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--retain-months', type=int, default=24,
+                            help='Full months to keep before the current one')
+        parser.add_argument('--directory', default=settings.ATTENDANCE_ARCHIVE_DIR,
+                            help='Where to write the archive files')
+        parser.add_argument('--months-ahead', type=int, default=MONTHS_AHEAD,
+                            help='Partitions to create past the current month (PostgreSQL)')
+        parser.add_argument('--detach-only', action='store_true',
+                            help='Detach old partitions and keep them as tables instead of archiving them')
+        parser.add_argument('--dry-run', action='store_true', help='Only list what would be archived')
+
+    def handle(self, *args, **options):
+        if options['retain_months'] < 0 or options['months_ahead'] < 0:
+            raise CommandError('--retain-months and --months-ahead cannot be negative')
+        partitioned = is_partitioned()
+        if options['detach_only'] and not partitioned:
+            raise CommandError('--detach-only needs the partitioned attendance table (PostgreSQL)')
+
+        cutoff = add_months(timezone.localdate().replace(day=1), -options['retain_months'])
+        months = archivable_months(cutoff)
+        self.stdout.write(f'Archiving records before {cutoff}: {len(months)} month(s)')
+        if options['dry_run']:
+            for month in months:
+                self.stdout.write(f'  {month:%Y-%m}')
+            return
+
+        if not options['detach_only']:
+            os.makedirs(options['directory'], exist_ok=True)
+        for month in months:
+            if options['detach_only']:
+                name = detach_month(month)
+                if name:
+                    self.stdout.write(f'{month:%Y-%m}: detached {name}')
+                continue
+            path, records = archive_month(month, options['directory'])
+            self.stdout.write(f'{month:%Y-%m}: {records} records -> {path}')
+
+        if partitioned:
+            for month in ensure_partitions(options['months_ahead']):
+                self.stdout.write(f'Created partition for {month:%Y-%m}')
+        self.stdout.write(self.style.SUCCESS('Done'))
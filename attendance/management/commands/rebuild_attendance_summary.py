@@ -0,0 +1,25 @@
+from django.core.management.base import BaseCommand, CommandError
+from django.utils.dateparse import parse_date
+from attendance.summaries import rebuild_daily_summaries
+
+
+class Command(BaseCommand):
+    help = 'Rebuilds the daily attendance summary table from attendance records'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--start-date', help='Only rebuild days on or after this date (YYYY-MM-DD)')
+        parser.add_argument('--end-date', help='Only rebuild days on or before this date (YYYY-MM-DD)')
+        parser.add_argument('--batch-size', type=int, default=1000)
+
+    def handle(self, *args, **options):
+        dates = {}
+        for key in ['start_date', 'end_date']:
+            value = options[key]
+            if value:
+                dates[key] = parse_date(value)
+                if dates[key] is None:
+                    raise CommandError(f'Invalid date for --{key.replace("_", "-")}: {value}')
+
+        self.stdout.write('Rebuilding daily attendance summaries...')
+        count = rebuild_daily_summaries(batch_size=options['batch_size'], **dates)
+        self.stdout.write(self.style.SUCCESS(f'Wrote {count} summary rows'))
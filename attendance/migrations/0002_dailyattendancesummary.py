@@ -0,0 +1,49 @@
+# Generated by Django 4.2.22 on 2026-10-18 15:52
+
+from django.db import migrations, models
+from django.db.models import Count, Q
+import django.db.models.deletion
+
+
+def populate_summaries(apps, schema_editor):
+    Attendance = apps.get_model('attendance', 'Attendance')
+    DailyAttendanceSummary = apps.get_model('attendance', 'DailyAttendanceSummary')
+    statuses = ['present', 'absent', 'late']
+    rows = (Attendance.objects
+            .values('date', 'employee__department')
+            .annotate(**{status: Count('id', filter=Q(status=status)) for status in statuses})
+            .order_by())
+    DailyAttendanceSummary.objects.bulk_create(
+        [DailyAttendanceSummary(date=row['date'],
+                                department_id=row['employee__department'],
+                                **{status: row[status] for status in statuses})
+         for row in rows.iterator()],
+        batch_size=1000,
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('employees', '0002_department_description_employee_position_and_more'),
+        ('attendance', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='DailyAttendanceSummary',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('date', models.DateField()),
+                ('present', models.PositiveIntegerField(default=0)),
+                ('absent', models.PositiveIntegerField(default=0)),
+                ('late', models.PositiveIntegerField(default=0)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('department', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='attendance_summaries', to='employees.department')),
+            ],
+            options={
+                'unique_together': {('date', 'department')},
+            },
+        ),
+        migrations.RunPython(populate_summaries, migrations.RunPython.noop),
+    ]
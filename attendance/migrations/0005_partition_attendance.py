@@ -0,0 +1,115 @@
+from datetime import date
+from django.db import migrations
+
+TABLE = 'attendance_attendance'
+OLD_TABLE = 'attendance_attendance_unpartitioned'
+SEQUENCE = 'attendance_attendance_id_seq'
+UNIQUE = 'attendance_attendance_employee_id_date_key'
+INDEXES = {
+    'attendance_date_id_idx': '("date", id)',
+    'attendance_date_status_idx': '("date", status)',
+    'attendance_status_date_idx': '(status, "date")',
+}
+# Months created past the current one; archive_attendance adds more later
+MONTHS_AHEAD = 3
+
+
+def add_months(month, count):
+    years, month_index = divmod(month.month - 1 + count, 12)
+    return date(month.year + years, month_index + 1, 1)
+
+
+def is_partitioned(cursor):
+    cursor.execute('SELECT relkind FROM pg_class WHERE oid = to_regclass(%s)', [TABLE])
+    row = cursor.fetchone()
+    return row is not None and row[0] == 'p'
+
+
+def move_aside(cursor):
+    """
+    Rename the current table out of the way, freeing the names of its
+    constraints, sequence and indexes for the new table.
+    """
+    cursor.execute(f'ALTER TABLE {TABLE} RENAME TO {OLD_TABLE}')
+    # Primary key and unique constraints own indexes, whose names must be unique
+    cursor.execute("SELECT conname FROM pg_constraint WHERE conrelid = %s::regclass AND contype IN ('p', 'u')",
+                   [OLD_TABLE])
+    for number, (name,) in enumerate(cursor.fetchall()):
+        cursor.execute(f'ALTER TABLE {OLD_TABLE} RENAME CONSTRAINT {name} TO {OLD_TABLE}_constraint_{number}')
+    for name in INDEXES:
+        cursor.execute(f'DROP INDEX IF EXISTS {name}')
+    # Identity and serial columns both own a sequence; the new table gets its own
+    cursor.execute(f"SELECT pg_get_serial_sequence('{OLD_TABLE}', 'id')")
+    sequence = cursor.fetchone()[0]
+    if sequence:
+        cursor.execute(f'ALTER SEQUENCE {sequence} RENAME TO {OLD_TABLE}_id_seq')
+
+
+def finish(cursor):
+    cursor.execute(f'ALTER TABLE {TABLE} ADD CONSTRAINT {TABLE}_employee_id_fk_employees_employee_id '
+                   f'FOREIGN KEY (employee_id) REFERENCES employees_employee (id) DEFERRABLE INITIALLY DEFERRED')
+    for name, columns in INDEXES.items():
+        cursor.execute(f'CREATE INDEX {name} ON {TABLE} {columns}')
+    cursor.execute(f'INSERT INTO {TABLE} SELECT * FROM {OLD_TABLE}')
+    # Carry on from the old sequence, so the ids of deleted rows, which
+    # delta sync clients know from their tombstones, are never reused
+    cursor.execute(f"SELECT setval('{SEQUENCE}', GREATEST((SELECT MAX(id) FROM {TABLE}), "
+                   f"(SELECT last_value FROM {OLD_TABLE}_id_seq), 0) + 1, false)")
+    cursor.execute(f'DROP TABLE {OLD_TABLE}')
+
+
+def partition_attendance(apps, schema_editor):
+    if schema_editor.connection.vendor != 'postgresql':
+        return
+    with schema_editor.connection.cursor() as cursor:
+        if is_partitioned(cursor):
+            return
+        move_aside(cursor)
+        cursor.execute(f'CREATE SEQUENCE {SEQUENCE} AS bigint')
+        # The partition key must be part of every unique constraint
+        cursor.execute(f'CREATE TABLE {TABLE} (LIKE {OLD_TABLE}, '
+                       f'PRIMARY KEY (id, "date"), CONSTRAINT {UNIQUE} UNIQUE (employee_id, "date")) '
+                       f'PARTITION BY RANGE ("date")')
+        cursor.execute(f"ALTER TABLE {TABLE} ALTER COLUMN id SET DEFAULT nextval('{SEQUENCE}')")
+        cursor.execute(f'ALTER SEQUENCE {SEQUENCE} OWNED BY {TABLE}.id')
+        cursor.execute(f'CREATE TABLE {TABLE}_default PARTITION OF {TABLE} DEFAULT')
+
+        cursor.execute(f'SELECT MIN("date") FROM {OLD_TABLE}')
+        oldest = cursor.fetchone()[0]
+        current = date.today().replace(day=1)
+        month = min(oldest.replace(day=1), current) if oldest else current
+        while month <= add_months(current, MONTHS_AHEAD):
+            cursor.execute(f"CREATE TABLE {TABLE}_p{month:%Y_%m} PARTITION OF {TABLE} "
+                           f"FOR VALUES FROM ('{month}') TO ('{add_months(month, 1)}')")
+            month = add_months(month, 1)
+        finish(cursor)
+
+
+def unpartition_attendance(apps, schema_editor):
+    if schema_editor.connection.vendor != 'postgresql':
+        return
+    with schema_editor.connection.cursor() as cursor:
+        if not is_partitioned(cursor):
+            return
+        move_aside(cursor)
+        cursor.execute(f'CREATE TABLE {TABLE} (LIKE {OLD_TABLE}, PRIMARY KEY (id), '
+                       f'CONSTRAINT {UNIQUE} UNIQUE (employee_id, "date"))')
+        cursor.execute(f'ALTER TABLE {TABLE} ALTER COLUMN id ADD GENERATED BY DEFAULT AS IDENTITY')
+        finish(cursor)
+
+
+class Migration(migrations.Migration):
+    """
+    Range-partition attendance by month on PostgreSQL, so that queries
+    filtered on ``date`` only scan the months they cover and old months
+    can be detached whole (see ``manage.py archive_attendance``). Rows
+    outside every monthly partition land in a default partition. Other
+    databases keep the plain table.
+    """
+    dependencies = [
+        ('attendance', '0004_filter_indexes'),
+    ]
+
+    operations = [
+        migrations.RunPython(partition_attendance, unpartition_attendance),
+    ]
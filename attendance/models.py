@@ -1,5 +1,5 @@
 from django.db import models
-from employees.models import Employee
+from employees.models import Department, Employee
 
 class Attendance(models.Model):
     STATUS_CHOICES = (
@@ -16,6 +16,36 @@ class Attendance(models.Model):
     
     class Meta:
         unique_together = ['employee', 'date']
+        indexes = [
+            # Keyset pagination seeks on (date, id)
+            models.Index(fields=['date', 'id'], name='attendance_date_id_idx'),
+            # ?date=&status= filters and ?status= ordered by date
+            models.Index(fields=['date', 'status'], name='attendance_date_status_idx'),
+            models.Index(fields=['status', 'date'], name='attendance_status_date_idx'),
+            # Delta sync pages through changes by (updated_at, id)
+            models.Index(fields=['updated_at', 'id'], name='attendance_updated_id_idx'),
+        ]
         
     def __str__(self):
         return f"{self.employee.name} - {self.date} - {self.status}"
+
+
+class DailyAttendanceSummary(models.Model):
+    """
+    Pre-aggregated attendance counts per day and department.
+
+    Kept up to date by the signal handlers in ``attendance.signals`` and
+    rebuilt from scratch with ``manage.py rebuild_attendance_summary``.
+    """
+    date = models.DateField()
+    department = models.ForeignKey(Department, on_delete=models.CASCADE, related_name='attendance_summaries')
+    present = models.PositiveIntegerField(default=0)
+    absent = models.PositiveIntegerField(default=0)
+    late = models.PositiveIntegerField(default=0)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        unique_together = ['date', 'department']
+
+    def __str__(self):
+        return f"{self.department.name} - {self.date}"
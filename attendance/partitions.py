@@ -0,0 +1,171 @@
+import csv
+import gzip
+import os
+import re
+from datetime import date
+from django.db import connections, transaction
+from django.utils import timezone
+from .models import Attendance
+
+TABLE = Attendance._meta.db_table
+DEFAULT_PARTITION = f'{TABLE}_default'
+ARCHIVE_COLUMNS = ['id', 'employee_id', 'date', 'status', 'created_at', 'updated_at']
+PARTITION_NAME = re.compile(rf'^{TABLE}_p(\d{{4}})_(\d{{2}})$')
+# Partitions kept ready past the current month
+MONTHS_AHEAD = 3
+
+
+def add_months(month, count):
+    years, month_index = divmod(month.month - 1 + count, 12)
+    return date(month.year + years, month_index + 1, 1)
+
+
+def partition_name(month):
+    return f'{TABLE}_p{month:%Y_%m}'
+
+
+def is_partitioned(using='default'):
+    """
+    Whether the attendance table is range partitioned (PostgreSQL after
+    migration ``0005_partition_attendance``).
+    """
+    connection = connections[using]
+    if connection.vendor != 'postgresql':
+        return False
+    with connection.cursor() as cursor:
+        cursor.execute('SELECT relkind FROM pg_class WHERE oid = to_regclass(%s)', [TABLE])
+        row = cursor.fetchone()
+    return row is not None and row[0] == 'p'
+
+
+def list_partitions(using='default'):
+    """
+    ``{month: table name}`` of the attached monthly partitions.
+    """
+    if not is_partitioned(using):
+        return {}
+    with connections[using].cursor() as cursor:
+        cursor.execute('SELECT child.relname FROM pg_inherits '
+                       'JOIN pg_class child ON child.oid = pg_inherits.inhrelid '
+                       'WHERE pg_inherits.inhparent = to_regclass(%s)', [TABLE])
+        names = [name for name, in cursor.fetchall()]
+    partitions = {}
+    for name in names:
+        match = PARTITION_NAME.match(name)
+        if match:
+            partitions[date(int(match[1]), int(match[2]), 1)] = name
+    return partitions
+
+
+def create_partition(month, using='default'):
+    """
+    Attach the partition for ``month``, moving any of its rows that were
+    routed to the default partition into it.
+    """
+    name = partition_name(month)
+    start, end = month, add_months(month, 1)
+    with transaction.atomic(using=using), connections[using].cursor() as cursor:
+        cursor.execute(f'CREATE TABLE {name} (LIKE {TABLE} INCLUDING DEFAULTS)')
+        cursor.execute(f'WITH moved AS (DELETE FROM {DEFAULT_PARTITION} WHERE "date" >= %s AND "date" < %s '
+                       f'RETURNING *) INSERT INTO {name} SELECT * FROM moved', [start, end])
+        cursor.execute(f"ALTER TABLE {TABLE} ATTACH PARTITION {name} FOR VALUES FROM ('{start}') TO ('{end}')")
+    return name
+
+
+def ensure_partitions(months_ahead, using='default'):
+    """
+    Create missing partitions from the current month to ``months_ahead``
+    months after it. Returns the months created; a no-op unless the
+    table is partitioned.
+    """
+    if not is_partitioned(using):
+        return []
+    existing = list_partitions(using)
+    current = timezone.localdate().replace(day=1)
+    created = []
+    for offset in range(months_ahead + 1):
+        month = add_months(current, offset)
+        if month not in existing:
+            create_partition(month, using)
+            created.append(month)
+    return created
+
+
+def archivable_months(cutoff, using='default'):
+    """
+    Months before ``cutoff`` that still have records, or a partition.
+    """
+    months = {month.replace(day=1) for month in Attendance.objects.using(using)
+              .filter(date__lt=cutoff).dates('date', 'month')}
+    months.update(month for month in list_partitions(using) if month < cutoff)
+    return sorted(months)
+
+
+def archive_path(directory, month):
+    path = os.path.join(directory, f'attendance-{month:%Y-%m}.csv.gz')
+    number = 1
+    # Never overwrite an earlier archive of the same month
+    while os.path.exists(path):
+        number += 1
+        path = os.path.join(directory, f'attendance-{month:%Y-%m}.{number}.csv.gz')
+    return path
+
+
+def archive_month(month, directory, using='default', chunk_size=900):
+    """
+    Write the records of ``month`` to a gzipped CSV in ``directory`` and
+    remove them. A monthly partition is locked against writes, exported,
+    detached and dropped; records elsewhere (the default partition, or
+    the plain table on other databases) are deleted by id once written.
+    Daily summaries are left alone, so reports over archived months keep
+    working, and no tombstones are recorded: archived months are history,
+    so delta sync clients keep their copies. Returns ``(path, records)``.
+    """
+    start, end = month, add_months(month, 1)
+    partition = list_partitions(using).get(month)
+    path = archive_path(directory, month)
+    records = Attendance.objects.using(using).filter(date__gte=start, date__lt=end).order_by('date', 'id')
+    written = []
+    try:
+        with transaction.atomic(using=using):
+            if partition:
+                with connections[using].cursor() as cursor:
+                    cursor.execute(f'LOCK TABLE {partition} IN SHARE MODE')
+            with gzip.open(path, 'wt', newline='') as handle:
+                writer = csv.writer(handle)
+                writer.writerow(ARCHIVE_COLUMNS)
+                for row in records.values_list(*ARCHIVE_COLUMNS).iterator(chunk_size=2000):
+                    writer.writerow(row)
+                    written.append(row[0])
+            if partition:
+                with connections[using].cursor() as cursor:
+                    cursor.execute(f'ALTER TABLE {TABLE} DETACH PARTITION {partition}')
+                    cursor.execute(f'DROP TABLE {partition}')
+            else:
+                # Plain SQL skips the signal handlers that would take the
+                # records out of the daily summaries. Only the exported ids
+                # go, not records added to the month in the meantime.
+                with connections[using].cursor() as cursor:
+                    for offset in range(0, len(written), chunk_size):
+                        chunk = written[offset:offset + chunk_size]
+                        cursor.execute(f'DELETE FROM {TABLE} WHERE "date" >= %s AND "date" < %s '
+                                       f'AND id IN ({", ".join(["%s"] * len(chunk))})', [start, end, *chunk])
+    except BaseException:
+        # gzip.open itself may have failed before creating the file
+        if os.path.exists(path):
+            os.remove(path)
+        raise
+    return path, len(written)
+
+
+def detach_month(month, using='default'):
+    """
+    Detach the partition for ``month`` and keep it as a standalone table,
+    e.g. to move it to cheaper storage with ``pg_dump``. Returns its name.
+    """
+    partition = list_partitions(using).get(month)
+    if partition is None:
+        return None
+    with connections[using].cursor() as cursor:
+        cursor.execute(f'ALTER TABLE {TABLE} DETACH PARTITION {partition}')
+    return partition
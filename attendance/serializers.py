@@ -6,4 +6,13 @@ class AttendanceSerializer(serializers.ModelSerializer):
     
     class Meta:
         model = Attendance
-        fields = ['id', 'employee', 'employee_name', 'date', 'status', 'created_at', 'updated_at']
\ No newline at end of file
+        fields = ['id', 'employee', 'employee_name', 'date', 'status', 'created_at', 'updated_at']
+
+class AttendanceBulkItemSerializer(serializers.Serializer):
+    """
+    One entry of a bulk upsert. The employee is validated as a plain id so
+    that existence can be checked for the whole batch in one query.
+    """
+    employee = serializers.IntegerField(min_value=1)
+    date = serializers.DateField()
+    status = serializers.ChoiceField(choices=Attendance.STATUS_CHOICES)
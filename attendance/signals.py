@@ -0,0 +1,69 @@
+from django.db import router
+from django.db.models.signals import pre_delete, pre_save, post_save, post_delete
+from django.dispatch import receiver
+from employee_project.sync import is_cascade, record_tombstone, record_tombstones
+from employees.models import Employee
+from .models import Attendance
+from .partitions import MONTHS_AHEAD, ensure_partitions
+from .summaries import apply_attendance_change, move_employee_attendance
+
+
+@receiver(pre_save, sender=Attendance)
+def remember_previous_attendance(sender, instance, raw=False, **kwargs):
+    # Capture the stored state so post_save can move the old count
+    instance._summary_previous = None
+    if raw or instance.pk is None:
+        return
+    instance._summary_previous = (Attendance.objects
+                                  .filter(pk=instance.pk)
+                                  .values_list('date', 'employee__department', 'status')
+                                  .first())
+
+
+@receiver(post_save, sender=Attendance)
+def update_summary_on_save(sender, instance, created, raw=False, **kwargs):
+    if raw:
+        return
+    current = (instance.date, instance.employee.department_id, instance.status)
+    previous = getattr(instance, '_summary_previous', None)
+    if previous == current:
+        return
+    if previous is not None:
+        apply_attendance_change(*previous, delta=-1)
+    apply_attendance_change(*current, delta=1)
+
+
+@receiver(post_save, sender=Employee)
+def move_summaries_with_employee(sender, instance, created, raw=False, **kwargs):
+    # employees.signals remembers the stored department in pre_save
+    if raw or created:
+        return
+    previous = getattr(instance, '_previous_department_id', None)
+    if previous is not None and previous != instance.department_id:
+        move_employee_attendance(instance.pk, previous, instance.department_id)
+
+
+@receiver(post_delete, sender=Attendance)
+def update_summary_on_delete(sender, instance, **kwargs):
+    apply_attendance_change(instance.date, instance.employee.department_id, instance.status, delta=-1)
+
+
+@receiver(post_delete, sender=Attendance)
+def record_deleted_attendance(sender, instance, origin=None, **kwargs):
+    if is_cascade(sender, origin):
+        return
+    record_tombstone(instance, instance.employee_id)
+
+
+@receiver(pre_delete, sender=Employee)
+def record_cascaded_attendance(sender, instance, **kwargs):
+    # One INSERT for the records the employee's delete is about to cascade to
+    record_tombstones(Attendance, Attendance.objects.filter(employee=instance).values_list('id', 'employee_id'))
+
+
+def create_upcoming_partitions(using='default', **kwargs):
+    # Connected to post_migrate in apps.py. archive_attendance also does
+    # this, but only if scheduled; without partitions, new months would
+    # all land in the default partition.
+    if router.allow_migrate_model(using, Attendance):
+        ensure_partitions(MONTHS_AHEAD, using)
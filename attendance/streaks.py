@@ -0,0 +1,110 @@
+import heapq
+from datetime import date
+from django.db import connections
+from django.db.models import Count, Q
+from django.db.models.functions import ExtractIsoWeekDay
+
+STREAK_STATUSES = ['absent', 'late']
+
+# Gaps and islands: within an employee's records ordered by date, the
+# difference between the overall row number and the row number among
+# records of the same status is constant across a run of that status.
+STREAKS_SQL = '''
+WITH records (employee_id, "date", status) AS ({records}),
+marked AS (
+    SELECT employee_id, "date", status,
+           ROW_NUMBER() OVER (PARTITION BY employee_id ORDER BY "date")
+           - ROW_NUMBER() OVER (PARTITION BY employee_id, status ORDER BY "date") AS island
+    FROM records
+),
+islands AS (
+    SELECT employee_id, COUNT(*) AS length, MIN("date") AS start_date, MAX("date") AS end_date
+    FROM marked
+    WHERE status = %s
+    GROUP BY employee_id, island
+),
+ranked AS (
+    SELECT employee_id, length, start_date, end_date,
+           ROW_NUMBER() OVER (PARTITION BY employee_id ORDER BY length DESC, end_date DESC) AS position
+    FROM islands
+)
+SELECT employee_id, length, start_date, end_date
+FROM ranked
+WHERE position = 1
+ORDER BY length DESC, end_date DESC, employee_id
+LIMIT %s
+'''
+
+
+def longest_streaks(queryset, status, limit):
+    """
+    Each employee's longest run of consecutive attendance records with
+    ``status``, for the ``limit`` employees with the longest runs. Ties
+    go to the most recent run. Returns ``(employee_id, length, start, end)``
+    tuples.
+
+    On PostgreSQL this is a single gaps-and-islands query; other databases
+    stream the records once in (employee, date) order.
+    """
+    if connections[queryset.db].vendor == 'postgresql':
+        return longest_streaks_sql(queryset, status, limit)
+    return longest_streaks_streaming(queryset, status, limit)
+
+
+def longest_streaks_sql(queryset, status, limit):
+    records, params = queryset.order_by().values('employee_id', 'date', 'status').query.sql_with_params()
+    with connections[queryset.db].cursor() as cursor:
+        cursor.execute(STREAKS_SQL.format(records=records), [*params, status, limit])
+        return [(employee_id, length, _as_date(start), _as_date(end))
+                for employee_id, length, start, end in cursor.fetchall()]
+
+
+def longest_streaks_streaming(queryset, status, limit, chunk_size=2000):
+    rows = (queryset
+            .order_by('employee_id', 'date')
+            .values_list('employee_id', 'date', 'status')
+            .iterator(chunk_size=chunk_size))
+    best = {}
+    current, length, start, end = None, 0, None, None
+
+    def close_run():
+        if length and (current not in best or length >= best[current][0]):
+            best[current] = (length, start, end)
+
+    for employee_id, record_date, record_status in rows:
+        if employee_id != current:
+            close_run()
+            current, length = employee_id, 0
+        if record_status == status:
+            if not length:
+                start = record_date
+            length, end = length + 1, record_date
+        else:
+            close_run()
+            length = 0
+    close_run()
+
+    top = heapq.nsmallest(limit, best.items(),
+                          key=lambda item: (-item[1][0], -item[1][2].toordinal(), item[0]))
+    return [(employee_id, length, start, end) for employee_id, (length, start, end) in top]
+
+
+def weekday_absences(queryset, weekday, limit):
+    """
+    Employees with the most absences on ISO ``weekday`` (1 = Monday), with
+    the number of their records on that weekday.
+    """
+    return list(queryset
+                .annotate(weekday=ExtractIsoWeekDay('date'))
+                .filter(weekday=weekday)
+                .values('employee_id', 'employee__name')
+                .annotate(absences=Count('id', filter=Q(status='absent')), records=Count('id'))
+                .filter(absences__gt=0)
+                .order_by('-absences', 'employee_id')[:limit])
+
+
+def _as_date(value):
+    # SQLite hands back raw strings for computed date columns
+    if isinstance(value, str):
+        return date.fromisoformat(value)
+    return value
@@ -0,0 +1,119 @@
+from django.db import transaction
+from django.db.models import Case, Count, F, IntegerField, Q, Value, When
+from django.db.models.functions import Greatest
+from .models import Attendance, DailyAttendanceSummary
+
+STATUSES = [choice for choice, _ in Attendance.STATUS_CHOICES]
+
+
+def apply_attendance_change(date, department_id, status, delta):
+    """
+    Add ``delta`` (+1 or -1) to the ``status`` counter of one summary row.
+    """
+    if status not in STATUSES:
+        return
+    if delta < 0:
+        # Never create rows when decrementing; this also keeps cascading
+        # department deletes from resurrecting a row for that department
+        DailyAttendanceSummary.objects.filter(
+            date=date, department_id=department_id, **{f'{status}__gte': -delta}
+        ).update(**{status: F(status) + delta})
+        return
+    with transaction.atomic():
+        summary, _ = DailyAttendanceSummary.objects.get_or_create(date=date, department_id=department_id)
+        DailyAttendanceSummary.objects.filter(pk=summary.pk).update(**{status: F(status) + delta})
+
+
+def apply_attendance_changes(changes, chunk_size=500):
+    """
+    Apply ``{(date, department_id, status): delta}`` to the summary rows,
+    e.g. for records written with ``bulk_create``. Like the single-record
+    path, the new counts are computed by the database from the current
+    ones, so concurrent changes are not lost; it runs one UPDATE per
+    status and chunk of summary rows.
+    """
+    by_status = {status: {} for status in STATUSES}
+    for (date, department_id, status), delta in changes.items():
+        if delta and status in by_status:
+            by_status[status][date, department_id] = delta
+    missing = {key for deltas in by_status.values() for key, delta in deltas.items() if delta > 0}
+    with transaction.atomic():
+        # Only rows that gain counts are created, as in apply_attendance_change
+        DailyAttendanceSummary.objects.bulk_create(
+            [DailyAttendanceSummary(date=date, department_id=department_id) for date, department_id in missing],
+            batch_size=chunk_size, ignore_conflicts=True)
+        for status, deltas in by_status.items():
+            keys = list(deltas)
+            for offset in range(0, len(keys), chunk_size):
+                chunk = keys[offset:offset + chunk_size]
+                rows = Q()
+                for date, department_id in chunk:
+                    rows |= Q(date=date, department_id=department_id)
+                delta = Case(*[When(date=date, department_id=department_id, then=Value(deltas[date, department_id]))
+                               for date, department_id in chunk], output_field=IntegerField())
+                DailyAttendanceSummary.objects.filter(rows).update(**{status: Greatest(F(status) + delta, 0)})
+
+
+def move_employee_attendance(employee_id, from_department_id, to_department_id, chunk_size=500):
+    """
+    Move the counts of one employee's attendance from one department's
+    summary rows to another's, after the employee changed departments.
+    Runs a fixed number of statements per status and chunk of dates.
+    """
+    by_status = {status: [] for status in STATUSES}
+    for date, status in Attendance.objects.filter(employee_id=employee_id).values_list('date', 'status'):
+        if status in by_status:
+            by_status[status].append(date)
+    dates = sorted({date for status_dates in by_status.values() for date in status_dates})
+    if not dates:
+        return
+    with transaction.atomic():
+        DailyAttendanceSummary.objects.bulk_create(
+            [DailyAttendanceSummary(date=date, department_id=to_department_id) for date in dates],
+            batch_size=chunk_size, ignore_conflicts=True)
+        for status, status_dates in by_status.items():
+            for offset in range(0, len(status_dates), chunk_size):
+                chunk = status_dates[offset:offset + chunk_size]
+                DailyAttendanceSummary.objects.filter(
+                    date__in=chunk, department_id=from_department_id, **{f'{status}__gte': 1}
+                ).update(**{status: F(status) - 1})
+                DailyAttendanceSummary.objects.filter(
+                    date__in=chunk, department_id=to_department_id
+                ).update(**{status: F(status) + 1})
+
+
+def rebuild_daily_summaries(start_date=None, end_date=None, dates=None, batch_size=1000):
+    """
+    Recompute summary rows from the attendance table, optionally limited
+    to a date range or a set of dates. Returns the number of summary rows
+    written.
+    """
+    attendance = Attendance.objects.all()
+    summaries = DailyAttendanceSummary.objects.all()
+    if start_date:
+        attendance = attendance.filter(date__gte=start_date)
+        summaries = summaries.filter(date__gte=start_date)
+    if end_date:
+        attendance = attendance.filter(date__lte=end_date)
+        summaries = summaries.filter(date__lte=end_date)
+    if dates is not None:
+        attendance = attendance.filter(date__in=dates)
+        summaries = summaries.filter(date__in=dates)
+
+    rows = (attendance
+            .values('date', 'employee__department')
+            .annotate(**{status: Count('id', filter=Q(status=status)) for status in STATUSES})
+            .order_by())
+
+    with transaction.atomic():
+        summaries.delete()
+        objs = [
+            DailyAttendanceSummary(
+                date=row['date'],
+                department_id=row['employee__department'],
+                **{status: row[status] for status in STATUSES}
+            )
+            for row in rows.iterator()
+        ]
+        DailyAttendanceSummary.objects.bulk_create(objs, batch_size=batch_size)
+    return len(objs)
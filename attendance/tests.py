@@ -1,13 +1,32 @@
-from django.test import TestCase
+import base64
+import csv
+import gzip
+import json
+import os
+import tempfile
+from datetime import date
+from io import StringIO
+from unittest import mock, skipUnless
+from django.db import connection
+from django.db.migrations.executor import MigrationExecutor
+from django.test import TestCase, TransactionTestCase, override_settings
+from django.test.utils import CaptureQueriesContext
 from django.urls import reverse
 from rest_framework.test import APIClient
 from rest_framework import status
 from rest_framework.authtoken.models import Token
 from django.contrib.auth.models import User
 from django.utils import timezone
-from employees.models import Department, Employee
-from .models import Attendance
+from employees.models import Department, Employee, Tombstone
+from employees.testing import ListQueryCountMixin
+from django.core.management import call_command
+from django.core.management.sql import emit_post_migrate_signal
+from .models import Attendance, DailyAttendanceSummary
+from .partitions import (MONTHS_AHEAD, add_months, archive_month, archivable_months, create_partition,
+                         is_partitioned, list_partitions)
 from .serializers import AttendanceSerializer
+from .views import AttendanceViewSet
+from .streaks import STREAK_STATUSES, longest_streaks_sql, longest_streaks_streaming
 
 
 class AttendanceModelTest(TestCase):
@@ -121,3 +140,661 @@ class AttendanceAPITest(TestCase):
         response = self.client.get(url)
         self.assertEqual(response.status_code, status.HTTP_200_OK)
         self.assertEqual(len(response.data['results']), 1)
+
+
+class DailyAttendanceSummaryTest(TestCase):
+    def setUp(self):
+        self.today = timezone.now().date()
+        self.engineering = Department.objects.create(name='Engineering')
+        self.sales = Department.objects.create(name='Sales')
+        self.employee = Employee.objects.create(
+            name='Test Employee',
+            email='test@example.com',
+            phone_number='1234567890',
+            address='Test Address',
+            department=self.engineering
+        )
+        self.other = Employee.objects.create(
+            name='Other Employee',
+            email='other@example.com',
+            phone_number='1234567890',
+            address='Test Address',
+            department=self.sales
+        )
+
+    def counts(self, department, date=None):
+        summary = DailyAttendanceSummary.objects.get(department=department, date=date or self.today)
+        return (summary.present, summary.absent, summary.late)
+
+    def test_create_increments_summary(self):
+        Attendance.objects.create(employee=self.employee, date=self.today, status='present')
+        Attendance.objects.create(employee=self.other, date=self.today, status='late')
+        self.assertEqual(self.counts(self.engineering), (1, 0, 0))
+        self.assertEqual(self.counts(self.sales), (0, 0, 1))
+
+    def test_update_moves_count(self):
+        attendance = Attendance.objects.create(employee=self.employee, date=self.today, status='present')
+        attendance.status = 'absent'
+        attendance.save()
+        self.assertEqual(self.counts(self.engineering), (0, 1, 0))
+
+        yesterday = self.today - timezone.timedelta(days=1)
+        attendance.date = yesterday
+        attendance.save()
+        self.assertEqual(self.counts(self.engineering), (0, 0, 0))
+        self.assertEqual(self.counts(self.engineering, yesterday), (0, 1, 0))
+
+    def test_delete_decrements_summary(self):
+        attendance = Attendance.objects.create(employee=self.employee, date=self.today, status='late')
+        attendance.delete()
+        self.assertEqual(self.counts(self.engineering), (0, 0, 0))
+
+    def test_department_change_moves_counts(self):
+        yesterday = self.today - timezone.timedelta(days=1)
+        Attendance.objects.create(employee=self.employee, date=self.today, status='present')
+        Attendance.objects.create(employee=self.employee, date=yesterday, status='late')
+        Attendance.objects.create(employee=self.other, date=self.today, status='absent')
+
+        self.employee.department = self.sales
+        self.employee.save()
+        self.assertEqual(self.counts(self.engineering), (0, 0, 0))
+        self.assertEqual(self.counts(self.engineering, yesterday), (0, 0, 0))
+        self.assertEqual(self.counts(self.sales), (1, 1, 0))
+        self.assertEqual(self.counts(self.sales, yesterday), (0, 0, 1))
+
+        # Later changes adjust the new department
+        Attendance.objects.get(employee=self.employee, date=self.today).delete()
+        self.assertEqual(self.counts(self.sales), (0, 1, 0))
+
+    def test_department_delete_cascades(self):
+        Attendance.objects.create(employee=self.employee, date=self.today, status='present')
+        self.engineering.delete()
+        self.assertFalse(DailyAttendanceSummary.objects.exists())
+
+    def test_rebuild_command_repairs_drift(self):
+        Attendance.objects.create(employee=self.employee, date=self.today, status='present')
+        Attendance.objects.create(employee=self.other, date=self.today, status='absent')
+        DailyAttendanceSummary.objects.update(present=40, absent=40, late=40)
+
+        call_command('rebuild_attendance_summary', stdout=StringIO())
+        self.assertEqual(self.counts(self.engineering), (1, 0, 0))
+        self.assertEqual(self.counts(self.sales), (0, 1, 0))
+
+
+class AttendanceBulkUpsertTest(TestCase):
+    def setUp(self):
+        self.client = APIClient()
+        self.user = User.objects.create_user(username='admin', password='testpassword', is_staff=True)
+        self.token = Token.objects.create(user=self.user)
+        self.client.credentials(HTTP_AUTHORIZATION=f'Token {self.token.key}')
+
+        self.today = timezone.now().date()
+        self.department = Department.objects.create(name='Test Department')
+        self.employees = [
+            Employee.objects.create(
+                name=f'Employee {i}',
+                email=f'employee{i}@example.com',
+                phone_number='1234567890',
+                address='Test Address',
+                department=self.department
+            )
+            for i in range(20)
+        ]
+        self.existing = Attendance.objects.create(employee=self.employees[0], date=self.today, status='absent')
+        self.url = reverse('attendance-bulk')
+
+    def test_bulk_upsert(self):
+        payload = [{'employee': employee.id, 'date': self.today.isoformat(), 'status': 'present'}
+                   for employee in self.employees]
+        response = self.client.post(self.url, payload, format='json')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data['created'], 19)
+        self.assertEqual(response.data['updated'], 1)
+        self.assertEqual(response.data['results'][0]['status'], 'updated')
+        self.assertEqual(response.data['results'][0]['id'], self.existing.id)
+        self.assertEqual(Attendance.objects.filter(status='present').count(), 20)
+
+        summary = DailyAttendanceSummary.objects.get(department=self.department, date=self.today)
+        self.assertEqual((summary.present, summary.absent, summary.late), (20, 0, 0))
+
+    def test_bulk_moves_summary_counts(self):
+        Attendance.objects.create(employee=self.employees[1], date=self.today, status='late')
+        payload = [{'employee': self.employees[0].id, 'date': self.today.isoformat(), 'status': 'present'},
+                   {'employee': self.employees[2].id, 'date': self.today.isoformat(), 'status': 'late'}]
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.post(self.url, payload, format='json')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        summary = DailyAttendanceSummary.objects.get(department=self.department, date=self.today)
+        self.assertEqual((summary.present, summary.absent, summary.late), (1, 0, 2))
+        # The counts are adjusted in place, not rebuilt from the attendance table
+        self.assertFalse([query for query in queries if query['sql'].startswith('DELETE')])
+
+    def test_bulk_reports_invalid_items(self):
+        payload = [
+            {'employee': self.employees[1].id, 'date': self.today.isoformat(), 'status': 'late'},
+            {'employee': self.employees[1].id, 'date': self.today.isoformat(), 'status': 'present'},
+            {'employee': 999999, 'date': self.today.isoformat(), 'status': 'present'},
+            {'employee': self.employees[2].id, 'date': 'yesterday', 'status': 'present'},
+        ]
+        response = self.client.post(self.url, payload, format='json')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        statuses = [result['status'] for result in response.data['results']]
+        self.assertEqual(statuses, ['created', 'invalid', 'invalid', 'invalid'])
+        self.assertIn('employee', response.data['results'][2]['errors'])
+        self.assertIn('date', response.data['results'][3]['errors'])
+
+    def test_bulk_query_count_is_constant(self):
+        self.client.post(self.url, [], format='json')  # warm the token cache
+        query_counts = []
+        for days_ago, employees in [(1, self.employees[:2]), (2, self.employees)]:
+            date = (self.today - timezone.timedelta(days=days_ago)).isoformat()
+            payload = [{'employee': employee.id, 'date': date, 'status': 'late'} for employee in employees]
+            with CaptureQueriesContext(connection) as queries:
+                self.client.post(self.url, payload, format='json')
+            query_counts.append(len(queries))
+        self.assertEqual(query_counts[0], query_counts[1])
+
+    def test_bulk_rejects_non_list(self):
+        response = self.client.post(self.url, {'employee': 1}, format='json')
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_bulk_requires_manager_or_admin(self):
+        user = User.objects.create_user(username='employee', password='testpassword')
+        token = Token.objects.create(user=user)
+        self.client.credentials(HTTP_AUTHORIZATION=f'Token {token.key}')
+        response = self.client.post(self.url, [], format='json')
+        self.assertEqual(response.status_code, status.HTTP_403_FORBIDDEN)
+
+
+class ListQueryCountTest(ListQueryCountMixin, TestCase):
+    def add_rows(self, start, stop):
+        for i in range(start, stop):
+            employee = Employee.objects.create(
+                name=f'Employee {i}',
+                email=f'employee{i}@example.com',
+                phone_number='1234567890',
+                address='Test Address',
+                department=self.department
+            )
+            Attendance.objects.create(employee=employee, date=self.today - timezone.timedelta(days=i), status='present')
+
+    def test_attendance_list(self):
+        self.assertConstantQueries(reverse('attendance-list'))
+
+
+class AttendanceKeysetPaginationTest(TestCase):
+    def setUp(self):
+        self.client = APIClient()
+        self.user = User.objects.create_user(username='admin', password='testpassword', is_staff=True)
+        self.token = Token.objects.create(user=self.user)
+        self.client.credentials(HTTP_AUTHORIZATION=f'Token {self.token.key}')
+
+        self.today = timezone.now().date()
+        department = Department.objects.create(name='Test Department')
+        employees = [
+            Employee.objects.create(
+                name=f'Employee {i}',
+                email=f'employee{i}@example.com',
+                phone_number='1234567890',
+                address='Test Address',
+                department=department
+            )
+            for i in range(3)
+        ]
+        # Several records share each date so the id tie-breaker matters
+        for day in range(12):
+            for employee in employees:
+                Attendance.objects.create(employee=employee,
+                                          date=self.today - timezone.timedelta(days=day),
+                                          status='present')
+        self.url = reverse('attendance-list')
+
+    def walk(self, url, link='next'):
+        pages = []
+        while url:
+            response = self.client.get(url)
+            self.assertEqual(response.status_code, status.HTTP_200_OK)
+            self.assertNotIn('count', response.data)
+            pages.append(response.data)
+            url = response.data[link]
+        return pages
+
+    def test_keyset_walks_every_row_once_in_order(self):
+        pages = self.walk(f'{self.url}?pagination=keyset')
+        ids = [row['id'] for page in pages for row in page['results']]
+        self.assertEqual(len(pages), 4)
+        self.assertEqual(len(ids), 36)
+        expected = list(Attendance.objects.order_by('-date', '-id').values_list('id', flat=True))
+        self.assertEqual(ids, expected)
+
+    def test_previous_links_walk_back(self):
+        pages = self.walk(f'{self.url}?pagination=keyset')
+        back = self.walk(pages[-1]['previous'], link='previous')
+        self.assertEqual([page['results'] for page in reversed(back)],
+                         [page['results'] for page in pages[:-1]])
+
+    def test_deep_page_costs_the_same_as_first(self):
+        pages = self.walk(f'{self.url}?pagination=keyset')
+        with CaptureQueriesContext(connection) as first:
+            self.client.get(f'{self.url}?pagination=keyset')
+        with CaptureQueriesContext(connection) as deep:
+            self.client.get(pages[2]['next'])
+        self.assertEqual(len(first), len(deep))
+        self.assertFalse(any('COUNT(' in query['sql'] for query in deep.captured_queries))
+
+    def test_keyset_respects_filters(self):
+        pages = self.walk(f'{self.url}?pagination=keyset&date={self.today}')
+        self.assertEqual(len(pages[0]['results']), 3)
+
+    def test_invalid_cursor(self):
+        response = self.client.get(f'{self.url}?cursor=not-a-cursor')
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+
+    def test_tampered_cursor(self):
+        for position in [['abc', 1], [{'a': 1}, 1], [str(self.today), 'x'], [None, None], [str(self.today)]]:
+            token = base64.urlsafe_b64encode(json.dumps([0, position]).encode()).decode()
+            response = self.client.get(f'{self.url}?cursor={token}')
+            self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND, position)
+
+    def test_seek_has_a_range_bound(self):
+        pages = self.walk(f'{self.url}?pagination=keyset')
+        with CaptureQueriesContext(connection) as captured:
+            self.client.get(pages[0]['next'])
+        sql = next(query['sql'] for query in captured.captured_queries if 'attendance_attendance' in query['sql'])
+        self.assertIn('"attendance_attendance"."date" <= ', sql)
+
+    def test_page_number_pagination_is_default(self):
+        response = self.client.get(self.url)
+        self.assertEqual(response.data['count'], 36)
+
+
+class AttendanceExportTest(TestCase):
+    def setUp(self):
+        self.client = APIClient()
+        self.today = timezone.now().date()
+        department = Department.objects.create(name='Test Department')
+        self.employees = [
+            Employee.objects.create(
+                name=f'Employee {i}',
+                email=f'employee{i}@example.com',
+                phone_number='1234567890',
+                address='Test Address',
+                department=department
+            )
+            for i in range(2)
+        ]
+        for employee in self.employees:
+            for day in range(3):
+                Attendance.objects.create(employee=employee,
+                                          date=self.today - timezone.timedelta(days=day),
+                                          status='late' if day else 'present')
+        self.url = reverse('attendance-export')
+
+    def login(self, **kwargs):
+        user = User.objects.create_user(username='user', password='testpassword', **kwargs)
+        token = Token.objects.create(user=user)
+        self.client.credentials(HTTP_AUTHORIZATION=f'Token {token.key}')
+        return user
+
+    def read(self, response):
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        return b''.join(response.streaming_content).decode()
+
+    def test_csv_export(self):
+        self.login(is_staff=True)
+        lines = self.read(self.client.get(self.url)).splitlines()
+        self.assertEqual(lines[0], 'id,employee,employee_name,date,status,created_at,updated_at')
+        self.assertEqual(len(lines), 7)
+        self.assertIn(f',Employee 0,{self.today.isoformat()},present,', lines[1])
+
+    def test_ndjson_export_honours_filters(self):
+        self.login(is_staff=True)
+        response = self.client.get(self.url, {'export_format': 'ndjson', 'status': 'late'})
+        self.assertEqual(response['Content-Type'], 'application/x-ndjson')
+        records = [json.loads(line) for line in self.read(response).splitlines()]
+        self.assertEqual(len(records), 4)
+        self.assertTrue(all(record['status'] == 'late' for record in records))
+
+    def test_export_is_scoped_for_employees(self):
+        user = self.login()
+        self.employees[1].user = user
+        self.employees[1].save()
+        response = self.client.get(self.url, {'export_format': 'ndjson'})
+        records = [json.loads(line) for line in self.read(response).splitlines()]
+        self.assertEqual({record['employee'] for record in records}, {self.employees[1].id})
+
+    def test_unknown_export_format(self):
+        self.login(is_staff=True)
+        response = self.client.get(self.url, {'export_format': 'xlsx'})
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+
+@override_settings(AUTH_TOKEN_CACHE_TIMEOUT=300)
+class AttendanceFastReadTest(TestCase):
+    """
+    List and retrieve are served from values() rows; the JSON must match
+    what AttendanceSerializer produces for the same records.
+    """
+    def setUp(self):
+        self.client = APIClient()
+        self.user = User.objects.create_user(username='admin', password='testpassword', is_staff=True)
+        self.token = Token.objects.create(user=self.user)
+        self.client.credentials(HTTP_AUTHORIZATION=f'Token {self.token.key}')
+        self.today = timezone.now().date()
+        department = Department.objects.create(name='Test Department')
+        self.employee = Employee.objects.create(
+            name='Test Employee',
+            email='test@example.com',
+            phone_number='1234567890',
+            address='Test Address',
+            department=department
+        )
+        for day in range(3):
+            Attendance.objects.create(employee=self.employee,
+                                      date=self.today - timezone.timedelta(days=day),
+                                      status='late')
+
+    def expected(self, queryset):
+        return AttendanceSerializer(queryset, many=True).data
+
+    def test_list_matches_serializer(self):
+        response = self.client.get(reverse('attendance-list'), {'ordering': 'date'})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.json()['results'],
+                         json.loads(json.dumps(self.expected(Attendance.objects.order_by('date')))))
+
+    def test_retrieve_matches_serializer(self):
+        attendance = Attendance.objects.first()
+        response = self.client.get(reverse('attendance-detail', kwargs={'pk': attendance.pk}))
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.json(), json.loads(json.dumps(AttendanceSerializer(attendance).data)))
+
+    def test_keyset_page_matches_serializer(self):
+        response = self.client.get(reverse('attendance-list'), {'pagination': 'keyset', 'page_size': 2})
+        self.assertEqual(response.json()['results'],
+                         json.loads(json.dumps(self.expected(Attendance.objects.order_by('-date', '-id')[:2]))))
+        response = self.client.get(response.data['next'])
+        self.assertEqual(len(response.data['results']), 1)
+
+    def test_single_query_reads_model_columns_only(self):
+        url = reverse('attendance-list')
+        self.client.get(url, {'pagination': 'keyset'})  # warm the token cache
+        with CaptureQueriesContext(connection) as queries:
+            self.client.get(url, {'pagination': 'keyset'})
+        self.assertEqual(len(queries), 1)
+        # The joined employee contributes only the columns the payload needs
+        self.assertNotIn('"address"', queries[0]['sql'])
+
+    def test_not_modified_on_fast_path(self):
+        url = reverse('attendance-list')
+        etag = self.client.get(url)['ETag']
+        self.assertEqual(self.client.get(url, HTTP_IF_NONE_MATCH=etag).status_code,
+                         status.HTTP_304_NOT_MODIFIED)
+        self.employee.save()
+        self.assertEqual(self.client.get(url, HTTP_IF_NONE_MATCH=etag).status_code, status.HTTP_200_OK)
+
+
+@override_settings(AUTH_TOKEN_CACHE_TIMEOUT=300)
+class AttendanceStreakTest(TestCase):
+    def setUp(self):
+        self.client = APIClient()
+        self.user = User.objects.create_user(username='admin', password='testpassword', is_staff=True)
+        self.token = Token.objects.create(user=self.user)
+        self.client.credentials(HTTP_AUTHORIZATION=f'Token {self.token.key}')
+        department = Department.objects.create(name='Test Department')
+        self.employees = [
+            Employee.objects.create(name=f'Employee {i}', email=f'employee{i}@example.com',
+                                    phone_number='1234567890', address='Test Address', department=department)
+            for i in range(3)
+        ]
+        # 2024-01-01 is a Monday
+        self.start = timezone.datetime(2024, 1, 1).date()
+        patterns = [
+            'AAPAAAPL',   # longest absence run of 3; absent one Monday, late the next
+            'PAAPAAPP',   # two runs of 2; the later one wins the tie
+            'PLLLPPPP',   # no absences, a lateness run of 3
+        ]
+        codes = {'A': 'absent', 'P': 'present', 'L': 'late'}
+        for employee, pattern in zip(self.employees, patterns):
+            for offset, code in enumerate(pattern):
+                Attendance.objects.create(employee=employee, date=self.start + timezone.timedelta(days=offset),
+                                          status=codes[code])
+        self.url = reverse('attendance-streaks')
+        self.params = {'start_date': '2024-01-01', 'end_date': '2024-01-31'}
+
+    def test_absence_streaks(self):
+        response = self.client.get(self.url, self.params)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual([(row['employee'], row['length'], row['start_date'], row['end_date'])
+                          for row in response.data['streaks']],
+                         [(self.employees[0].pk, 3, '2024-01-04', '2024-01-06'),
+                          (self.employees[1].pk, 2, '2024-01-05', '2024-01-06')])
+        self.assertEqual(response.data['streaks'][0]['employee_name'], 'Employee 0')
+
+    def test_lateness_streaks_and_limit(self):
+        response = self.client.get(self.url, {**self.params, 'status': 'late', 'limit': 1})
+        self.assertEqual([(row['employee'], row['length']) for row in response.data['streaks']],
+                         [(self.employees[2].pk, 3)])
+
+    def test_weekday_absences(self):
+        response = self.client.get(self.url, self.params)
+        self.assertEqual(response.data['weekday_absences'], [
+            {'employee': self.employees[0].pk, 'employee_name': 'Employee 0',
+             'absences': 1, 'records': 2, 'rate': 0.5},
+        ])
+
+    def test_sql_matches_streaming(self):
+        queryset = Attendance.objects.all()
+        for record_status in STREAK_STATUSES:
+            self.assertEqual(longest_streaks_sql(queryset, record_status, 10),
+                             longest_streaks_streaming(queryset, record_status, 10))
+
+    def test_constant_queries(self):
+        self.client.get(self.url, self.params)  # warm the token cache
+        with CaptureQueriesContext(connection) as queries:
+            self.client.get(self.url, self.params)
+        self.assertEqual(len(queries), 3)
+
+    def test_validation(self):
+        for params in [{'status': 'present'}, {'limit': 0}, {'weekday': 8}, {'start_date': 'soon'}]:
+            response = self.client.get(self.url, {**self.params, **params})
+            self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+
+class AttendanceArchiveTest(TestCase):
+    def setUp(self):
+        department = Department.objects.create(name='Test Department')
+        self.employee = Employee.objects.create(name='Test Employee', email='test@example.com',
+                                                phone_number='1234567890', address='Test Address',
+                                                department=department)
+        self.current = timezone.localdate().replace(day=1)
+        self.old = add_months(self.current, -30)
+        for month in [self.old, add_months(self.current, -29), self.current]:
+            for day in [1, 2]:
+                Attendance.objects.create(employee=self.employee, date=month.replace(day=day), status='present')
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.directory = directory.name
+
+    def test_add_months(self):
+        self.assertEqual(add_months(date(2024, 11, 1), 3), date(2025, 2, 1))
+        self.assertEqual(add_months(date(2024, 1, 1), -1), date(2023, 12, 1))
+
+    def test_archive_month_writes_file_and_keeps_summaries(self):
+        summaries = DailyAttendanceSummary.objects.filter(date__lt=add_months(self.old, 1)).count()
+        path, records = archive_month(self.old, self.directory)
+        self.assertEqual(records, 2)
+        with gzip.open(path, 'rt', newline='') as handle:
+            rows = list(csv.DictReader(handle))
+        self.assertEqual([row['date'] for row in rows], [str(self.old), str(self.old.replace(day=2))])
+        self.assertFalse(Attendance.objects.filter(date__lt=add_months(self.old, 1)).exists())
+        self.assertEqual(DailyAttendanceSummary.objects.filter(date__lt=add_months(self.old, 1)).count(),
+                         summaries)
+
+        # A second archive of the same month gets its own file
+        Attendance.objects.create(employee=self.employee, date=self.old.replace(day=3), status='late')
+        second, records = archive_month(self.old, self.directory)
+        self.assertNotEqual(second, path)
+        self.assertEqual(records, 1)
+
+    def test_command_archives_months_outside_retention(self):
+        out = StringIO()
+        call_command('archive_attendance', retain_months=24, directory=self.directory, stdout=out)
+        self.assertEqual(archivable_months(add_months(self.current, -24)), [])
+        self.assertEqual(sorted(os.listdir(self.directory)),
+                         [f'attendance-{add_months(self.current, -30):%Y-%m}.csv.gz',
+                          f'attendance-{add_months(self.current, -29):%Y-%m}.csv.gz'])
+        self.assertEqual(Attendance.objects.count(), 2)
+
+    def test_dry_run_changes_nothing(self):
+        out = StringIO()
+        call_command('archive_attendance', retain_months=24, directory=self.directory, dry_run=True, stdout=out)
+        self.assertIn('2 month(s)', out.getvalue())
+        self.assertEqual(Attendance.objects.count(), 6)
+        self.assertEqual(os.listdir(self.directory), [])
+
+    def test_archived_records_are_not_reported_as_deleted(self):
+        # Delta sync clients keep archived months
+        archive_month(self.old, self.directory)
+        self.assertFalse(Tombstone.objects.exists())
+
+    def test_partitions_are_created_after_migrate(self):
+        with mock.patch('attendance.signals.ensure_partitions') as ensure_partitions:
+            emit_post_migrate_signal(verbosity=0, interactive=False, db='default')
+        ensure_partitions.assert_called_once_with(MONTHS_AHEAD, 'default')
+
+    def test_partitioned_only_on_postgresql(self):
+        self.assertEqual(is_partitioned(), connection.vendor == 'postgresql')
+
+    def test_failed_archive_removes_its_file_and_keeps_records(self):
+        with mock.patch('attendance.partitions.csv.writer', side_effect=RuntimeError('disk full')):
+            with self.assertRaisesMessage(RuntimeError, 'disk full'):
+                archive_month(self.old, self.directory)
+        self.assertEqual(os.listdir(self.directory), [])
+        self.assertEqual(Attendance.objects.filter(date__lt=add_months(self.old, 1)).count(), 2)
+
+        # The original error surfaces when the file was never created
+        with mock.patch('attendance.partitions.gzip.open', side_effect=PermissionError('read-only')):
+            with self.assertRaisesMessage(PermissionError, 'read-only'):
+                archive_month(self.old, self.directory)
+
+    @skipUnless(connection.vendor == 'postgresql', 'Partitioning is PostgreSQL only')
+    def test_archive_drops_the_monthly_partition(self):
+        create_partition(self.old)
+        self.assertIn(self.old, list_partitions())
+        path, records = archive_month(self.old, self.directory)
+        self.assertEqual(records, 2)
+        self.assertNotIn(self.old, list_partitions())
+        self.assertEqual(Attendance.objects.count(), 4)
+
+
+@skipUnless(connection.vendor == 'postgresql', 'Partitioning is PostgreSQL only')
+class AttendancePartitionMigrationTest(TransactionTestCase):
+    def migrate(self, target):
+        executor = MigrationExecutor(connection)
+        executor.migrate([target])
+
+    def test_migration_round_trip_keeps_records(self):
+        leaf, = MigrationExecutor(connection).loader.graph.leaf_nodes('attendance')
+        department = Department.objects.create(name='Test Department')
+        employee = Employee.objects.create(name='Test Employee', email='test@example.com',
+                                           phone_number='1234567890', address='Test Address',
+                                           department=department)
+        current = timezone.localdate().replace(day=1)
+        for offset in [-14, -1, 0, 2, 60]:
+            Attendance.objects.create(employee=employee, date=add_months(current, offset), status='present')
+        deleted = Attendance.objects.create(employee=employee, date=current.replace(day=2), status='late')
+        deleted_id = deleted.pk
+        deleted.delete()
+        expected = list(Attendance.objects.order_by('id').values_list('id', 'date', 'status'))
+        self.assertTrue(is_partitioned())
+
+        try:
+            self.migrate(('attendance', '0004_filter_indexes'))
+            self.assertFalse(is_partitioned())
+            self.assertEqual(list(Attendance.objects.order_by('id').values_list('id', 'date', 'status')), expected)
+        finally:
+            self.migrate(leaf)
+        self.assertTrue(is_partitioned())
+        self.assertEqual(list(Attendance.objects.order_by('id').values_list('id', 'date', 'status')), expected)
+        # Far-off months land in the default partition; ids are never reused
+        self.assertNotIn(add_months(current, 60), list_partitions())
+        added = Attendance.objects.create(employee=employee, date=current.replace(day=3), status='absent')
+        self.assertGreater(added.pk, deleted_id)
+
+
+class AttendanceSyncTest(TestCase):
+    def setUp(self):
+        # Include rows written a moment ago in the current pass
+        patcher = mock.patch.object(AttendanceViewSet, 'sync_settle_seconds', 0)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        self.client = APIClient()
+        self.user = User.objects.create_user(username='admin', password='testpassword', is_staff=True)
+        self.client.credentials(HTTP_AUTHORIZATION=f'Token {Token.objects.create(user=self.user).key}')
+        department = Department.objects.create(name='Test Department')
+        self.employees = [
+            Employee.objects.create(name=f'Employee {i}', email=f'employee{i}@example.com',
+                                    phone_number='1234567890', address='Test Address', department=department)
+            for i in range(2)
+        ]
+        self.records = [
+            Attendance.objects.create(employee=self.employees[i % 2], date=date(2024, 1, 1 + i), status='present')
+            for i in range(5)
+        ]
+        self.url = reverse('attendance-sync')
+
+    def sync(self, client=None, **params):
+        response = (client or self.client).get(self.url, params)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        return response.data
+
+    def test_full_download_then_only_changes(self):
+        data = self.sync()
+        self.assertEqual([row['id'] for row in data['changed']], [record.pk for record in self.records])
+        self.assertEqual(data['deleted'], [])
+        self.assertFalse(data['has_more'])
+
+        self.assertEqual(self.sync(sync_token=data['sync_token'])['changed'], [])
+
+        self.records[1].status = 'late'
+        self.records[1].save()
+        deleted_id = self.records[3].pk
+        self.records[3].delete()
+        changes = self.sync(sync_token=data['sync_token'])
+        self.assertEqual([(row['id'], row['status']) for row in changes['changed']], [(self.records[1].pk, 'late')])
+        self.assertEqual(changes['deleted'], [deleted_id])
+
+    def test_pages_through_one_pass(self):
+        first = self.sync(page_size=2)
+        self.assertTrue(first['has_more'])
+        # Rows changed mid-pass wait for the next pass
+        Attendance.objects.create(employee=self.employees[0], date=date(2024, 2, 1), status='absent')
+        second = self.sync(page_size=2, sync_token=first['sync_token'])
+        third = self.sync(page_size=2, sync_token=second['sync_token'])
+        self.assertFalse(third['has_more'])
+        ids = [row['id'] for page in [first, second, third] for row in page['changed']]
+        self.assertEqual(ids, [record.pk for record in self.records])
+        self.assertEqual(len(self.sync(sync_token=third['sync_token'])['changed']), 1)
+
+    def test_employees_only_see_their_own_changes(self):
+        user = User.objects.create_user(username='employee', password='testpassword', email='employee0@example.com')
+        self.employees[0].user = user
+        self.employees[0].save()
+        client = APIClient()
+        client.credentials(HTTP_AUTHORIZATION=f'Token {Token.objects.create(user=user).key}')
+        since = timezone.now().isoformat()
+        own_id = self.records[0].pk
+        self.records[0].delete()
+        self.records[1].delete()
+        data = self.sync(client, updated_since=since)
+        self.assertEqual(data['deleted'], [own_id])
+        self.assertEqual({row['employee'] for row in self.sync(client)['changed']}, {self.employees[0].pk})
+
+    def test_rejects_bad_tokens(self):
+        self.assertEqual(self.client.get(self.url, {'sync_token': 'nope'}).status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(self.client.get(self.url, {'updated_since': 'yesterday'}).status_code,
+                         status.HTTP_400_BAD_REQUEST)
+        # Older than the deletion history: start over
+        response = self.client.get(self.url, {'updated_since': '2000-01-01T00:00:00Z'})
+        self.assertEqual(response.status_code, status.HTTP_410_GONE)
@@ -1,10 +1,11 @@
 from django.urls import path, include
 from rest_framework.routers import DefaultRouter
-from .views import AttendanceViewSet
+from .views import AttendanceViewSet, AsyncAttendanceListView
 
 router = DefaultRouter()
 router.register('attendances', AttendanceViewSet)
 
 urlpatterns = [
     path('', include(router.urls)),
+    path('async/attendances/', AsyncAttendanceListView.as_view(), name='async-attendance-list'),
 ]
\ No newline at end of file
@@ -1,18 +1,54 @@
-from rest_framework import viewsets, filters
+from rest_framework import viewsets, filters, status
+from rest_framework.decorators import action
+from rest_framework.response import Response
 from django_filters.rest_framework import DjangoFilterBackend
+from collections import Counter
+from datetime import timedelta
+from django.db import transaction
+from django.utils import timezone
+from django.utils.dateparse import parse_date
+from employees.models import Employee
 from .models import Attendance
-from .serializers import AttendanceSerializer
-from employee_project.permissions import IsAdminUser, IsManagerUser, IsEmployeeUser, IsOwnerOrAdmin
+from .serializers import AttendanceSerializer, AttendanceBulkItemSerializer
+from .streaks import STREAK_STATUSES, longest_streaks, weekday_absences
+from .summaries import apply_attendance_changes
+from employee_project.async_views import AsyncListView
+from employee_project.conditional import ConditionalGetMixin
+from employee_project.exports import ExportMixin
+from employee_project.fastread import FastReadMixin
+from employee_project.pagination import PageNumberOrKeysetPagination
+from employee_project.permissions import IsAdminUser, IsManagerUser, IsEmployeeUser, IsOwnerOrAdmin, get_role
+from employee_project.sync import DeltaSyncMixin
 
-class AttendanceViewSet(viewsets.ModelViewSet):
-    queryset = Attendance.objects.all()
+class AttendanceViewSet(FastReadMixin, ConditionalGetMixin, ExportMixin, DeltaSyncMixin, viewsets.ModelViewSet):
+    queryset = Attendance.objects.select_related('employee')
     serializer_class = AttendanceSerializer
+    conditional_related = ['employee']
+    sync_scope_tombstones = True
     filter_backends = [DjangoFilterBackend, filters.OrderingFilter]
     filterset_fields = ['employee', 'date', 'status']
     ordering_fields = ['date', 'status']
+    pagination_class = PageNumberOrKeysetPagination
+    keyset_ordering = ['-date', '-id']
+    export_fields = [
+        ('id', 'id'),
+        ('employee', 'employee'),
+        ('employee_name', 'employee__name'),
+        ('date', 'date'),
+        ('status', 'status'),
+        ('created_at', 'created_at'),
+        ('updated_at', 'updated_at'),
+    ]
+    export_filename = 'attendance'
+    bulk_batch_size = 500
+    bulk_max_items = 5000
+    streak_window_days = 90
+    max_streak_window_days = 366
+    streak_limit = 10
+    max_streak_limit = 100
     
     def get_permissions(self):
-        if self.action in ['create', 'destroy']:
+        if self.action in ['create', 'destroy', 'bulk']:
             permission_classes = [IsAdminUser|IsManagerUser]
         elif self.action in ['update', 'partial_update']:
             permission_classes = [IsAdminUser|IsManagerUser]
@@ -22,16 +58,172 @@ class AttendanceViewSet(viewsets.ModelViewSet):
     
     def get_queryset(self):
         queryset = super().get_queryset()
-        user = self.request.user
+        role = get_role(self.request.user)
         
         # If user is admin or manager, return all records
-        if user.is_staff or (hasattr(user, 'profile') and user.profile.is_manager):
+        if role.is_staff or role.is_manager:
             return queryset
             
         # For regular employees, only return their own records
-        if hasattr(user, 'employee'):
-            return queryset.filter(employee=user.employee)
+        if role.employee_id is not None:
+            return queryset.filter(employee_id=role.employee_id)
             
         return Attendance.objects.none()
 
-    
\ No newline at end of file
+    @action(detail=False, methods=['post'])
+    def bulk(self, request):
+        """
+        Insert or update many records at once, keyed on (employee, date).
+        Returns one result per submitted item, in order.
+        """
+        items = request.data
+        if not isinstance(items, list):
+            return Response({"detail": "Expected a list of attendance records"},
+                            status=status.HTTP_400_BAD_REQUEST)
+        if len(items) > self.bulk_max_items:
+            return Response({"detail": f"At most {self.bulk_max_items} records per request"},
+                            status=status.HTTP_400_BAD_REQUEST)
+
+        results = [None] * len(items)
+        valid = {}
+        for index, item in enumerate(items):
+            serializer = AttendanceBulkItemSerializer(data=item)
+            if not serializer.is_valid():
+                results[index] = {'index': index, 'status': 'invalid', 'errors': serializer.errors}
+                continue
+            data = serializer.validated_data
+            key = (data['employee'], data['date'])
+            if key in valid:
+                results[index] = {'index': index, 'status': 'invalid',
+                                  'errors': {'non_field_errors': ['Duplicate employee and date in request']}}
+                continue
+            valid[key] = (index, data['status'])
+
+        employee_ids = {employee_id for employee_id, _ in valid}
+        departments = dict(Employee.objects.filter(id__in=employee_ids).values_list('id', 'department_id'))
+        for key in [key for key in valid if key[0] not in departments]:
+            index, _ = valid.pop(key)
+            results[index] = {'index': index, 'status': 'invalid',
+                              'errors': {'employee': [f'Invalid pk "{key[0]}" - object does not exist.']}}
+
+        if valid:
+            employee_ids = {employee_id for employee_id, _ in valid}
+            dates = {date for _, date in valid}
+            with transaction.atomic():
+                # Locked so concurrent single-record writes cannot change a
+                # status between reading it and moving its summary count
+                existing = self._existing_records(employee_ids, dates, lock=True)
+                Attendance.objects.bulk_create(
+                    [Attendance(employee_id=employee_id, date=date, status=record_status)
+                     for (employee_id, date), (_, record_status) in valid.items()],
+                    batch_size=self.bulk_batch_size,
+                    update_conflicts=True,
+                    unique_fields=['employee', 'date'],
+                    update_fields=['status', 'updated_at'],
+                )
+                # bulk_create bypasses the signals that maintain the summaries
+                changes = Counter()
+                for (employee_id, date), (_, record_status) in valid.items():
+                    department_id = departments[employee_id]
+                    if (employee_id, date) in existing:
+                        changes[date, department_id, existing[employee_id, date][1]] -= 1
+                    changes[date, department_id, record_status] += 1
+                apply_attendance_changes(changes, chunk_size=self.bulk_batch_size)
+            ids = self._existing_records(employee_ids, dates)
+            for key, (index, record_status) in valid.items():
+                results[index] = {'index': index,
+                                  'status': 'updated' if key in existing else 'created',
+                                  'id': ids[key][0],
+                                  'employee': key[0],
+                                  'date': key[1],
+                                  'attendance_status': record_status}
+
+        counts = {'created': 0, 'updated': 0, 'invalid': 0}
+        for result in results:
+            counts[result['status']] += 1
+        return Response({**counts, 'results': results}, status=status.HTTP_200_OK)
+
+    @action(detail=False, methods=['get'])
+    def streaks(self, request):
+        """
+        Top-N employees by longest run of consecutive ``status`` records
+        (``absent`` by default, or ``late``) and by absences on ``weekday``
+        (ISO, 1 = Monday) within ``start_date``..``end_date``. Scoped like
+        the list and narrowed by the optional ``employee``/``department``.
+        """
+        params = request.query_params
+        end_date = params.get('end_date')
+        start_date = params.get('start_date')
+        try:
+            end_date = parse_date(end_date) if end_date else timezone.now().date()
+            start_date = (parse_date(start_date) if start_date
+                          else end_date - timedelta(days=self.streak_window_days - 1))
+        except ValueError:
+            start_date = end_date = None
+        if start_date is None or end_date is None:
+            return Response({"detail": "Dates must be in YYYY-MM-DD format"},
+                            status=status.HTTP_400_BAD_REQUEST)
+        if start_date > end_date:
+            return Response({"detail": "start_date must not be after end_date"},
+                            status=status.HTTP_400_BAD_REQUEST)
+        if (end_date - start_date).days >= self.max_streak_window_days:
+            return Response({"detail": f"Date window is limited to {self.max_streak_window_days} days"},
+                            status=status.HTTP_400_BAD_REQUEST)
+
+        streak_status = params.get('status', 'absent')
+        if streak_status not in STREAK_STATUSES:
+            return Response({"detail": f"status must be one of {', '.join(STREAK_STATUSES)}"},
+                            status=status.HTTP_400_BAD_REQUEST)
+        try:
+            limit = int(params.get('limit', self.streak_limit))
+            weekday = int(params.get('weekday', 1))
+            lookups = {lookup: int(params[param])
+                       for param, lookup in [('employee', 'employee_id'), ('department', 'employee__department_id')]
+                       if params.get(param)}
+        except ValueError:
+            return Response({"detail": "limit, weekday, employee and department must be integers"},
+                            status=status.HTTP_400_BAD_REQUEST)
+        if not 1 <= limit <= self.max_streak_limit or not 1 <= weekday <= 7:
+            return Response({"detail": f"limit must be 1-{self.max_streak_limit} and weekday 1-7"},
+                            status=status.HTTP_400_BAD_REQUEST)
+
+        queryset = self.get_queryset().filter(date__range=(start_date, end_date), **lookups)
+        streaks = longest_streaks(queryset, streak_status, limit)
+        names = dict(Employee.objects
+                     .filter(id__in=[employee_id for employee_id, *_ in streaks])
+                     .values_list('id', 'name'))
+        return Response({
+            'start_date': start_date.isoformat(),
+            'end_date': end_date.isoformat(),
+            'status': streak_status,
+            'streaks': [
+                {'employee': employee_id,
+                 'employee_name': names.get(employee_id),
+                 'length': length,
+                 'start_date': streak_start.isoformat(),
+                 'end_date': streak_end.isoformat()}
+                for employee_id, length, streak_start, streak_end in streaks
+            ],
+            'weekday': weekday,
+            'weekday_absences': [
+                {'employee': row['employee_id'],
+                 'employee_name': row['employee__name'],
+                 'absences': row['absences'],
+                 'records': row['records'],
+                 'rate': round(row['absences'] / row['records'], 2)}
+                for row in weekday_absences(queryset, weekday, limit)
+            ],
+        })
+
+    def _existing_records(self, employee_ids, dates, lock=False):
+        # Superset query: every (employee, date) combination of the batch
+        records = Attendance.objects.filter(employee_id__in=employee_ids, date__in=dates)
+        if lock:
+            records = records.select_for_update()
+        return {
+            (employee_id, date): (pk, record_status)
+            for pk, employee_id, date, record_status in records.values_list('id', 'employee_id', 'date', 'status')
+        }
+
+class AsyncAttendanceListView(AsyncListView):
+    viewset_class = AttendanceViewSet
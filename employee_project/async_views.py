@@ -0,0 +1,136 @@
+from abc import ABC, abstractmethod
+from asgiref.sync import sync_to_async
+from django.http import JsonResponse
+from django.views import View
+from rest_framework.authentication import get_authorization_header
+from rest_framework.exceptions import APIException, AuthenticationFailed, NotAuthenticated, NotFound
+from rest_framework.request import Request
+from rest_framework.settings import api_settings
+from rest_framework.utils.urls import remove_query_param, replace_query_param
+from .authentication import CachedTokenAuthentication
+from .fastread import FastRows
+
+
+async def aauthenticate(request):
+    """
+    Token authentication for async views; mirrors ``TokenAuthentication``.
+    Returns None when no token was sent.
+    """
+    authenticator = CachedTokenAuthentication()
+    header = get_authorization_header(request).split()
+    if not header or header[0].lower() != authenticator.keyword.lower().encode():
+        return None
+    if len(header) != 2:
+        raise AuthenticationFailed('Invalid token header.')
+    try:
+        key = header[1].decode()
+    except UnicodeError:
+        raise AuthenticationFailed('Invalid token header. Token string should not contain invalid characters.')
+    user, _ = await authenticator.aauthenticate_credentials(key)
+    return user
+
+
+class AsyncReadView(ABC, View):
+    """
+    Async GET endpoint that reuses a viewset's rules without running its
+    synchronous request cycle.
+
+    The viewset supplies the permissions of ``action``, role scoping
+    (``get_queryset``), filters and the fast read plan; rows are then
+    fetched with the async ORM, so the worker is free while the database
+    answers. The viewset must use ``FastReadMixin``. Subclasses implement
+    ``read``. Only reads are served here; the regular API remains the
+    place for writes, conditional requests and keyset pagination.
+    """
+    viewset_class = None
+    action = None
+    # Query parameters that never reach the filter backends
+    pagination_params = {'page'}
+
+    async def get(self, request, *args, **kwargs):
+        try:
+            user = await aauthenticate(request)
+            if user is None:
+                raise NotAuthenticated()
+            view = self.get_viewset(request, user, kwargs)
+            # The authenticator resolved the role the permission classes read
+            view.check_permissions(view.request)
+            queryset = await self.filter_queryset(view, view.get_queryset())
+            data = await self.read(request, view, queryset, **kwargs)
+        except APIException as exc:
+            response = JsonResponse({'detail': exc.detail}, status=exc.status_code)
+            if isinstance(exc, (NotAuthenticated, AuthenticationFailed)):
+                response['WWW-Authenticate'] = CachedTokenAuthentication.keyword
+            return response
+        return JsonResponse(data, safe=False)
+
+    def get_viewset(self, request, user, kwargs):
+        drf_request = Request(request)
+        drf_request.user = user
+        return self.viewset_class(request=drf_request, args=(), kwargs=kwargs,
+                                  action=self.action, format_kwarg=None)
+
+    async def filter_queryset(self, view, queryset):
+        # Filter backends may validate choices against the database
+        if set(view.request.query_params) - self.pagination_params:
+            return await sync_to_async(view.filter_queryset)(queryset)
+        return view.filter_queryset(queryset)
+
+    @abstractmethod
+    async def read(self, request, view, queryset, **kwargs):
+        """
+        The response payload for the filtered ``queryset``.
+        """
+
+
+class AsyncListView(AsyncReadView):
+    """
+    Page-number list with the same response shape as ``PageNumberPagination``.
+    """
+    action = 'list'
+    page_size = api_settings.PAGE_SIZE
+
+    async def read(self, request, view, queryset, **kwargs):
+        if not queryset.ordered:
+            queryset = queryset.order_by('pk')
+        count = await queryset.acount()
+        last_page = max((count - 1) // self.page_size + 1, 1)
+        page = request.GET.get('page', 1)
+        try:
+            page = last_page if page == 'last' else int(page)
+        except (TypeError, ValueError):
+            raise NotFound('Invalid page.')
+        if not 1 <= page <= last_page:
+            raise NotFound('Invalid page.')
+
+        offset = (page - 1) * self.page_size
+        rows = [row async for row in queryset[offset:offset + self.page_size]]
+        url = request.build_absolute_uri()
+        if page == 1:
+            previous = None
+        elif page == 2:
+            previous = remove_query_param(url, 'page')
+        else:
+            previous = replace_query_param(url, 'page', page - 1)
+        return {
+            'count': count,
+            'next': replace_query_param(url, 'page', page + 1) if page < last_page else None,
+            'previous': previous,
+            'results': FastRows(view.get_fast_read_plan(), rows, many=True).data,
+        }
+
+
+class AsyncDetailView(AsyncReadView):
+    action = 'retrieve'
+
+    def get_object_filter(self, view, **kwargs):
+        return {'pk': kwargs['pk']}
+
+    def get_not_found_message(self, view):
+        return f'No {view.queryset.model._meta.object_name} matches the given query.'
+
+    async def read(self, request, view, queryset, **kwargs):
+        row = await queryset.filter(**self.get_object_filter(view, **kwargs)).afirst()
+        if row is None:
+            raise NotFound(self.get_not_found_message(view))
+        return FastRows(view.get_fast_read_plan(), row).data
@@ -0,0 +1,90 @@
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.db import transaction
+from rest_framework.authentication import TokenAuthentication
+from rest_framework.authtoken.models import Token
+from .permissions import Role, get_role
+from .routers import use_primary
+
+CACHE_PREFIX = 'auth-token:'
+# Only what authentication and the permission classes need; the rest of
+# the user (password hash included) is loaded on first access
+USER_FIELDS = [field.attname for field in User._meta.concrete_fields
+               if field.attname in {'id', 'is_active', 'is_staff', 'is_superuser'}]
+
+
+def _delete_entries(keys):
+    """
+    Delete cached entries now and again when the current transaction
+    commits: a request running in between still reads the old rows and
+    may cache them again.
+    """
+    keys = [CACHE_PREFIX + key for key in keys]
+    if not keys:
+        return
+    cache.delete_many(keys)
+    if transaction.get_connection().in_atomic_block:
+        transaction.on_commit(lambda: cache.delete_many(keys))
+
+
+def invalidate_token(key):
+    _delete_entries([key])
+
+
+def invalidate_user_tokens(*user_ids):
+    user_ids = [user_id for user_id in user_ids if user_id is not None]
+    if not user_ids:
+        return
+    # Looked up now: a deleted user's tokens are gone by commit time
+    _delete_entries(list(Token.objects.filter(user_id__in=user_ids).values_list('key', flat=True)))
+
+
+class CachedTokenAuthentication(TokenAuthentication):
+    """
+    Token authentication that caches the token's user and resolved role.
+
+    The first request for a token runs the usual token/user join plus the
+    profile and employee lookups; later requests are served from the cache
+    without touching the database until the entry expires
+    (``AUTH_TOKEN_CACHE_TIMEOUT``) or is invalidated by the signal handlers
+    in ``employees.signals``. A timeout of 0 turns the cache off.
+    """
+    def authenticate_credentials(self, key):
+        entry = cache.get(CACHE_PREFIX + key) if settings.AUTH_TOKEN_CACHE_TIMEOUT else None
+        if entry is None:
+            return self._authenticate_and_cache(key)
+        return self._from_entry(key, entry)
+
+    async def aauthenticate_credentials(self, key):
+        """
+        Async variant for the ASGI read views: cache hits never leave the
+        event loop, misses run the database lookups in a worker thread.
+        """
+        entry = await cache.aget(CACHE_PREFIX + key) if settings.AUTH_TOKEN_CACHE_TIMEOUT else None
+        if entry is None:
+            return await sync_to_async(self._authenticate_and_cache)(key)
+        return self._from_entry(key, entry)
+
+    def _authenticate_and_cache(self, key):
+        # A token or profile created moments ago may not have reached the
+        # replicas yet, and a failed lookup would reject a fresh login
+        with use_primary():
+            user, token = super().authenticate_credentials(key)
+            entry = {
+                'user': {field: getattr(user, field) for field in USER_FIELDS},
+                'role': tuple(get_role(user)),
+                'created': token.created,
+            }
+        if settings.AUTH_TOKEN_CACHE_TIMEOUT:
+            cache.set(CACHE_PREFIX + key, entry, settings.AUTH_TOKEN_CACHE_TIMEOUT)
+        return user, token
+
+    def _from_entry(self, key, entry):
+        user = User.from_db('default', USER_FIELDS, [entry['user'][field] for field in USER_FIELDS])
+        user._role = Role(*entry['role'])
+        token = Token(key=key, user=user, created=entry['created'])
+        token._state.adding = False
+        token._state.db = 'default'
+        return user, token
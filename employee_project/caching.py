@@ -0,0 +1,107 @@
+import hashlib
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+from django.utils.cache import get_conditional_response
+from django.utils.http import parse_http_date_safe
+from rest_framework.response import Response
+from .permissions import get_role
+from .routers import use_primary
+
+VERSION_PREFIX = 'model-version:'
+RESPONSE_PREFIX = 'response:'
+
+
+def _version_key(model):
+    return VERSION_PREFIX + model._meta.label_lower
+
+
+def get_model_version(model):
+    version = cache.get(_version_key(model))
+    if version is None:
+        cache.add(_version_key(model), 1, None)
+        version = cache.get(_version_key(model), 1)
+    return version
+
+
+def _incr_version(model):
+    try:
+        cache.incr(_version_key(model))
+    except ValueError:
+        cache.set(_version_key(model), 2, None)
+
+
+def bump_model_version(model):
+    """
+    Invalidate every cached response built from ``model`` by moving its
+    version on; old entries are simply never read again and age out.
+    Inside a transaction the version moves again on commit, since a
+    request running in between still reads the old rows and may cache
+    them under the new version.
+    """
+    _incr_version(model)
+    if transaction.get_connection().in_atomic_block:
+        transaction.on_commit(lambda: _incr_version(model))
+
+
+class VersionedCacheMixin:
+    """
+    Caches the serialized payload of ``list`` and ``retrieve``.
+
+    Keys combine the version counter of every model in ``cache_models``
+    (bumped from the save/delete signal handlers), the action, the full
+    request path with its query string, and a role scope when
+    ``cache_vary_on_role`` is set. A write therefore makes earlier entries
+    unreachable at once. ``RESPONSE_CACHE_TIMEOUT`` only bounds how long
+    unreachable entries linger. Validator headers set by
+    ``ConditionalGetMixin`` are stored with the payload, and a cached ETag
+    still answers ``If-None-Match`` with a 304.
+    """
+    cache_responses = True
+    cache_models = []
+    cache_vary_on_role = False
+    cached_headers = ['ETag', 'Last-Modified', 'Vary']
+
+    def list(self, request, *args, **kwargs):
+        return self.cached_response(super().list, request, *args, **kwargs)
+
+    def retrieve(self, request, *args, **kwargs):
+        return self.cached_response(super().retrieve, request, *args, **kwargs)
+
+    def get_cache_scope(self, request):
+        if not self.cache_vary_on_role:
+            return 'all'
+        role = get_role(request.user)
+        if role.is_staff or role.is_manager:
+            return 'all'
+        return f'employee-{role.employee_id}'
+
+    def get_response_cache_key(self, request):
+        versions = '.'.join(str(get_model_version(model)) for model in self.cache_models)
+        digest = hashlib.md5(request.get_full_path().encode()).hexdigest()
+        label = self.queryset.model._meta.label_lower
+        return f'{RESPONSE_PREFIX}{label}:{versions}:{self.action}:{self.get_cache_scope(request)}:{digest}'
+
+    def cached_response(self, handler, request, *args, **kwargs):
+        if not self.cache_responses:
+            return handler(request, *args, **kwargs)
+        key = self.get_response_cache_key(request)
+        entry = cache.get(key)
+        if entry is not None:
+            headers = entry['headers']
+            last_modified = None
+            if getattr(self, 'honours_if_modified_since', lambda: False)():
+                last_modified = parse_http_date_safe(headers.get('Last-Modified', ''))
+            response = get_conditional_response(request, etag=headers.get('ETag'), last_modified=last_modified)
+            if response is None:
+                response = Response(entry['data'])
+            for header, value in headers.items():
+                response[header] = value
+            return response
+        # A lagging replica could otherwise store old rows under the new version
+        with use_primary():
+            response = handler(request, *args, **kwargs)
+        if response.status_code == 200:
+            headers = {header: response[header] for header in self.cached_headers if response.has_header(header)}
+            cache.set(key, {'data': response.data, 'headers': headers}, settings.RESPONSE_CACHE_TIMEOUT)
+        return response
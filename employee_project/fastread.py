@@ -0,0 +1,132 @@
+from rest_framework import serializers
+
+# Serializer fields whose output differs from the raw database value
+FORMATTED_FIELDS = (
+    serializers.DateTimeField,
+    serializers.DateField,
+    serializers.TimeField,
+    serializers.DecimalField,
+    serializers.UUIDField,
+    serializers.DurationField,
+)
+
+
+def build_plan(serializer, prefix=''):
+    """
+    Flatten a serializer into ``(name, lookup, formatter, nested)`` steps.
+
+    ``lookup`` is the ``values()`` key for the field's source, and
+    ``formatter`` is the bound field's ``to_representation``, used only for
+    field types whose output differs from the raw value. Nested
+    serializers become a sub-plan, which is None when the related row is
+    missing. Raises ``ValueError`` for fields that cannot be read from a
+    flat row (``source='*'``, method fields, many-related fields).
+    """
+    plan = []
+    for name, field in serializer.fields.items():
+        if field.write_only:
+            continue
+        if field.source == '*' or isinstance(field, (serializers.SerializerMethodField,
+                                                     serializers.ManyRelatedField,
+                                                     serializers.ListSerializer)):
+            raise ValueError(f'{name} cannot be read from a flat row')
+        lookup = prefix + field.source.replace('.', '__')
+        if isinstance(field, serializers.BaseSerializer):
+            plan.append((name, f'{lookup}__pk', None, build_plan(field, f'{lookup}__')))
+        else:
+            formatter = field.to_representation if isinstance(field, FORMATTED_FIELDS) else None
+            plan.append((name, lookup, formatter, None))
+    return plan
+
+
+def plan_lookups(plan):
+    for _, lookup, _, nested in plan:
+        yield lookup
+        if nested:
+            yield from plan_lookups(nested)
+
+
+def render_row(plan, row):
+    data = {}
+    for name, lookup, formatter, nested in plan:
+        value = row[lookup]
+        if nested is not None:
+            data[name] = None if value is None else render_row(nested, row)
+        elif formatter is not None and value is not None:
+            data[name] = formatter(value)
+        else:
+            data[name] = value
+    return data
+
+
+class FastRows:
+    """
+    Stand-in for a serializer on the fast read path: exposes ``data`` for
+    rows produced by ``values()`` using a precomputed plan.
+    """
+    def __init__(self, plan, instance, many=False):
+        self.plan = plan
+        self.instance = instance
+        self.many = many
+
+    @property
+    def data(self):
+        if self.many:
+            return [render_row(self.plan, row) for row in self.instance]
+        return render_row(self.plan, self.instance)
+
+
+class FastReadMixin:
+    """
+    Serves ``list`` and ``retrieve`` from flat ``values()`` rows instead of
+    model instances and per-row ``ModelSerializer`` calls.
+
+    The plan is derived once per request from the view's serializer, so the
+    JSON shape is identical. Related columns such as ``employee__name`` are
+    fetched through the join in the same query. Views can opt out per
+    request by overriding ``can_use_fast_read``.
+    """
+    fast_read = True
+
+    def use_fast_read(self):
+        if getattr(self, '_fast_read', None) is None:
+            self._fast_read = (self.fast_read
+                               and self.action in ['list', 'retrieve']
+                               and self.request.method == 'GET'
+                               and self.can_use_fast_read())
+        return self._fast_read
+
+    def can_use_fast_read(self):
+        return True
+
+    def get_fast_read_plan(self):
+        if getattr(self, '_fast_read_plan', None) is None:
+            serializer_class = self.get_serializer_class()
+            self._fast_read_plan = build_plan(serializer_class(context=self.get_serializer_context()))
+        return self._fast_read_plan
+
+    def get_fast_read_lookups(self):
+        lookups = list(dict.fromkeys(plan_lookups(self.get_fast_read_plan())))
+        if hasattr(self, 'conditional_related'):
+            # Columns the conditional GET validators read, for embedded relations only
+            related = [f'{name}__updated_at' for name in self.conditional_related
+                       if any(lookup.startswith(f'{name}__') for lookup in lookups)]
+            lookups = list(dict.fromkeys(['id', 'updated_at'] + lookups + related))
+        return lookups
+
+    def filter_queryset(self, queryset):
+        queryset = super().filter_queryset(queryset)
+        if self.use_fast_read():
+            queryset = queryset.values(*self.get_fast_read_lookups())
+        return queryset
+
+    def get_serializer(self, *args, **kwargs):
+        instance = args[0] if args else kwargs.get('instance')
+        if self.use_fast_read() and 'data' not in kwargs and self._is_row_data(instance, kwargs.get('many')):
+            return FastRows(self.get_fast_read_plan(), instance, many=kwargs.get('many', False))
+        return super().get_serializer(*args, **kwargs)
+
+    def _is_row_data(self, instance, many):
+        if many:
+            return all(isinstance(row, dict) for row in instance)
+        return isinstance(instance, dict)
@@ -0,0 +1,187 @@
+import threading
+import time
+from bisect import bisect_left
+from contextvars import ContextVar
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.db import connections
+from django.db.backends.signals import connection_created
+from django.http import HttpResponse
+from rest_framework.decorators import api_view, permission_classes
+from .permissions import IsAdminUser
+
+# Latency histogram upper bounds, in seconds
+BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+# Methods reported by name; clients can send any token as the method, and
+# every distinct label value would be a new series
+HTTP_METHODS = {'GET', 'HEAD', 'POST', 'PUT', 'PATCH', 'DELETE', 'OPTIONS', 'TRACE', 'CONNECT'}
+
+_current = ContextVar('request_stats', default=None)
+
+
+class RequestStats:
+    __slots__ = ('queries', 'db_time')
+
+    def __init__(self):
+        self.queries = 0
+        self.db_time = 0.0
+
+
+def record_query(execute, sql, params, many, context):
+    """
+    Database execute wrapper; charges the query to the request being
+    handled in the current context, if any. Context variables follow
+    ``sync_to_async`` hops, so async views are covered too.
+    """
+    stats = _current.get()
+    if stats is None:
+        return execute(sql, params, many, context)
+    started = time.perf_counter()
+    try:
+        return execute(sql, params, many, context)
+    finally:
+        stats.queries += 1
+        stats.db_time += time.perf_counter() - started
+
+
+def install_wrapper(connection, **kwargs):
+    if record_query not in connection.execute_wrappers:
+        connection.execute_wrappers.append(record_query)
+
+
+connection_created.connect(install_wrapper)
+
+
+class MetricsRegistry:
+    """
+    In-process aggregates per (view, action, method): a latency histogram,
+    request count, and total query count and database time.
+    """
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.series = {}
+
+    def observe(self, labels, duration, queries, db_time):
+        with self.lock:
+            series = self.series.get(labels)
+            if series is None:
+                series = self.series[labels] = {'buckets': [0] * len(BUCKETS), 'count': 0, 'sum': 0.0,
+                                                'queries': 0, 'db_time': 0.0}
+            index = bisect_left(BUCKETS, duration)
+            if index < len(BUCKETS):
+                series['buckets'][index] += 1
+            series['count'] += 1
+            series['sum'] += duration
+            series['queries'] += queries
+            series['db_time'] += db_time
+
+    def reset(self):
+        with self.lock:
+            self.series = {}
+
+    def render(self):
+        with self.lock:
+            series = {labels: {**values, 'buckets': list(values['buckets'])}
+                      for labels, values in self.series.items()}
+        lines = [
+            '# HELP http_request_duration_seconds Request wall time by view.',
+            '# TYPE http_request_duration_seconds histogram',
+        ]
+        for labels, values in sorted(series.items()):
+            label_text = self.format_labels(labels)
+            cumulative = 0
+            for bound, count in zip(BUCKETS, values['buckets']):
+                cumulative += count
+                lines.append(f'http_request_duration_seconds_bucket{{{label_text},le="{bound}"}} {cumulative}')
+            lines.append(f'http_request_duration_seconds_bucket{{{label_text},le="+Inf"}} {values["count"]}')
+            lines.append(f'http_request_duration_seconds_sum{{{label_text}}} {values["sum"]:.6f}')
+            lines.append(f'http_request_duration_seconds_count{{{label_text}}} {values["count"]}')
+        for name, key, help_text in [
+            ('http_request_db_queries_total', 'queries', 'Database queries run by view.'),
+            ('http_request_db_duration_seconds_total', 'db_time', 'Time spent in database queries by view.'),
+        ]:
+            lines.append(f'# HELP {name} {help_text}')
+            lines.append(f'# TYPE {name} counter')
+            for labels, values in sorted(series.items()):
+                value = values[key]
+                lines.append(f'{name}{{{self.format_labels(labels)}}} '
+                             + (f'{value:.6f}' if isinstance(value, float) else str(value)))
+        return '\n'.join(lines) + '\n'
+
+    def format_labels(self, labels):
+        view, action, method = labels
+        return ','.join(f'{name}="{self.escape(value)}"'
+                        for name, value in [('view', view), ('action', action), ('method', method)])
+
+    def escape(self, value):
+        return value.replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+registry = MetricsRegistry()
+
+
+class RequestMetricsMiddleware:
+    """
+    Records wall time, query count and database time per resolved view and
+    viewset action. Adds a ``Server-Timing`` header and feeds the
+    in-process registry behind the ``metrics`` endpoint.
+
+    Queries are counted by a database execute wrapper installed once per
+    connection. Per request it costs one context variable lookup and two
+    clock reads per query, plus one locked update when the request ends.
+    Counting stops when the response is returned, so queries run while a
+    ``StreamingHttpResponse`` streams its content are not included.
+    """
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.is_async = iscoroutinefunction(get_response)
+        if self.is_async:
+            markcoroutinefunction(self)
+        # Connections opened before the middleware was loaded
+        for connection in connections.all(initialized_only=True):
+            install_wrapper(connection)
+
+    def __call__(self, request):
+        if self.is_async:
+            return self.__acall__(request)
+        stats = RequestStats()
+        token = _current.set(stats)
+        started = time.perf_counter()
+        try:
+            response = self.get_response(request)
+        finally:
+            _current.reset(token)
+        return self.finish(request, response, stats, time.perf_counter() - started)
+
+    async def __acall__(self, request):
+        stats = RequestStats()
+        token = _current.set(stats)
+        started = time.perf_counter()
+        try:
+            response = await self.get_response(request)
+        finally:
+            _current.reset(token)
+        return self.finish(request, response, stats, time.perf_counter() - started)
+
+    def finish(self, request, response, stats, duration):
+        registry.observe(self.get_labels(request), duration, stats.queries, stats.db_time)
+        response['Server-Timing'] = (f'app;dur={duration * 1000:.1f}, '
+                                     f'db;dur={stats.db_time * 1000:.1f};desc="{stats.queries} queries"')
+        return response
+
+    def get_labels(self, request):
+        method = request.method if request.method in HTTP_METHODS else 'other'
+        match = getattr(request, 'resolver_match', None)
+        if match is None:
+            return ('unresolved', '', method)
+        # Router-generated viewset views map HTTP methods to actions
+        actions = getattr(match.func, 'actions', None) or {}
+        return (match.view_name or match._func_path, actions.get(method.lower(), ''), method)
+
+
+@api_view(['GET'])
+@permission_classes([IsAdminUser])
+def metrics(request):
+    return HttpResponse(registry.render(), content_type='text/plain; version=0.0.4; charset=utf-8')
@@ -0,0 +1,165 @@
+import base64
+import json
+from django.core.exceptions import ValidationError
+from django.db.models import Q
+from rest_framework.exceptions import NotFound
+from rest_framework.pagination import BasePagination, PageNumberPagination
+from rest_framework.response import Response
+from rest_framework.settings import api_settings
+from rest_framework.utils.urls import replace_query_param
+
+
+class KeysetPagination(BasePagination):
+    """
+    Keyset ("seek") pagination over the view's ``keyset_ordering``.
+
+    Each page is fetched with a ``WHERE (key) < (last key)`` condition
+    instead of an OFFSET, and no COUNT(*) is run, so page N costs the same
+    as page 1. The last ordering field must be unique (normally ``id``).
+    """
+    cursor_query_param = 'cursor'
+    page_size = api_settings.PAGE_SIZE
+    page_size_query_param = 'page_size'
+    max_page_size = 100
+    invalid_cursor_message = 'Invalid cursor'
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.request = request
+        self.ordering = list(view.keyset_ordering)
+        self.fields = [field.lstrip('-') for field in self.ordering]
+        page_size = self.get_page_size(request)
+
+        reverse, position = self.decode_cursor(request, queryset.model)
+        ordering = self._invert(self.ordering) if reverse else self.ordering
+        queryset = queryset.order_by(*ordering)
+        if position is not None:
+            queryset = queryset.filter(self._seek(ordering, position))
+
+        results = list(queryset[:page_size + 1])
+        has_more = len(results) > page_size
+        results = results[:page_size]
+        if reverse:
+            results.reverse()
+
+        if reverse:
+            self.has_next, self.has_previous = position is not None, has_more
+        else:
+            self.has_next, self.has_previous = has_more, position is not None
+        self.first_key = self._key(results[0]) if results else None
+        self.last_key = self._key(results[-1]) if results else None
+        return results
+
+    def get_page_size(self, request):
+        try:
+            size = int(request.query_params[self.page_size_query_param])
+        except (KeyError, ValueError):
+            return self.page_size
+        return min(max(size, 1), self.max_page_size)
+
+    def get_paginated_response(self, data):
+        return Response({
+            'next': self.get_next_link(),
+            'previous': self.get_previous_link(),
+            'results': data,
+        })
+
+    def get_paginated_response_schema(self, schema):
+        return {
+            'type': 'object',
+            'required': ['results'],
+            'properties': {
+                'next': {'type': 'string', 'nullable': True, 'format': 'uri'},
+                'previous': {'type': 'string', 'nullable': True, 'format': 'uri'},
+                'results': schema,
+            },
+        }
+
+    def get_next_link(self):
+        if not self.has_next or self.last_key is None:
+            return None
+        return self.encode_cursor(False, self.last_key)
+
+    def get_previous_link(self):
+        if not self.has_previous or self.first_key is None:
+            return None
+        return self.encode_cursor(True, self.first_key)
+
+    def encode_cursor(self, reverse, position):
+        payload = json.dumps([int(reverse), position], default=str)
+        token = base64.urlsafe_b64encode(payload.encode()).decode()
+        return replace_query_param(self.request.build_absolute_uri(), self.cursor_query_param, token)
+
+    def decode_cursor(self, request, model):
+        """
+        ``(reverse, position)`` from the request's cursor, with every value
+        of the position parsed by its model field. Anything that does not
+        decode to one non-null value per ordering field is a 404.
+        """
+        token = request.query_params.get(self.cursor_query_param)
+        if not token:
+            return False, None
+        try:
+            reverse, position = json.loads(base64.urlsafe_b64decode(token.encode()).decode())
+            if not isinstance(position, list) or len(position) != len(self.fields):
+                raise ValueError
+            position = [model._meta.get_field(field).to_python(value)
+                        for field, value in zip(self.fields, position)]
+            if any(value is None for value in position):
+                raise ValueError
+        except (TypeError, ValueError, UnicodeDecodeError, ValidationError):
+            raise NotFound(self.invalid_cursor_message)
+        return bool(reverse), position
+
+    def _key(self, obj):
+        # Rows from values() querysets are dicts
+        if isinstance(obj, dict):
+            return [obj[field] for field in self.fields]
+        return [getattr(obj, field) for field in self.fields]
+
+    def _invert(self, ordering):
+        return [field[1:] if field.startswith('-') else f'-{field}' for field in ordering]
+
+    def _seek(self, ordering, position):
+        # (a, b) > (x, y)  <=>  a > x OR (a = x AND b > y), per field direction.
+        # The redundant a >= x bound lets the database range-scan the index
+        # from the cursor instead of filtering every row before it.
+        first = ordering[0].lstrip('-')
+        bound = Q(**{f'{first}__{"lte" if ordering[0].startswith("-") else "gte"}': position[0]})
+        condition = Q()
+        for i, field in enumerate(ordering):
+            name = field.lstrip('-')
+            lookup = 'lt' if field.startswith('-') else 'gt'
+            term = Q(**{f'{name}__{lookup}': position[i]})
+            for previous, value in zip(self.fields[:i], position[:i]):
+                term &= Q(**{previous: value})
+            condition |= term
+        return bound & condition
+
+
+class PageNumberOrKeysetPagination(PageNumberPagination):
+    """
+    Page-number pagination by default; switches to keyset pagination when
+    the request asks for it with ``?pagination=keyset`` or carries a
+    ``cursor``. In keyset mode the view's ``keyset_ordering`` takes
+    precedence over any ``?ordering=``.
+    """
+    mode_query_param = 'pagination'
+    keyset_class = KeysetPagination
+
+    def use_keyset(self, request, view):
+        if not getattr(view, 'keyset_ordering', None):
+            return False
+        return (request.query_params.get(self.mode_query_param) == 'keyset'
+                or self.keyset_class.cursor_query_param in request.query_params)
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.keyset = None
+        if self.use_keyset(request, view):
+            self.keyset = self.keyset_class()
+            return self.keyset.paginate_queryset(queryset, request, view)
+        return super().paginate_queryset(queryset, request, view)
+
+    def get_paginated_response(self, data):
+        if self.keyset is not None:
+            return self.keyset.get_paginated_response(data)
+        return super().get_paginated_response(data)
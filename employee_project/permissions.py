@@ -1,5 +1,32 @@
+from collections import namedtuple
+from django.core.exceptions import ObjectDoesNotExist
 from rest_framework import permissions
 
+Role = namedtuple('Role', ['is_staff', 'is_manager', 'employee_id'])
+
+
+def get_role(user):
+    """
+    Resolve the user's role once per user object. Authentication backends
+    may pre-populate it (see ``CachedTokenAuthentication``).
+    """
+    role = getattr(user, '_role', None)
+    if role is not None:
+        return role
+    if not (user and user.is_authenticated):
+        return Role(False, False, None)
+    try:
+        is_manager = user.profile.is_manager
+    except ObjectDoesNotExist:
+        is_manager = False
+    try:
+        employee_id = user.employee.pk
+    except ObjectDoesNotExist:
+        employee_id = None
+    user._role = Role(user.is_staff, is_manager, employee_id)
+    return user._role
+
+
 class IsAdminUser(permissions.BasePermission):
     """
     Allows access only to admin users.
@@ -13,8 +40,7 @@ class IsManagerUser(permissions.BasePermission):
     Manager users are identified by having the 'is_manager' flag in their user profile.
     """
     def has_permission(self, request, view):
-        return bool(request.user and hasattr(request.user, 'profile') and 
-                   request.user.profile.is_manager)
+        return bool(request.user and get_role(request.user).is_manager)
 
 class IsEmployeeUser(permissions.BasePermission):
     """
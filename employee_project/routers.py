@@ -0,0 +1,119 @@
+import hashlib
+import random
+from contextlib import contextmanager
+from contextvars import ContextVar
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+from django.core.cache import cache
+
+CACHE_PREFIX = 'replica-pin:'
+SAFE_METHODS = ('GET', 'HEAD', 'OPTIONS')
+
+# The replica reads in the current context go to, if any
+_replica = ContextVar('replica', default=None)
+
+
+@contextmanager
+def use_primary():
+    """
+    Send the reads inside the block to the primary, e.g. for results that
+    outlive the request and must not capture replica lag.
+    """
+    token = _replica.set(None)
+    try:
+        yield
+    finally:
+        _replica.reset(token)
+
+
+class ReplicaRouter:
+    """
+    Sends reads to the replica ``ReplicaRoutingMiddleware`` picked for the
+    current request, and everything else to the primary. Outside such
+    requests (writes, management commands, tests) every query goes to the
+    primary.
+    """
+    def db_for_read(self, model, **hints):
+        return _replica.get() or 'default'
+
+    def db_for_write(self, model, **hints):
+        return 'default'
+
+    def allow_relation(self, obj1, obj2, **hints):
+        # Replicas hold the same data as the primary
+        databases = {'default', *settings.DATABASE_REPLICAS}
+        if obj1._state.db in databases and obj2._state.db in databases:
+            return True
+        return None
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        # Replicas get their schema from the primary through replication
+        if db in settings.DATABASE_REPLICAS:
+            return False
+        return None
+
+
+class ReplicaRoutingMiddleware:
+    """
+    Lets safe-method requests read from one randomly picked replica unless
+    the client wrote recently. All reads of a request use the same replica,
+    so e.g. a page and its count come from the same snapshot. Any other request pins its client to the primary for
+    ``REPLICA_PIN_SECONDS``, so it reads its own writes even while the
+    replicas lag behind.
+
+    A client is identified by its ``Authorization`` header, or by its
+    address when it has none. Address pins only apply to reads without
+    that header: many clients can share an address behind a proxy or NAT,
+    and one anonymous POST must not send all of them to the primary. The
+    pins live in the default cache, which must be shared between workers.
+    """
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.is_async = iscoroutinefunction(get_response)
+        if self.is_async:
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if self.is_async:
+            return self.__acall__(request)
+        if not settings.DATABASE_REPLICAS:
+            return self.get_response(request)
+        if request.method not in SAFE_METHODS:
+            try:
+                return self.get_response(request)
+            finally:
+                cache.set(self.get_pin_key(request), True, settings.REPLICA_PIN_SECONDS)
+        pinned = cache.get(self.get_pin_key(request)) is not None
+        token = _replica.set(None if pinned else random.choice(settings.DATABASE_REPLICAS))
+        try:
+            return self.get_response(request)
+        finally:
+            _replica.reset(token)
+
+    async def __acall__(self, request):
+        if not settings.DATABASE_REPLICAS:
+            return await self.get_response(request)
+        if request.method not in SAFE_METHODS:
+            try:
+                return await self.get_response(request)
+            finally:
+                await cache.aset(self.get_pin_key(request), True, settings.REPLICA_PIN_SECONDS)
+        pinned = await cache.aget(self.get_pin_key(request)) is not None
+        token = _replica.set(None if pinned else random.choice(settings.DATABASE_REPLICAS))
+        try:
+            return await self.get_response(request)
+        finally:
+            _replica.reset(token)
+
+    def get_pin_key(self, request):
+        authorization = request.META.get('HTTP_AUTHORIZATION')
+        if authorization:
+            return self.make_key('auth', authorization)
+        return self.make_key('addr', request.META.get('REMOTE_ADDR', ''))
+
+    def make_key(self, kind, value):
+        # Never keep credentials in the cache verbatim
+        return f'{CACHE_PREFIX}{kind}:{hashlib.sha256(value.encode()).hexdigest()}'
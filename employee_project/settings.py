@@ -42,6 +42,9 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    # First, so its timings cover the rest of the stack
+    'employee_project.metrics.RequestMetricsMiddleware',
+    'employee_project.routers.ReplicaRoutingMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
@@ -76,6 +79,47 @@ DATABASES = {
     'default': env.db('DATABASE_URL')
 }
 
+# Optional read replicas, e.g. REPLICA_DATABASE_URLS=postgres://replica1/db,postgres://replica2/db.
+# Safe-method requests read from them (see employee_project.routers); tests
+# run every alias against the primary's test database.
+DATABASE_REPLICAS = []
+for number, url in enumerate(env.list('REPLICA_DATABASE_URLS', default=[]), start=1):
+    DATABASES[f'replica{number}'] = {**env.db_url_config(url), 'TEST': {'MIRROR': 'default'}}
+    DATABASE_REPLICAS.append(f'replica{number}')
+
+DATABASE_ROUTERS = ['employee_project.routers.ReplicaRouter']
+
+# Seconds a client reads from the primary after a write, so it sees its own changes
+REPLICA_PIN_SECONDS = env.int('REPLICA_PIN_SECONDS', default=5)
+
+# Cache
+CACHES = {
+    'default': env.cache('CACHE_URL', default='locmemcache://employee-api?max_entries=10000')
+}
+
+# Seconds a token's user and role stay cached by CachedTokenAuthentication.
+# Like the cached department responses, this needs a CACHE_URL shared by
+# every worker: invalidating a deleted token, deactivated user or changed
+# role only reaches the cache it runs against. With the per-process locmem
+# default it is off (0) unless set explicitly, e.g. for a single process.
+AUTH_TOKEN_CACHE_TIMEOUT = env.int('AUTH_TOKEN_CACHE_TIMEOUT',
+                                   default=0 if CACHES['default']['BACKEND'].endswith('.LocMemCache') else 300)
+
+# Seconds a cached API response may be kept; writes invalidate it immediately
+RESPONSE_CACHE_TIMEOUT = env.int('RESPONSE_CACHE_TIMEOUT', default=600)
+
+# Days deletions are remembered for delta sync clients; older sync tokens
+# must start over. manage.py prune_tombstones drops older records.
+SYNC_TOMBSTONE_DAYS = env.int('SYNC_TOMBSTONE_DAYS', default=90)
+
+# Seconds a change must age before delta sync sends it. Rows get their
+# updated_at when written but only become visible on commit, so this must
+# exceed the longest write transaction (CSV imports, bulk provisioning).
+SYNC_SETTLE_SECONDS = env.int('SYNC_SETTLE_SECONDS', default=60)
+
+# Where manage.py archive_attendance writes archived attendance months
+ATTENDANCE_ARCHIVE_DIR = env('ATTENDANCE_ARCHIVE_DIR', default=str(BASE_DIR / 'archive'))
+
 
 # Password validation
 AUTH_PASSWORD_VALIDATORS = [
@@ -110,7 +154,7 @@ DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
 # REST Framework settings
 REST_FRAMEWORK = {
     'DEFAULT_AUTHENTICATION_CLASSES': [
-        'rest_framework.authentication.TokenAuthentication',
+        'employee_project.authentication.CachedTokenAuthentication',
     ],
     'DEFAULT_PERMISSION_CLASSES': [
         'rest_framework.permissions.IsAuthenticated',
@@ -0,0 +1,190 @@
+from datetime import timedelta
+from django.conf import settings
+from django.core import signing
+from django.db.models import Q, QuerySet
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+from rest_framework import status
+from rest_framework.decorators import action
+from rest_framework.response import Response
+from employees.models import Tombstone
+from .permissions import get_role
+from .routers import use_primary
+
+TOKEN_SALT = 'employee_project.sync'
+
+
+class InvalidSyncRequest(Exception):
+    pass
+
+
+def record_tombstone(instance, employee_id=None):
+    """
+    Remember that ``instance`` was deleted; called from post_delete handlers.
+    """
+    Tombstone.objects.create(model=instance._meta.label_lower, object_id=instance.pk, employee_id=employee_id)
+
+
+def record_tombstones(model, rows, batch_size=1000):
+    """
+    ``record_tombstone`` for many rows of ``model`` at once; ``rows`` are
+    ``(object_id, employee_id)`` pairs, e.g. from ``values_list``. Used
+    by pre_delete handlers for rows about to go in a cascade.
+    """
+    label = model._meta.label_lower
+    Tombstone.objects.bulk_create([Tombstone(model=label, object_id=object_id, employee_id=employee_id)
+                                   for object_id, employee_id in rows], batch_size=batch_size)
+
+
+def is_cascade(sender, origin):
+    """
+    Whether a delete signal for ``sender`` comes from the cascade of
+    deleting some other model, whose pre_delete handler recorded the
+    tombstones in bulk. ``origin`` is the signal's argument of that name.
+    """
+    if origin is None:
+        return False
+    model = origin.model if isinstance(origin, QuerySet) else type(origin)
+    return not issubclass(model, sender)
+
+
+def prune_tombstones(days=None):
+    """
+    Delete tombstones older than ``days`` (``SYNC_TOMBSTONE_DAYS`` by
+    default); returns how many went.
+    """
+    days = settings.SYNC_TOMBSTONE_DAYS if days is None else days
+    deleted, _ = Tombstone.objects.filter(deleted_at__lt=timezone.now() - timedelta(days=days)).delete()
+    return deleted
+
+
+class DeltaSyncMixin:
+    """
+    Adds a ``sync`` change feed: the rows changed since the client's last
+    sync, ordered by ``(updated_at, id)``, plus the ids deleted since then.
+
+    The first call passes ``updated_since`` (an ISO datetime) or nothing
+    for a full download. Every response carries a ``sync_token`` for the
+    next call. While ``has_more`` is true, the token continues the same
+    pass with the next page; otherwise it starts the next pass where this
+    one ended. A pass only covers changes older than the settle window
+    (``SYNC_SETTLE_SECONDS``), so that rows committed late with an earlier
+    ``updated_at`` are not skipped; the window must outlast the longest
+    write transaction. The feed always reads from the primary, as a
+    lagging replica would hide rows below the next pass's start. Tokens
+    older than the tombstone retention get a 410, and the client must
+    download everything again.
+    """
+    sync_page_size = 500
+    sync_max_page_size = 5000
+    # Overrides SYNC_SETTLE_SECONDS for this view when set
+    sync_settle_seconds = None
+    # Whether regular employees only see tombstones of their own rows,
+    # matching a get_queryset() that scopes them to their own records
+    sync_scope_tombstones = False
+
+    @action(detail=False, methods=['get'])
+    def sync(self, request):
+        with use_primary():
+            return self.get_sync_response(request)
+
+    def get_sync_response(self, request):
+        try:
+            since, until, after = self.get_sync_position(request)
+            page_size = self.get_sync_page_size(request)
+        except InvalidSyncRequest as exc:
+            return Response({"detail": str(exc)}, status=status.HTTP_400_BAD_REQUEST)
+        if since is not None and since < timezone.now() - timedelta(days=settings.SYNC_TOMBSTONE_DAYS):
+            return Response({"detail": "Sync position is older than the deletion history; sync from scratch"},
+                            status=status.HTTP_410_GONE)
+
+        queryset = self.filter_queryset(self.get_queryset()).filter(updated_at__lte=until)
+        if since is not None:
+            queryset = queryset.filter(updated_at__gt=since)
+        if after is not None:
+            queryset = queryset.filter(Q(updated_at__gt=after[0]) | Q(updated_at=after[0], id__gt=after[1]))
+        rows = list(queryset.order_by('updated_at', 'id')[:page_size + 1])
+        has_more = len(rows) > page_size
+        rows = rows[:page_size]
+
+        # A full download has nothing to delete; later passes send the
+        # deletions once, with their first page
+        deleted = []
+        if since is not None and after is None:
+            deleted = list(self.get_tombstone_queryset(request)
+                           .filter(deleted_at__gt=since, deleted_at__lte=until)
+                           .order_by('id')
+                           .values_list('object_id', flat=True))
+
+        if has_more:
+            token = {'since': since, 'until': until, 'after': [rows[-1].updated_at, rows[-1].pk]}
+        else:
+            token = {'since': until, 'until': None, 'after': None}
+        return Response({
+            'changed': self.get_serializer(rows, many=True).data,
+            'deleted': deleted,
+            'has_more': has_more,
+            'sync_token': self.dump_sync_token(token),
+        })
+
+    def get_sync_position(self, request):
+        """
+        ``(since, until, after)`` of the page to return. ``until`` is fixed
+        for the whole pass; ``after`` is the last ``(updated_at, id)`` sent.
+        """
+        token = request.query_params.get('sync_token')
+        if token:
+            try:
+                data = signing.loads(token, salt=TOKEN_SALT)
+            except signing.BadSignature:
+                raise InvalidSyncRequest('Invalid sync_token')
+            since = parse_datetime(data['since']) if data['since'] else None
+            until = parse_datetime(data['until']) if data['until'] else None
+            after = (parse_datetime(data['after'][0]), data['after'][1]) if data['after'] else None
+        else:
+            since, until, after = None, None, None
+            value = request.query_params.get('updated_since')
+            if value:
+                since = parse_datetime(value)
+                if since is None:
+                    raise InvalidSyncRequest('updated_since must be an ISO 8601 datetime')
+                if timezone.is_naive(since):
+                    since = timezone.make_aware(since)
+        if until is None:
+            settle = self.sync_settle_seconds
+            if settle is None:
+                settle = settings.SYNC_SETTLE_SECONDS
+            until = timezone.now() - timedelta(seconds=settle)
+            if since is not None:
+                until = max(until, since)
+        return since, until, after
+
+    def get_sync_page_size(self, request):
+        value = request.query_params.get('page_size')
+        if not value:
+            return self.sync_page_size
+        try:
+            page_size = int(value)
+        except ValueError:
+            raise InvalidSyncRequest('page_size must be a number')
+        if page_size < 1:
+            raise InvalidSyncRequest('page_size must be at least 1')
+        return min(page_size, self.sync_max_page_size)
+
+    def get_tombstone_queryset(self, request):
+        tombstones = Tombstone.objects.filter(model=self.queryset.model._meta.label_lower)
+        if not self.sync_scope_tombstones:
+            return tombstones
+        role = get_role(request.user)
+        if role.is_staff or role.is_manager:
+            return tombstones
+        if role.employee_id is None:
+            return tombstones.none()
+        return tombstones.filter(employee_id=role.employee_id)
+
+    def dump_sync_token(self, token):
+        return signing.dumps({
+            'since': token['since'].isoformat() if token['since'] else None,
+            'until': token['until'].isoformat() if token['until'] else None,
+            'after': [token['after'][0].isoformat(), token['after'][1]] if token['after'] else None,
+        }, salt=TOKEN_SALT, compress=True)
@@ -21,6 +21,7 @@ from drf_yasg.views import get_schema_view
 from drf_yasg import openapi
 from rest_framework.authtoken.views import obtain_auth_token
 from django.http import HttpResponse  # 👈 Add this
+from .metrics import metrics
 
 # 👇 Define a simple home view right here
 def home(request):
@@ -77,6 +78,7 @@ urlpatterns = [
     path('api/attendance/', include('attendance.urls')),
     path('api/performance/', include('performance.urls')),
     path('api-token-auth/', obtain_auth_token, name='api_token_auth'),
+    path('metrics/', metrics, name='metrics'),
     path('swagger/', schema_view.with_ui('swagger', cache_timeout=0), name='schema-swagger-ui'),
     path('redoc/', schema_view.with_ui('redoc', cache_timeout=0), name='schema-redoc'),
 ]
@@ -0,0 +1,41 @@
+from django.db import connection
+from django.db.models import Case, IntegerField, Value, When
+from django.db.models.functions import Greatest
+from rest_framework import filters
+
+
+class EmployeeSearchFilter(filters.SearchFilter):
+    """
+    ``SearchFilter`` that also ranks matches by relevance.
+
+    Matching stays the ``icontains`` lookup of the parent class. On
+    PostgreSQL that is served by the pg_trgm GIN indexes created in
+    ``employees.migrations.0004_search_trigram_indexes`` and results are
+    ranked by trigram similarity. Other databases keep the plain scan and
+    rank exact matches above prefix matches above substring matches.
+    An explicit ``?ordering=`` still wins over the relevance order.
+    """
+    def filter_queryset(self, request, queryset, view):
+        queryset = super().filter_queryset(request, queryset, view)
+        terms = self.get_search_terms(request)
+        if not terms:
+            return queryset
+
+        query = ' '.join(terms)
+        fields = [field.lstrip('^=@$') for field in self.get_search_fields(view, request)]
+        if connection.vendor == 'postgresql':
+            from django.contrib.postgres.search import TrigramSimilarity
+            ranks = [TrigramSimilarity(field, query) for field in fields]
+        else:
+            ranks = [
+                Case(
+                    When(**{f'{field}__iexact': query}, then=Value(3)),
+                    When(**{f'{field}__istartswith': query}, then=Value(2)),
+                    When(**{f'{field}__icontains': query}, then=Value(1)),
+                    default=Value(0),
+                    output_field=IntegerField(),
+                )
+                for field in fields
+            ]
+        rank = ranks[0] if len(ranks) == 1 else Greatest(*ranks)
+        return queryset.annotate(search_rank=rank).order_by('-search_rank', 'pk')
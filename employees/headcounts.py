@@ -0,0 +1,46 @@
+from collections import Counter
+from django.db.models import Case, Count, F, IntegerField, Value, When
+from django.db.models.functions import Greatest
+from django.utils import timezone
+from employee_project.caching import bump_model_version
+from .models import Department
+
+
+def adjust_headcounts(changes):
+    """
+    Apply ``{department_id: delta}`` to the stored headcounts in one
+    UPDATE. The new value is computed by the database from the current
+    one, so concurrent adjustments do not lose updates. Counts that have
+    drifted stop at zero rather than failing the write that moved them;
+    ``reconcile_headcounts`` repairs them.
+    """
+    changes = {department_id: delta for department_id, delta in changes.items()
+               if department_id is not None and delta}
+    if not changes:
+        return
+    delta = Case(*[When(pk=department_id, then=Value(delta)) for department_id, delta in changes.items()],
+                 output_field=IntegerField())
+    # updated_at moves too, so ETags built from it change with the headcount
+    Department.objects.filter(pk__in=changes).update(headcount=Greatest(F('headcount') + delta, 0),
+                                                     updated_at=timezone.now())
+    bump_model_version(Department)
+
+
+def count_new_employees(employees):
+    """
+    ``adjust_headcounts`` changes for newly created employees.
+    """
+    return Counter(employee.department_id for employee in employees)
+
+
+def reconcile_headcounts(dry_run=False):
+    """
+    Compare every stored headcount with a COUNT of its employees and, unless
+    ``dry_run``, overwrite the ones that drifted in one UPDATE. Returns
+    ``{department_id: (stored, actual)}`` for the departments that were off.
+    """
+    rows = Department.objects.annotate(actual=Count('employees')).values_list('id', 'headcount', 'actual')
+    drift = {department_id: (stored, actual) for department_id, stored, actual in rows if stored != actual}
+    if drift and not dry_run:
+        adjust_headcounts({department_id: actual - stored for department_id, (stored, actual) in drift.items()})
+    return drift
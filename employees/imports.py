@@ -0,0 +1,131 @@
+import csv
+from django.core.exceptions import ValidationError
+from django.core.validators import MaxLengthValidator
+from django.db import connection, transaction
+from employee_project.caching import bump_model_version
+from .headcounts import adjust_headcounts, count_new_employees
+from .models import Department, Employee
+
+REQUIRED_COLUMNS = ['name', 'email', 'phone_number', 'address', 'department']
+OPTIONAL_COLUMNS = ['position']
+FIELDS = ['name', 'email', 'phone_number', 'address', 'position']
+
+
+class ImportFormatError(Exception):
+    """
+    The CSV as a whole cannot be imported (e.g. required columns missing).
+    """
+
+
+def import_employees(stream, batch_size=1000, dry_run=False, create_departments=False):
+    """
+    Import employees from a CSV text stream with a header row.
+
+    Rows are validated field by field as they are read. Departments are
+    resolved by name from one in-memory map. Emails are checked against
+    the table with set queries rather than one query per row, and also
+    against earlier rows in the file. Valid rows are written with batched
+    ``bulk_create`` in one transaction; invalid rows are reported with
+    their line number and skipped. Returns ``{'created', 'invalid',
+    'dry_run', 'errors'}``; with ``dry_run`` nothing is written and
+    ``created`` counts the rows that would be.
+    """
+    reader = csv.DictReader(stream)
+    missing = [column for column in REQUIRED_COLUMNS if column not in (reader.fieldnames or [])]
+    if missing:
+        raise ImportFormatError(f"Missing required column(s): {', '.join(missing)}")
+
+    departments = dict(Department.objects.values_list('name', 'id'))
+    new_departments = set()
+    rules = _field_rules()
+    errors = []
+    pending = []
+    seen = {}
+
+    # Line 1 is the header
+    for line, row in enumerate(reader, start=2):
+        row_errors = {}
+        values = {}
+        for name, max_length, required, blank_value, validators in rules:
+            value = (row.get(name) or '').strip()
+            try:
+                if not value:
+                    if required:
+                        raise ValidationError('This field cannot be blank.')
+                    value = blank_value
+                elif max_length is not None and len(value) > max_length:
+                    raise ValidationError(f'Ensure this value has at most {max_length} characters '
+                                          f'(it has {len(value)}).')
+                else:
+                    for validator in validators:
+                        validator(value)
+            except ValidationError as exc:
+                row_errors[name] = exc.messages
+            values[name] = value
+        department = (row.get('department') or '').strip()
+        if not department:
+            row_errors['department'] = ['This field cannot be blank.']
+        elif department not in departments:
+            if create_departments:
+                new_departments.add(department)
+            else:
+                row_errors['department'] = [f"Unknown department '{department}'."]
+        email = values.get('email')
+        if email and email in seen:
+            row_errors['email'] = [f'Duplicate of line {seen[email]}.']
+        if row_errors:
+            errors.append({'line': line, 'email': row.get('email'), 'errors': row_errors})
+            continue
+        seen[email] = line
+        pending.append((line, department, values))
+
+    taken = _existing_emails(list(seen))
+    rows = []
+    for line, department, values in pending:
+        if values['email'] in taken:
+            errors.append({'line': line, 'email': values['email'],
+                           'errors': {'email': ['Employee with this email already exists.']}})
+        else:
+            rows.append((department, values))
+    errors.sort(key=lambda error: error['line'])
+
+    if not dry_run and rows:
+        with transaction.atomic():
+            if new_departments:
+                Department.objects.bulk_create([Department(name=name) for name in sorted(new_departments)])
+                # bulk_create skips the signal that invalidates cached department responses
+                bump_model_version(Department)
+                departments = dict(Department.objects.values_list('name', 'id'))
+            employees = Employee.objects.bulk_create(
+                [Employee(department_id=departments[department], **values) for department, values in rows],
+                batch_size=batch_size,
+            )
+            # bulk_create skips the signal that maintains department headcounts
+            adjust_headcounts(count_new_employees(employees))
+    return {'created': len(rows), 'invalid': len(errors), 'dry_run': dry_run, 'errors': errors}
+
+
+def _field_rules():
+    """
+    ``(name, max_length, required, blank_value, validators)`` per imported
+    field, taken from the model. Checking these directly is several times
+    faster than ``Field.clean()`` per cell.
+    """
+    rules = []
+    for name in FIELDS:
+        field = Employee._meta.get_field(name)
+        validators = [validator for validator in field.validators
+                      if not isinstance(validator, MaxLengthValidator)]
+        rules.append((name, field.max_length, not field.blank, None if field.null else '', validators))
+    return rules
+
+
+def _existing_emails(emails):
+    # One query unless the backend caps the number of bound parameters
+    size = connection.features.max_query_params or len(emails) or 1
+    taken = set()
+    for start in range(0, len(emails), size):
+        taken.update(Employee.objects
+                     .filter(email__in=emails[start:start + size])
+                     .values_list('email', flat=True))
+    return taken
@@ -0,0 +1,248 @@
+import itertools
+import json
+import math
+import platform
+import statistics
+import time
+from io import StringIO
+import django
+from django.contrib.auth.models import User
+from django.core.management import call_command
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, transaction
+from django.test.utils import CaptureQueriesContext, override_settings
+from django.urls import reverse
+from django.utils import timezone
+from rest_framework.authtoken.models import Token
+from rest_framework.test import APIClient
+from attendance.models import Attendance
+from employees.models import Department, Employee, UserProfile
+from performance.models import Performance
+
+ROLES = ['admin', 'manager', 'employee']
+
+
+class Rollback(Exception):
+    pass
+
+
+def percentile(values, percent):
+    """
+    Nearest-rank percentile of an already sorted list.
+    """
+    if not values:
+        return None
+    return values[max(math.ceil(percent / 100 * len(values)), 1) - 1]
+
+
+class Command(BaseCommand):
+    help = ('Seeds a dataset and benchmarks every API endpoint in-process as admin, manager and employee; '
+            'reports latency percentiles, queries per request and payload size')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--employees', type=int, default=200, help='Employees to seed')
+        parser.add_argument('--days', type=int, default=30, help='Days of attendance per employee')
+        parser.add_argument('--reviews', type=int, default=3, help='Maximum reviews per employee')
+        parser.add_argument('--seed', type=int, default=1, help='Random seed for the dataset')
+        parser.add_argument('--iterations', type=int, default=20, help='Timed requests per endpoint and role')
+        parser.add_argument('--output', help='Write the results as JSON to this file')
+        parser.add_argument('--baseline', help='Compare against a JSON file written by an earlier run')
+        parser.add_argument('--tolerance', type=float, default=0.25,
+                            help='Allowed p95 slowdown against the baseline (0.25 = 25%%)')
+        parser.add_argument('--keep-data', action='store_true',
+                            help='Commit the seeded data instead of rolling it back')
+
+    def handle(self, *args, **options):
+        if options['iterations'] < 1:
+            raise CommandError('--iterations must be at least 1')
+        baseline = None
+        if options['baseline']:
+            with open(options['baseline']) as handle:
+                baseline = json.load(handle)
+
+        report = None
+        try:
+            # Everything, seeding included, runs in one transaction that is
+            # rolled back unless --keep-data is given.
+            with transaction.atomic():
+                report = self.run(options)
+                if not options['keep_data']:
+                    raise Rollback()
+        except Rollback:
+            pass
+
+        self.print_report(report)
+        if options['output']:
+            with open(options['output'], 'w') as handle:
+                json.dump(report, handle, indent=2, sort_keys=True)
+            self.stdout.write(f'Wrote {options["output"]}')
+        if baseline is not None:
+            regressions = self.compare(report, baseline, options['tolerance'])
+            if regressions:
+                raise CommandError(f'{regressions} regression(s) against {options["baseline"]}')
+            self.stdout.write(self.style.SUCCESS('No regressions against the baseline'))
+
+    def run(self, options):
+        self.stdout.write(f'Seeding {options["employees"]} employees...')
+        call_command('seed_data', employees=options['employees'], days=options['days'],
+                     reviews=options['reviews'], seed=options['seed'], stdout=StringIO())
+        clients = self.create_clients()
+        endpoints = self.get_endpoints()
+
+        results = {}
+        with override_settings(ALLOWED_HOSTS=['testserver']):
+            for name, method, url, payload in endpoints:
+                for role in ROLES:
+                    results[f'{name} {role}'] = self.measure(clients[role], method, url, payload,
+                                                             options['iterations'])
+        return {
+            'meta': {
+                'employees': options['employees'],
+                'days': options['days'],
+                'reviews': options['reviews'],
+                'seed': options['seed'],
+                'iterations': options['iterations'],
+                'database': connection.vendor,
+                'django': django.get_version(),
+                'python': platform.python_version(),
+            },
+            'results': results,
+        }
+
+    def create_clients(self):
+        # Unique per run so --keep-data runs can be repeated
+        self.run_id = int(time.time())
+        department = Department.objects.order_by('pk').first()
+        employee = Employee.objects.filter(user__isnull=True).order_by('pk').first()
+        users = {
+            'admin': User.objects.create_user(username=f'bench-admin-{self.run_id}', password='bench', is_staff=True),
+            'manager': User.objects.create_user(username=f'bench-manager-{self.run_id}', password='bench'),
+            'employee': User.objects.create_user(username=f'bench-employee-{self.run_id}', password='bench',
+                                                 email=employee.email),
+        }
+        for role, user in users.items():
+            UserProfile.objects.create(user=user, is_manager=role == 'manager', department=department)
+        employee.user = users['employee']
+        employee.save()
+
+        clients = {}
+        for role, user in users.items():
+            client = APIClient()
+            # Report server errors as 500s instead of aborting the run
+            client.raise_request_exception = False
+            client.credentials(HTTP_AUTHORIZATION=f'Token {Token.objects.create(user=user).key}')
+            clients[role] = client
+        return clients
+
+    def get_endpoints(self):
+        """
+        ``(name, method, url, payload)`` for every router endpoint. The
+        payload is a callable taking the request number, so writes can
+        use unique values.
+        """
+        department = Department.objects.order_by('pk').first()
+        employee = Employee.objects.order_by('pk').first()
+        profile = UserProfile.objects.order_by('pk').first()
+        attendance = Attendance.objects.order_by('pk').first()
+        review = Performance.objects.order_by('pk').first()
+        today = timezone.now().date()
+
+        def bulk_payload(number):
+            return [{'employee': employee.pk, 'date': str(today), 'status': ['present', 'late'][number % 2]}]
+
+        def register_payload(number):
+            name = f'bench-register-{self.run_id}-{number}'
+            return {'username': name, 'email': f'{name}@example.com',
+                    'password': 'bench-password'}
+
+        return [
+            ('departments.list', 'get', reverse('department-list'), None),
+            ('departments.retrieve', 'get', reverse('department-detail', args=[department.pk]), None),
+            ('employees.list', 'get', reverse('employee-list'), None),
+            ('employees.list-search', 'get', reverse('employee-list') + '?search=an', None),
+            ('employees.list-sparse', 'get', reverse('employee-list') + '?fields=id,name,department_name', None),
+            ('employees.retrieve', 'get', reverse('employee-detail', args=[employee.pk]), None),
+            ('profiles.list', 'get', reverse('userprofile-list'), None),
+            ('profiles.retrieve', 'get', reverse('userprofile-detail', args=[profile.pk]), None),
+            ('profiles.my-profile', 'get', reverse('userprofile-my-profile'), None),
+            ('attendances.list', 'get', reverse('attendance-list'), None),
+            ('attendances.list-keyset', 'get', reverse('attendance-list') + '?pagination=keyset', None),
+            ('attendances.retrieve', 'get', reverse('attendance-detail', args=[attendance.pk]), None),
+            ('attendances.streaks', 'get', reverse('attendance-streaks'), None),
+            ('attendances.bulk', 'post', reverse('attendance-bulk'), bulk_payload),
+            ('performance.list', 'get', reverse('performance-list'), None),
+            ('performance.retrieve', 'get', reverse('performance-detail', args=[review.pk]), None),
+            ('performance.department-distribution', 'get', reverse('performance-department-distribution'), None),
+            ('analytics.department-headcount', 'get', reverse('analytics-department-headcount'), None),
+            ('analytics.attendance-summary', 'get', reverse('analytics-attendance-summary'), None),
+            ('register', 'post', reverse('register'), register_payload),
+        ]
+
+    def measure(self, client, method, url, payload, iterations):
+        request = getattr(client, method)
+        counter = itertools.count()
+
+        def send():
+            # A failing request must not abort the surrounding transaction
+            savepoint = transaction.savepoint()
+            if payload is None:
+                response = request(url)
+            else:
+                response = request(url, payload(next(counter)), format='json')
+            if response.status_code >= 500:
+                transaction.set_rollback(False)
+                transaction.savepoint_rollback(savepoint)
+            else:
+                transaction.savepoint_commit(savepoint)
+            return response
+
+        send()  # warm up caches and the token lookup
+        latencies, queries = [], []
+        response = None
+        for _ in range(iterations):
+            with CaptureQueriesContext(connection) as captured:
+                started = time.perf_counter()
+                response = send()
+                latencies.append((time.perf_counter() - started) * 1000)
+            # Leave out the savepoint statements
+            queries.append(len([query for query in captured.captured_queries
+                                if 'SAVEPOINT' not in query['sql']]))
+        latencies.sort()
+        return {
+            'status': response.status_code,
+            'p50_ms': round(percentile(latencies, 50), 3),
+            'p95_ms': round(percentile(latencies, 95), 3),
+            'p99_ms': round(percentile(latencies, 99), 3),
+            'queries': statistics.median(queries),
+            'bytes': len(response.content),
+        }
+
+    def print_report(self, report):
+        self.stdout.write(f'{"endpoint":<46} {"status":>6} {"p50 ms":>9} {"p95 ms":>9} {"p99 ms":>9} '
+                          f'{"queries":>8} {"bytes":>9}')
+        for name, result in report['results'].items():
+            self.stdout.write(f'{name:<46} {result["status"]:>6} {result["p50_ms"]:>9.2f} '
+                              f'{result["p95_ms"]:>9.2f} {result["p99_ms"]:>9.2f} '
+                              f'{result["queries"]:>8g} {result["bytes"]:>9}')
+
+    def compare(self, report, baseline, tolerance):
+        """
+        Print every endpoint whose p95, query count or status moved the
+        wrong way against the baseline; return how many did.
+        """
+        regressions = 0
+        for name, result in report['results'].items():
+            before = baseline.get('results', {}).get(name)
+            if before is None:
+                continue
+            problems = []
+            if result['p95_ms'] > before['p95_ms'] * (1 + tolerance):
+                problems.append(f'p95 {before["p95_ms"]:.2f} -> {result["p95_ms"]:.2f} ms')
+            if result['queries'] > before['queries']:
+                problems.append(f'queries {before["queries"]:g} -> {result["queries"]:g}')
+            if result['status'] != before['status']:
+                problems.append(f'status {before["status"]} -> {result["status"]}')
+            if problems:
+                regressions += 1
+                self.stdout.write(self.style.WARNING(f'{name}: {", ".join(problems)}'))
+        return regressions
@@ -0,0 +1,96 @@
+import asyncio
+import statistics
+import time
+from concurrent.futures import ThreadPoolExecutor
+from django.core.management.base import BaseCommand
+from django.db import connections
+from django.test import AsyncClient, Client
+from django.test.utils import override_settings
+from django.urls import reverse
+from rest_framework.authtoken.models import Token
+from employees.models import Employee
+
+
+class Command(BaseCommand):
+    help = 'Compares sync (WSGI) and async (ASGI) read endpoint throughput under concurrent clients'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--concurrency', type=int, default=100, help='Concurrent clients')
+        parser.add_argument('--requests', type=int, default=10, help='Requests per client')
+
+    def handle(self, *args, **options):
+        token = Token.objects.filter(user__is_staff=True).select_related('user').first()
+        if token is None:
+            self.stderr.write('No staff user token found; create one with drf_create_token first.')
+            return
+        employee = Employee.objects.order_by('pk').first()
+        if employee is None:
+            self.stderr.write('No employees found; run seed_data first.')
+            return
+
+        headers = {'Authorization': f'Token {token.key}'}
+        scenarios = [
+            ('employee list', reverse('employee-list'), reverse('async-employee-list')),
+            ('employee detail', reverse('employee-detail', kwargs={'pk': employee.pk}),
+             reverse('async-employee-detail', kwargs={'pk': employee.pk})),
+            ('attendance list', reverse('attendance-list'), reverse('async-attendance-list')),
+            ('my profile', reverse('userprofile-my-profile'), reverse('async-my-profile')),
+        ]
+        concurrency, per_client = options['concurrency'], options['requests']
+        self.stdout.write(f'{concurrency} concurrent clients x {per_client} requests')
+        for name, sync_url, async_url in scenarios:
+            # The in-process test clients always send Host: testserver
+            with override_settings(ALLOWED_HOSTS=['testserver']):
+                sync = self.run_sync(sync_url, headers, concurrency, per_client)
+                asynchronous = asyncio.run(self.run_async(async_url, headers, concurrency, per_client))
+            for label, (elapsed, latencies, errors) in [('sync', sync), ('async', asynchronous)]:
+                self.stdout.write(
+                    f'{name:<16} {label:<6} {len(latencies) / elapsed:>8,.0f} req/s   '
+                    f'p50 {self.percentile(latencies, 50):>7.1f} ms   '
+                    f'p95 {self.percentile(latencies, 95):>7.1f} ms   '
+                    f'errors {errors}')
+
+    def run_sync(self, url, headers, concurrency, per_client):
+        def client_loop(_):
+            client = Client(headers=headers)
+            latencies, errors = [], 0
+            client.get(url)  # warm up
+            for _ in range(per_client):
+                started = time.perf_counter()
+                response = client.get(url)
+                latencies.append((time.perf_counter() - started) * 1000)
+                errors += response.status_code != 200
+            connections.close_all()
+            return latencies, errors
+
+        started = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=concurrency) as pool:
+            results = list(pool.map(client_loop, range(concurrency)))
+        return self.collect(time.perf_counter() - started, results)
+
+    async def run_async(self, url, headers, concurrency, per_client):
+        # Headers given to the AsyncClient constructor do not reach the ASGI scope
+        client = AsyncClient()
+        await client.get(url, headers=headers)  # warm up
+
+        async def client_loop():
+            latencies, errors = [], 0
+            for _ in range(per_client):
+                started = time.perf_counter()
+                response = await client.get(url, headers=headers)
+                latencies.append((time.perf_counter() - started) * 1000)
+                errors += response.status_code != 200
+            return latencies, errors
+
+        started = time.perf_counter()
+        results = await asyncio.gather(*[client_loop() for _ in range(concurrency)])
+        return self.collect(time.perf_counter() - started, results)
+
+    def collect(self, elapsed, results):
+        latencies = [latency for client_latencies, _ in results for latency in client_latencies]
+        return elapsed, latencies, sum(errors for _, errors in results)
+
+    def percentile(self, values, percent):
+        if len(values) < 2:
+            return values[0] if values else 0.0
+        return statistics.quantiles(values, n=100)[percent - 1]
@@ -0,0 +1,43 @@
+import time
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand
+from rest_framework.test import APIRequestFactory, force_authenticate
+from employees.models import Department
+from employees.views import DepartmentViewSet
+
+
+class Command(BaseCommand):
+    help = 'Compares cached and uncached department list/retrieve throughput'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--requests', type=int, default=500, help='Requests per scenario')
+
+    def handle(self, *args, **options):
+        department = Department.objects.order_by('pk').first()
+        if department is None:
+            self.stderr.write('No departments found; run seed_data first.')
+            return
+
+        factory = APIRequestFactory()
+        # An unsaved staff user keeps the benchmark free of writes
+        user = User(pk=0, username='benchmark', is_staff=True)
+        scenarios = [
+            ('list', {'get': 'list'}, '/api/employees/departments/', {}),
+            ('retrieve', {'get': 'retrieve'}, f'/api/employees/departments/{department.pk}/', {'pk': department.pk}),
+        ]
+        for name, actions, path, kwargs in scenarios:
+            results = {}
+            for cached in (False, True):
+                view = DepartmentViewSet.as_view(actions, cache_responses=cached)
+                request = factory.get(path)
+                force_authenticate(request, user=user)
+                view(request, **kwargs)  # warm up
+                started = time.perf_counter()
+                for _ in range(options['requests']):
+                    request = factory.get(path)
+                    force_authenticate(request, user=user)
+                    view(request, **kwargs).render()
+                results[cached] = options['requests'] / (time.perf_counter() - started)
+            self.stdout.write(f'{name:<9} uncached {results[False]:>9,.0f} req/s   '
+                              f'cached {results[True]:>9,.0f} req/s   '
+                              f'speedup {results[True] / results[False]:.1f}x')
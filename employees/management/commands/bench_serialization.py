@@ -0,0 +1,49 @@
+import time
+from django.core.management.base import BaseCommand
+from attendance.views import AttendanceViewSet
+from employees.views import EmployeeViewSet
+from employee_project.fastread import build_plan, plan_lookups, render_row
+from performance.views import PerformanceViewSet
+
+
+class Command(BaseCommand):
+    help = 'Compares ModelSerializer and values()-based fast read throughput in rows/s'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--rows', type=int, default=5000, help='Rows per scenario')
+        parser.add_argument('--repeat', type=int, default=3, help='Runs per scenario; the best is reported')
+
+    def handle(self, *args, **options):
+        scenarios = [
+            ('employees', EmployeeViewSet),
+            ('attendance', AttendanceViewSet),
+            ('performance', PerformanceViewSet),
+        ]
+        for name, viewset in scenarios:
+            queryset = viewset.queryset.order_by('pk')[:options['rows']]
+            plan = build_plan(viewset.serializer_class())
+            lookups = list(dict.fromkeys(plan_lookups(plan)))
+
+            def serializer_path():
+                return viewset.serializer_class(list(queryset.all()), many=True).data
+
+            def fast_path():
+                return [render_row(plan, row) for row in queryset.values(*lookups)]
+
+            rows = len(fast_path())
+            if not rows:
+                self.stderr.write(f'{name}: no rows found; run seed_data first.')
+                continue
+            results = {}
+            for label, func in [('serializer', serializer_path), ('fast', fast_path)]:
+                best = None
+                for _ in range(options['repeat']):
+                    started = time.perf_counter()
+                    func()
+                    elapsed = time.perf_counter() - started
+                    best = elapsed if best is None else min(best, elapsed)
+                results[label] = rows / best
+            self.stdout.write(f'{name:<12} {rows:>7,} rows   '
+                              f'serializer {results["serializer"]:>10,.0f} rows/s   '
+                              f'fast {results["fast"]:>10,.0f} rows/s   '
+                              f'speedup {results["fast"] / results["serializer"]:.1f}x')
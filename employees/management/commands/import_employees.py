@@ -0,0 +1,38 @@
+import time
+from django.core.management.base import BaseCommand, CommandError
+from employees.imports import ImportFormatError, import_employees
+
+
+class Command(BaseCommand):
+    help = 'Imports employees from a CSV file (name, email, phone_number, address, department[, position])'
+
+    def add_arguments(self, parser):
+        parser.add_argument('path', help='CSV file with a header row')
+        parser.add_argument('--batch-size', type=int, default=1000, help='Rows per bulk insert')
+        parser.add_argument('--dry-run', action='store_true', help='Validate only; write nothing')
+        parser.add_argument('--create-departments', action='store_true',
+                            help='Create departments that do not exist yet instead of rejecting the rows')
+        parser.add_argument('--show-errors', type=int, default=20, help='Invalid rows to print')
+
+    def handle(self, *args, **options):
+        if options['batch_size'] < 1:
+            raise CommandError('--batch-size must be at least 1')
+        started = time.monotonic()
+        try:
+            with open(options['path'], encoding='utf-8-sig', newline='') as handle:
+                report = import_employees(handle, batch_size=options['batch_size'], dry_run=options['dry_run'],
+                                          create_departments=options['create_departments'])
+        except (OSError, ImportFormatError, UnicodeDecodeError) as exc:
+            raise CommandError(f'Cannot import {options["path"]}: {exc}')
+        elapsed = max(time.monotonic() - started, 1e-6)
+
+        for error in report['errors'][:options['show_errors']]:
+            problems = '; '.join(f'{field}: {" ".join(messages)}' for field, messages in error['errors'].items())
+            self.stdout.write(self.style.WARNING(f'line {error["line"]}: {problems}'))
+        if report['invalid'] > options['show_errors']:
+            self.stdout.write(f'... and {report["invalid"] - options["show_errors"]} more invalid rows')
+
+        verb = 'Would create' if options['dry_run'] else 'Created'
+        self.stdout.write(self.style.SUCCESS(
+            f'{verb} {report["created"]} employees, skipped {report["invalid"]} invalid rows '
+            f'in {elapsed:.1f}s ({(report["created"] + report["invalid"]) / elapsed:,.0f} rows/s)'))
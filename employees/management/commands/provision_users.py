@@ -0,0 +1,40 @@
+import csv
+import time
+from django.core.management.base import BaseCommand, CommandError
+from employees.provisioning import provision_users, validate_users
+
+
+class Command(BaseCommand):
+    help = ('Creates users with profiles from a CSV file (username, password[, email, first_name, last_name, '
+            'is_manager, department]) and links employees by email, all or nothing')
+
+    def add_arguments(self, parser):
+        parser.add_argument('path', help='CSV file with a header row')
+        parser.add_argument('--processes', type=int, default=1,
+                            help='Worker processes for password hashing')
+        parser.add_argument('--show-errors', type=int, default=20, help='Invalid rows to print')
+
+    def handle(self, *args, **options):
+        if options['processes'] < 1:
+            raise CommandError('--processes must be at least 1')
+        started = time.monotonic()
+        try:
+            with open(options['path'], encoding='utf-8-sig', newline='') as handle:
+                # Blank cells mean "not given" rather than an empty value
+                items = [{column: value for column, value in row.items() if column and value}
+                         for row in csv.DictReader(handle)]
+        except (OSError, UnicodeDecodeError, csv.Error) as exc:
+            raise CommandError(f'Cannot read {options["path"]}: {exc}')
+
+        entries, errors = validate_users(items, assign_roles=True)
+        if errors:
+            # Line 1 is the header
+            for error in errors[:options['show_errors']]:
+                problems = '; '.join(f'{field}: {" ".join(messages)}' for field, messages in error['errors'].items())
+                self.stdout.write(self.style.WARNING(f'line {error["index"] + 2}: {problems}'))
+            raise CommandError(f'{len(errors)} invalid rows; nothing was created')
+
+        profiles = provision_users(entries, processes=options['processes'])
+        elapsed = max(time.monotonic() - started, 1e-6)
+        self.stdout.write(self.style.SUCCESS(
+            f'Created {len(profiles)} users in {elapsed:.1f}s ({len(profiles) / elapsed:,.0f} users/s)'))
@@ -0,0 +1,19 @@
+from django.core.management.base import BaseCommand
+from employees.headcounts import reconcile_headcounts
+from employees.models import Department
+
+
+class Command(BaseCommand):
+    help = 'Recounts employees per department and repairs stored headcounts that drifted'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--dry-run', action='store_true', help='Only report drift; change nothing')
+
+    def handle(self, *args, **options):
+        drift = reconcile_headcounts(dry_run=options['dry_run'])
+        names = dict(Department.objects.filter(pk__in=drift).values_list('id', 'name'))
+        for department_id, (stored, actual) in sorted(drift.items()):
+            self.stdout.write(self.style.WARNING(
+                f'{names.get(department_id, department_id)}: stored {stored}, actual {actual}'))
+        verb = 'Found' if options['dry_run'] else 'Repaired'
+        self.stdout.write(self.style.SUCCESS(f'{verb} {len(drift)} drifted headcount(s)'))
@@ -1,92 +1,181 @@
+import multiprocessing
 import random
-from datetime import datetime, timedelta
-from django.core.management.base import BaseCommand
+import time
+from datetime import timedelta
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connections, transaction
 from django.utils import timezone
 from faker import Faker
+from employees.headcounts import adjust_headcounts, count_new_employees
 from employees.models import Department, Employee
 from attendance.models import Attendance
+from attendance.summaries import rebuild_daily_summaries
 from performance.models import Performance
 
-class Command(BaseCommand):
-    help = 'Seeds the database with fake data'
+DEPARTMENTS = [
+    'Human Resources',
+    'Engineering',
+    'Finance',
+    'Marketing',
+    'Sales',
+    'Customer Support',
+    'Research & Development',
+    'Legal',
+    'Operations',
+    'Product Management'
+]
 
-    def handle(self, *args, **kwargs):
-        fake = Faker()
-        
-        # Create departments
-        self.stdout.write('Creating departments...')
-        departments = [
-            'Human Resources',
-            'Engineering',
-            'Finance',
-            'Marketing',
-            'Sales',
-            'Customer Support',
-            'Research & Development',
-            'Legal',
-            'Operations',
-            'Product Management'
-        ]
-        
-        department_objects = []
-        for dept_name in departments:
-            dept, created = Department.objects.get_or_create(name=dept_name)
-            department_objects.append(dept)
-            if created:
-                self.stdout.write(f'Created department: {dept_name}')
-        
-        # Create employees
-        self.stdout.write('Creating employees...')
-        for i in range(50):  # Create 50 employees
+STATUS_CHOICES = ['present', 'absent', 'late']
+STATUS_WEIGHTS = [0.7, 0.1, 0.2]  # 70% present, 10% absent, 20% late
+
+
+def seed_chunk(start, count, days, reviews, seed, batch_size, department_ids):
+    """
+    Generate and insert ``count`` employees (numbered from ``start``) with
+    their attendance and performance rows. Runs either in-process or in a
+    worker process, and returns the number of rows written per model.
+    """
+    import django
+    from django.apps import apps
+    if not apps.ready:
+        django.setup()
+
+    rng = random.Random(None if seed is None else seed + start)
+    fake = Faker()
+    fake.seed_instance(None if seed is None else seed + start)
+    today = timezone.now().date()
+    written = {'employees': 0, 'attendance': 0, 'performance': 0}
+
+    for offset in range(start, start + count, batch_size):
+        size = min(batch_size, start + count - offset)
+        employees = []
+        joined = []
+        for i in range(offset, offset + size):
             name = fake.name()
-            email = fake.email()
-            
-            # Check if email already exists
-            if Employee.objects.filter(email=email).exists():
-                email = f"{name.replace(' ', '').lower()}_{random.randint(1, 999)}@{fake.domain_name()}"
-            
-            employee = Employee.objects.create(
+            employees.append(Employee(
                 name=name,
-                email=email,
+                email=f"{name.replace(' ', '.').lower()}.{i}@{fake.domain_name()}",
                 phone_number=fake.phone_number()[:15],
                 address=fake.address(),
-                date_of_joining=fake.date_between(start_date='-5y', end_date='today'),
-                department=random.choice(department_objects)
-            )
-            self.stdout.write(f'Created employee: {employee.name}')
-            
-            # Create attendance records for the past 30 days
-            self.stdout.write(f'Creating attendance records for {employee.name}...')
-            for j in range(30):
-                date = timezone.now().date() - timedelta(days=j)
-                status_choices = ['present', 'absent', 'late']
-                weights = [0.7, 0.1, 0.2]  # 70% present, 10% absent, 20% late
-                status = random.choices(status_choices, weights=weights, k=1)[0]
-                
-                Attendance.objects.create(
-                    employee=employee,
-                    date=date,
-                    status=status
-                )
-            
-            # Create performance records (1-3 per employee)
-            self.stdout.write(f'Creating performance records for {employee.name}...')
-            
-            # Get a list of unique review dates
-            review_dates = []
-            for k in range(random.randint(1, 3)):
-                # Keep generating dates until we get a unique one
-                while True:
-                    review_date = fake.date_between(start_date=employee.date_of_joining, end_date='today')
-                    if review_date not in review_dates:
-                        review_dates.append(review_date)
-                        break
-                
-                Performance.objects.create(
-                    employee=employee,
-                    rating=random.randint(1, 5),
-                    review_date=review_date,
-                    comments=fake.paragraph()
+                department_id=rng.choice(department_ids)
+            ))
+            joined.append(today - timedelta(days=rng.randint(0, 5 * 365)))
+
+        # Resolve clashes with emails from earlier runs in one query
+        taken = set(Employee.objects.filter(email__in=[e.email for e in employees])
+                    .values_list('email', flat=True))
+        for employee in employees:
+            if employee.email in taken:
+                local, domain = employee.email.split('@')
+                employee.email = f"{local}.{rng.randint(1, 10 ** 9)}@{domain}"
+
+        with transaction.atomic():
+            created = Employee.objects.bulk_create(employees)
+            # bulk_create skips the signal that maintains department headcounts
+            adjust_headcounts(count_new_employees(created))
+            if created and created[0].pk is None:
+                ids = dict(Employee.objects.filter(email__in=[e.email for e in employees])
+                           .values_list('email', 'id'))
+                for employee in created:
+                    employee.pk = ids[employee.email]
+            # date_of_joining is auto_now_add, so the insert stored today
+            for employee, date_of_joining in zip(created, joined):
+                employee.date_of_joining = date_of_joining
+            Employee.objects.bulk_update(created, ['date_of_joining'], batch_size=batch_size)
+
+            attendance = []
+            performance = []
+            for employee, date_of_joining in zip(created, joined):
+                statuses = rng.choices(STATUS_CHOICES, weights=STATUS_WEIGHTS, k=days)
+                attendance.extend(
+                    Attendance(employee_id=employee.pk, date=today - timedelta(days=j), status=status)
+                    for j, status in enumerate(statuses)
                 )
-        
-        self.stdout.write(self.style.SUCCESS('Successfully seeded the database!'))
\ No newline at end of file
+                tenure = (today - date_of_joining).days + 1
+                for delta in rng.sample(range(tenure), min(tenure, rng.randint(1, reviews))):
+                    performance.append(Performance(
+                        employee_id=employee.pk,
+                        rating=rng.randint(1, 5),
+                        review_date=date_of_joining + timedelta(days=delta),
+                        comments=fake.paragraph()
+                    ))
+            Attendance.objects.bulk_create(attendance, batch_size=batch_size)
+            Performance.objects.bulk_create(performance, batch_size=batch_size)
+
+        written['employees'] += len(created)
+        written['attendance'] += len(attendance)
+        written['performance'] += len(performance)
+
+    return written
+
+
+def _seed_chunk_star(args):
+    try:
+        return seed_chunk(*args)
+    finally:
+        connections.close_all()
+
+
+class Command(BaseCommand):
+    help = 'Seeds the database with fake data'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--employees', type=int, default=50, help='Number of employees to create')
+        parser.add_argument('--days', type=int, default=30, help='Days of attendance history per employee')
+        parser.add_argument('--reviews', type=int, default=3, help='Maximum performance reviews per employee')
+        parser.add_argument('--seed', type=int, default=None, help='Random seed for reproducible datasets')
+        parser.add_argument('--batch-size', type=int, default=1000, help='Rows per bulk insert')
+        parser.add_argument('--workers', type=int, default=1,
+                            help='Worker processes to insert with (use with PostgreSQL)')
+
+    def handle(self, *args, **options):
+        for key in ['employees', 'batch_size', 'workers', 'reviews']:
+            if options[key] < 1:
+                raise CommandError(f'--{key.replace("_", "-")} must be at least 1')
+        if options['days'] < 0:
+            raise CommandError('--days must not be negative')
+
+        # Create departments
+        self.stdout.write('Creating departments...')
+        existing = set(Department.objects.filter(name__in=DEPARTMENTS).values_list('name', flat=True))
+        missing = [Department(name=name) for name in DEPARTMENTS if name not in existing]
+        Department.objects.bulk_create(missing)
+        for dept in missing:
+            self.stdout.write(f'Created department: {dept.name}')
+        department_ids = list(Department.objects.filter(name__in=DEPARTMENTS)
+                              .order_by('name').values_list('id', flat=True))
+
+        total = options['employees']
+        workers = min(options['workers'], total)
+        per_worker = -(-total // workers)
+        chunks = [
+            (start, min(per_worker, total - start), options['days'], options['reviews'],
+             options['seed'], options['batch_size'], department_ids)
+            for start in range(0, total, per_worker)
+        ]
+
+        self.stdout.write(f'Creating {total} employees with {options["days"]} days of attendance '
+                          f'using {len(chunks)} worker(s)...')
+        started = time.monotonic()
+        if len(chunks) == 1:
+            results = [seed_chunk(*chunks[0])]
+        else:
+            # Children must not inherit the parent's open connections
+            connections.close_all()
+            with multiprocessing.Pool(len(chunks)) as pool:
+                results = pool.map(_seed_chunk_star, chunks)
+        elapsed = max(time.monotonic() - started, 1e-6)
+
+        written = {key: sum(result[key] for result in results) for key in results[0]}
+        for key, count in written.items():
+            self.stdout.write(f'Created {count} {key} rows')
+        rows = sum(written.values())
+        self.stdout.write(f'Inserted {rows} rows in {elapsed:.1f}s ({rows / elapsed:,.0f} rows/s)')
+
+        # bulk_create skips the signals that maintain the attendance summaries
+        if options['days']:
+            self.stdout.write('Rebuilding daily attendance summaries...')
+            today = timezone.now().date()
+            rebuild_daily_summaries(start_date=today - timedelta(days=options['days'] - 1), end_date=today)
+
+        self.stdout.write(self.style.SUCCESS('Successfully seeded the database!'))
@@ -0,0 +1,41 @@
+from django.db import migrations
+
+INDEXES = {
+    'employee_name_trgm_idx': 'name',
+    'employee_email_trgm_idx': 'email',
+}
+
+
+def create_trigram_indexes(apps, schema_editor):
+    if schema_editor.connection.vendor != 'postgresql':
+        return
+    schema_editor.execute('CREATE EXTENSION IF NOT EXISTS pg_trgm')
+    for name, column in INDEXES.items():
+        # Match the UPPER(col::text) LIKE expression Django emits for icontains
+        schema_editor.execute(
+            f'CREATE INDEX IF NOT EXISTS {name} ON employees_employee '
+            f'USING gin ((UPPER({column}::text)) gin_trgm_ops)'
+        )
+
+
+def drop_trigram_indexes(apps, schema_editor):
+    if schema_editor.connection.vendor != 'postgresql':
+        return
+    for name in INDEXES:
+        schema_editor.execute(f'DROP INDEX IF EXISTS {name}')
+
+
+class Migration(migrations.Migration):
+    """
+    Trigram GIN indexes for employee search on PostgreSQL, so that
+    ILIKE '%term%' and similarity ranking can use an index. Other
+    databases skip this migration's SQL.
+    """
+
+    dependencies = [
+        ('employees', '0003_filter_indexes'),
+    ]
+
+    operations = [
+        migrations.RunPython(create_trigram_indexes, drop_trigram_indexes),
+    ]
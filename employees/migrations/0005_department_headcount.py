@@ -0,0 +1,33 @@
+# Generated by Django 4.2.22 on 2026-10-18 16:43
+
+from django.db import migrations, models
+from django.db.models import Count, OuterRef, Subquery
+from django.db.models.functions import Coalesce
+
+
+def populate_headcounts(apps, schema_editor):
+    Department = apps.get_model('employees', 'Department')
+    Employee = apps.get_model('employees', 'Employee')
+    counts = (Employee.objects
+              .filter(department=OuterRef('pk'))
+              .order_by()
+              .values('department')
+              .annotate(total=Count('id'))
+              .values('total'))
+    Department.objects.update(headcount=Coalesce(Subquery(counts), 0))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('employees', '0004_search_trigram_indexes'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='department',
+            name='headcount',
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+        migrations.RunPython(populate_headcounts, migrations.RunPython.noop),
+    ]
@@ -1,9 +1,12 @@
-from django.db import models
+from django.db import models, transaction
 from django.contrib.auth.models import User
 
 class Department(models.Model):
-    name = models.CharField(max_length=100)
+    name = models.CharField(max_length=100, db_index=True)
     description = models.TextField(blank=True, null=True)
+    # Number of employees, kept up to date by the signal handlers in
+    # employees.signals; repaired with manage.py reconcile_headcounts
+    headcount = models.PositiveIntegerField(default=0, editable=False)
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
     
@@ -22,9 +25,26 @@ class Employee(models.Model):
     updated_at = models.DateTimeField(auto_now=True)
     user = models.OneToOneField(User, on_delete=models.SET_NULL, null=True, blank=True, related_name='employee')
     
+    class Meta:
+        indexes = [
+            # ?department= filters ordered by date_of_joining, and the
+            # name/date_of_joining orderings on their own
+            models.Index(fields=['department', 'date_of_joining'], name='employee_dept_joined_idx'),
+            models.Index(fields=['date_of_joining'], name='employee_joined_idx'),
+            models.Index(fields=['name'], name='employee_name_idx'),
+            # Delta sync pages through changes by (updated_at, id)
+            models.Index(fields=['updated_at', 'id'], name='employee_updated_id_idx'),
+        ]
+    
     def __str__(self):
         return self.name
 
+    def save(self, *args, **kwargs):
+        # The signal handlers lock the stored row in pre_save and move the
+        # headcounts in post_save; both must share the save's transaction
+        with transaction.atomic():
+            super().save(*args, **kwargs)
+
 class UserProfile(models.Model):
     user = models.OneToOneField(User, on_delete=models.CASCADE, related_name='profile')
     is_manager = models.BooleanField(default=False)
@@ -34,3 +54,24 @@ class UserProfile(models.Model):
     
     def __str__(self):
         return f"{self.user.username}'s profile"
+
+
+class Tombstone(models.Model):
+    """
+    Records a deleted employee, attendance or performance row so that
+    delta sync clients learn about the deletion. ``employee_id`` is the
+    employee the row belonged to, used to scope what regular employees
+    see; it is a plain column because that employee may be gone too.
+    """
+    model = models.CharField(max_length=100)
+    object_id = models.BigIntegerField()
+    employee_id = models.BigIntegerField(null=True, blank=True)
+    deleted_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['model', 'deleted_at'], name='tombstone_model_deleted_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.model} {self.object_id} deleted {self.deleted_at}"
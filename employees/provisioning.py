@@ -0,0 +1,114 @@
+from concurrent.futures import ProcessPoolExecutor
+import django
+from django.contrib.auth.hashers import make_password
+from django.contrib.auth.models import User
+from django.db import connection, transaction
+from django.utils import timezone
+from employee_project.caching import bump_model_version
+from .models import Department, Employee, UserProfile
+from .serializers import ProvisionUserSerializer
+
+USER_FIELDS = ['username', 'email', 'first_name', 'last_name']
+
+
+def hash_passwords(passwords, processes=None):
+    """
+    ``make_password`` for each password. Hashing is deliberately slow, so
+    with ``processes`` above 1 the work is spread over a process pool;
+    each worker sets Django up once.
+    """
+    if not processes or processes < 2 or len(passwords) < 2:
+        return [make_password(password) for password in passwords]
+    chunksize = max(len(passwords) // (processes * 4), 1)
+    with ProcessPoolExecutor(max_workers=processes, initializer=django.setup) as pool:
+        return list(pool.map(make_password, passwords, chunksize=chunksize))
+
+
+def validate_users(items, assign_roles=False):
+    """
+    Validate provisioning entries. Returns ``(valid, errors)``: the
+    validated data of every entry, and ``{'index', 'errors'}`` for the
+    invalid ones. Existing usernames and unknown departments are each
+    found with one query for the whole batch. Entries may only set
+    ``is_manager`` and ``department`` with ``assign_roles``.
+    """
+    valid = []
+    errors = []
+    usernames = {}
+    for index, item in enumerate(items):
+        serializer = ProvisionUserSerializer(data=item, context={'assign_roles': assign_roles})
+        if not serializer.is_valid():
+            errors.append({'index': index, 'errors': serializer.errors})
+            continue
+        data = serializer.validated_data
+        if data['username'] in usernames:
+            errors.append({'index': index, 'errors': {
+                'username': [f'Duplicate of entry {usernames[data["username"]]}.']}})
+            continue
+        usernames[data['username']] = index
+        valid.append((index, data))
+
+    taken = set(User.objects.filter(username__in=list(usernames)).values_list('username', flat=True))
+    department_ids = {data['department'] for _, data in valid if data.get('department') is not None}
+    known = set()
+    if department_ids:
+        known = set(Department.objects.filter(id__in=department_ids).values_list('id', flat=True))
+    checked = []
+    for index, data in valid:
+        problems = {}
+        if data['username'] in taken:
+            problems['username'] = ['A user with that username already exists.']
+        if data.get('department') is not None and data['department'] not in known:
+            problems['department'] = [f'Invalid pk "{data["department"]}" - object does not exist.']
+        if problems:
+            errors.append({'index': index, 'errors': problems})
+        else:
+            checked.append(data)
+    errors.sort(key=lambda error: error['index'])
+    return checked, errors
+
+
+def provision_users(entries, processes=None):
+    """
+    Create users from validated entries (see ``validate_users``), each with
+    a profile, and link every existing employee without a user whose
+    email matches a new user. Employees already linked to an account keep
+    it. Everything happens in one transaction with a fixed number of
+    queries: users, profiles, one email IN lookup and one employee update.
+    Returns the created profiles with their users attached.
+    """
+    passwords = hash_passwords([data['password'] for data in entries], processes)
+    users = [User(password=password, **{field: data.get(field, '') for field in USER_FIELDS})
+             for data, password in zip(entries, passwords)]
+    with transaction.atomic():
+        User.objects.bulk_create(users)
+        if not connection.features.can_return_rows_from_bulk_insert:
+            ids = dict(User.objects
+                       .filter(username__in=[user.username for user in users])
+                       .values_list('username', 'id'))
+            for user in users:
+                user.pk = ids[user.username]
+        profiles = UserProfile.objects.bulk_create([
+            UserProfile(user=user, is_manager=data['is_manager'], department_id=data.get('department'))
+            for user, data in zip(users, entries)
+        ])
+
+        # The first new user with a given email gets the employee
+        by_email = {}
+        for user in users:
+            if user.email:
+                by_email.setdefault(user.email, user)
+        employees = list(Employee.objects
+                         .filter(email__in=list(by_email), user__isnull=True)
+                         .only('id', 'email', 'user_id'))
+        now = timezone.now()
+        for employee in employees:
+            employee.user = by_email[employee.email]
+            employee.updated_at = now
+        if employees:
+            Employee.objects.bulk_update(employees, ['user', 'updated_at'])
+
+    # bulk_create and bulk_update skip the signal handler that invalidates
+    # cached users
+    bump_model_version(User)
+    return profiles
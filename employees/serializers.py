@@ -1,5 +1,8 @@
 from rest_framework import serializers
 from django.contrib.auth.models import User
+from django.contrib.auth.password_validation import validate_password
+from django.core.exceptions import ValidationError as DjangoValidationError
+from django.contrib.auth.validators import UnicodeUsernameValidator
 from .models import Department, Employee, UserProfile
 
 class DepartmentSerializer(serializers.ModelSerializer):
@@ -20,9 +23,75 @@ class UserProfileSerializer(serializers.ModelSerializer):
         model = UserProfile
         fields = ['id', 'user', 'is_manager', 'department', 'created_at', 'updated_at']
 
+class ProvisionUserSerializer(serializers.ModelSerializer):
+    """
+    One user to provision along with their profile. Username uniqueness
+    and the department are left to the caller, so that a whole batch can
+    be checked with one query each. Unless the ``assign_roles`` context
+    flag is set, as it is for administrators, the entry may not make
+    itself a manager or pick a department.
+    """
+    password = serializers.CharField(write_only=True, trim_whitespace=False)
+    is_manager = serializers.BooleanField(default=False)
+    department = serializers.IntegerField(min_value=1, required=False, allow_null=True)
+
+    class Meta:
+        model = User
+        fields = ['username', 'email', 'first_name', 'last_name', 'password', 'is_manager', 'department']
+        extra_kwargs = {'username': {'validators': [UnicodeUsernameValidator()]}}
+
+    def validate(self, attrs):
+        errors = {}
+        if not self.context.get('assign_roles'):
+            if attrs.get('is_manager'):
+                errors['is_manager'] = ['Only administrators can create managers.']
+            if attrs.get('department') is not None:
+                errors['department'] = ['Only administrators can assign a department.']
+        user = User(**{field: attrs.get(field, '') for field in ['username', 'email', 'first_name', 'last_name']})
+        try:
+            validate_password(attrs['password'], user)
+        except DjangoValidationError as exc:
+            errors['password'] = list(exc.messages)
+        if errors:
+            raise serializers.ValidationError(errors)
+        return attrs
+
 class EmployeeSerializer(serializers.ModelSerializer):
+    """
+    Supports sparse fieldsets on reads: ``?fields=id,name`` limits the
+    output to the listed fields, and ``?expand=`` opts into nested data.
+    ``expand=department`` replaces the department id with the department
+    object, and ``expand=user_details`` keeps the nested user when
+    ``fields`` is given. Without either parameter the output is unchanged.
+    """
     department_name = serializers.ReadOnlyField(source='department.name')
     user_details = UserSerializer(source='user', read_only=True)
+    expandable_fields = ['department', 'user_details']
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        request = self.context.get('request')
+        if request is None or request.method != 'GET':
+            return
+        fields, expand = self.get_sparse_fieldset(request)
+        if 'department' in expand:
+            self.fields['department'] = DepartmentSerializer(read_only=True)
+        if fields is not None:
+            for name in set(self.fields) - (fields | expand):
+                self.fields.pop(name)
+
+    @classmethod
+    def get_sparse_fieldset(cls, request):
+        """
+        Return ``(fields, expand)`` from the query string; ``fields`` is
+        None when every field was asked for.
+        """
+        def split(param):
+            return {name.strip() for name in request.query_params.get(param, '').split(',') if name.strip()}
+
+        fields = split('fields') or None
+        expand = split('expand') & set(cls.expandable_fields)
+        return fields, expand
     
     class Meta:
         model = Employee
@@ -0,0 +1,91 @@
+from django.contrib.auth.models import User
+from django.db.models.signals import pre_delete, pre_save, post_save, post_delete
+from django.dispatch import receiver
+from rest_framework.authtoken.models import Token
+from employee_project.authentication import invalidate_token, invalidate_user_tokens
+from employee_project.caching import bump_model_version
+from employee_project.sync import is_cascade, record_tombstone, record_tombstones
+from .headcounts import adjust_headcounts
+from .models import Department, Employee, UserProfile
+
+
+@receiver(post_delete, sender=Token)
+def forget_deleted_token(sender, instance, **kwargs):
+    invalidate_token(instance.key)
+
+
+@receiver(post_save, sender=User)
+@receiver(post_delete, sender=User)
+def forget_changed_user(sender, instance, **kwargs):
+    invalidate_user_tokens(instance.pk)
+    # Users carry no updated_at; conditional GETs embedding them use this
+    bump_model_version(User)
+
+
+@receiver(post_save, sender=UserProfile)
+@receiver(post_delete, sender=UserProfile)
+def forget_changed_profile(sender, instance, **kwargs):
+    invalidate_user_tokens(instance.user_id)
+
+
+@receiver(pre_save, sender=Employee)
+def remember_previous_employee(sender, instance, raw=False, **kwargs):
+    instance._previous_user_id = None
+    instance._previous_department_id = None
+    if raw or instance.pk is None:
+        return
+    # Locked until the save commits, so concurrent moves of one employee
+    # each see the department the other left it in
+    previous = (Employee.objects
+                .select_for_update()
+                .filter(pk=instance.pk)
+                .values_list('user_id', 'department_id')
+                .first())
+    if previous is not None:
+        instance._previous_user_id, instance._previous_department_id = previous
+
+
+@receiver(post_save, sender=Employee)
+def forget_relinked_employee(sender, instance, created, raw=False, **kwargs):
+    previous = getattr(instance, '_previous_user_id', None)
+    if previous == instance.user_id and not created:
+        return
+    invalidate_user_tokens(previous)
+    invalidate_user_tokens(instance.user_id)
+
+
+@receiver(post_save, sender=Employee)
+def count_saved_employee(sender, instance, created, raw=False, **kwargs):
+    if raw:
+        return
+    if created:
+        adjust_headcounts({instance.department_id: 1})
+        return
+    previous = getattr(instance, '_previous_department_id', None)
+    if previous is not None and previous != instance.department_id:
+        adjust_headcounts({previous: -1, instance.department_id: 1})
+
+
+@receiver(post_delete, sender=Employee)
+def forget_deleted_employee(sender, instance, origin=None, **kwargs):
+    # Employees only cascade from their department, whose pre_delete
+    # handles them all at once and whose headcount goes with it
+    if is_cascade(sender, origin):
+        return
+    invalidate_user_tokens(instance.user_id)
+    adjust_headcounts({instance.department_id: -1})
+    record_tombstone(instance, instance.pk)
+
+
+@receiver(pre_delete, sender=Department)
+def forget_cascaded_employees(sender, instance, **kwargs):
+    # One query each for the employees the department's delete is about to cascade to
+    employees = list(Employee.objects.filter(department=instance).values_list('id', 'user_id'))
+    record_tombstones(Employee, [(employee_id, employee_id) for employee_id, _ in employees])
+    invalidate_user_tokens(*[user_id for _, user_id in employees])
+
+
+@receiver(post_save, sender=Department)
+@receiver(post_delete, sender=Department)
+def bump_department_version(sender, instance, **kwargs):
+    bump_model_version(Department)
@@ -0,0 +1,38 @@
+from django.contrib.auth.models import User
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+from rest_framework import status
+from rest_framework.authtoken.models import Token
+from rest_framework.test import APIClient
+from .models import Department
+
+
+class ListQueryCountMixin:
+    """
+    Test case mixin: list pages must cost a constant number of queries
+    whatever the number of rows on the page, so lazy relation loads show
+    up as failures. Mix it into a ``TestCase`` that defines
+    ``add_rows(start, stop)`` to create the rows the lists it checks with
+    ``assertConstantQueries`` show.
+    """
+    def setUp(self):
+        self.client = APIClient()
+        self.user = User.objects.create_user(username='admin', password='testpassword', is_staff=True)
+        self.token = Token.objects.create(user=self.user)
+        self.client.credentials(HTTP_AUTHORIZATION=f'Token {self.token.key}')
+        self.today = timezone.now().date()
+        self.department = Department.objects.create(name='Test Department')
+
+    def count_queries(self, url):
+        self.client.get(url)  # warm the token cache
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(url)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        return len(queries)
+
+    def assertConstantQueries(self, url):
+        self.add_rows(0, 1)
+        single = self.count_queries(url)
+        self.add_rows(1, 10)
+        self.assertEqual(self.count_queries(url), single)
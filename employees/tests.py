@@ -1,11 +1,36 @@
-from django.test import TestCase
+import json
+import os
+import re
+import tempfile
+from datetime import date
+from django.http import HttpResponse
+from django.test import RequestFactory, TestCase, override_settings
 from django.urls import reverse
 from rest_framework.test import APIClient
 from rest_framework import status
 from rest_framework.authtoken.models import Token
+from io import StringIO
+from asgiref.sync import async_to_sync, sync_to_async
+from unittest import mock
 from django.contrib.auth.models import User
-from .models import Department, Employee
+from django.core.cache import cache
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management import call_command
+from django.db import connection, router
+from django.db.models import Count, F, QuerySet
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+from attendance.models import Attendance, DailyAttendanceSummary
+from performance.models import Performance
+from .models import Department, Employee, Tombstone, UserProfile
 from .serializers import DepartmentSerializer, EmployeeSerializer
+from .views import DepartmentViewSet, EmployeeViewSet
+from employee_project.async_views import AsyncReadView
+from employee_project.authentication import CachedTokenAuthentication
+from employee_project.metrics import registry
+from employee_project.permissions import IsAdminUser
+from employee_project.routers import ReplicaRoutingMiddleware, use_primary
+from .testing import ListQueryCountMixin
 
 
 class DepartmentModelTest(TestCase):
@@ -145,3 +170,1245 @@ class EmployeeAPITest(TestCase):
         response = self.client.delete(self.detail_url)
         self.assertEqual(response.status_code, status.HTTP_204_NO_CONTENT)
         self.assertEqual(Employee.objects.count(), 0)
+
+
+@override_settings(AUTH_TOKEN_CACHE_TIMEOUT=300)
+class AnalyticsAPITest(TestCase):
+    def setUp(self):
+        self.client = APIClient()
+        self.user = User.objects.create_user(username='admin', password='testpassword', is_staff=True)
+        self.token = Token.objects.create(user=self.user)
+        self.client.credentials(HTTP_AUTHORIZATION=f'Token {self.token.key}')
+
+        self.today = timezone.now().date()
+        self.engineering = Department.objects.create(name='Engineering')
+        self.sales = Department.objects.create(name='Sales')
+        self.empty = Department.objects.create(name='Legal')
+        self.employees = [
+            Employee.objects.create(
+                name=f'Employee {i}',
+                email=f'employee{i}@example.com',
+                phone_number='1234567890',
+                address='Test Address',
+                department=self.engineering if i < 2 else self.sales
+            )
+            for i in range(3)
+        ]
+        for employee, status_value in zip(self.employees, ['present', 'late', 'absent']):
+            Attendance.objects.create(employee=employee, date=self.today, status=status_value)
+        Attendance.objects.create(employee=self.employees[0],
+                                  date=self.today - timezone.timedelta(days=1),
+                                  status='absent')
+
+    def test_department_headcount(self):
+        response = self.client.get(reverse('analytics-department-headcount'))
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data['total'], 3)
+        counts = {row['name']: row['headcount'] for row in response.data['results']}
+        self.assertEqual(counts, {'Engineering': 2, 'Sales': 1, 'Legal': 0})
+
+    def test_department_headcount_is_single_query(self):
+        # Once the token is cached only the aggregate hits the database
+        self.client.get(reverse('analytics-department-headcount'))
+        with self.assertNumQueries(1):
+            self.client.get(reverse('analytics-department-headcount'))
+
+    def test_attendance_summary_default_window(self):
+        response = self.client.get(reverse('analytics-attendance-summary'))
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        results = response.data['results']
+        self.assertEqual(len(results), 30)
+        self.assertEqual(results[-1], {'date': self.today.isoformat(),
+                                       'present': 1, 'absent': 1, 'late': 1})
+        self.assertEqual(results[-2]['absent'], 1)
+        self.assertEqual(results[0]['present'], 0)
+
+    def test_attendance_summary_custom_window(self):
+        url = reverse('analytics-attendance-summary')
+        response = self.client.get(url, {'start_date': self.today.isoformat(),
+                                         'end_date': self.today.isoformat()})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(len(response.data['results']), 1)
+
+    def test_attendance_summary_invalid_dates(self):
+        url = reverse('analytics-attendance-summary')
+        response = self.client.get(url, {'start_date': 'not-a-date'})
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        response = self.client.get(url, {'start_date': self.today.isoformat(),
+                                         'end_date': (self.today - timezone.timedelta(days=1)).isoformat()})
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_attendance_summary_scoped_for_employees(self):
+        user = User.objects.create_user(username='employee', password='testpassword')
+        self.employees[0].user = user
+        self.employees[0].save()
+        token = Token.objects.create(user=user)
+        self.client.credentials(HTTP_AUTHORIZATION=f'Token {token.key}')
+
+        response = self.client.get(reverse('analytics-attendance-summary'))
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data['results'][-1], {'date': self.today.isoformat(),
+                                                        'present': 1, 'absent': 0, 'late': 0})
+
+
+class SeedDataCommandTest(TestCase):
+    def test_seed_data_options(self):
+        out = StringIO()
+        call_command('seed_data', employees=12, days=5, reviews=2, seed=7, batch_size=5, stdout=out)
+        self.assertEqual(Department.objects.count(), 10)
+        self.assertEqual(Employee.objects.count(), 12)
+        self.assertEqual(Attendance.objects.count(), 60)
+        self.assertTrue(12 <= Performance.objects.count() <= 24)
+        self.assertIn('rows/s', out.getvalue())
+
+        total = sum(s.present + s.absent + s.late for s in DailyAttendanceSummary.objects.all())
+        self.assertEqual(total, 60)
+
+    def test_seeded_reviews_follow_joining(self):
+        call_command('seed_data', employees=20, days=1, reviews=3, seed=3, stdout=StringIO())
+        self.assertGreater(Employee.objects.values('date_of_joining').distinct().count(), 1)
+        self.assertFalse(Performance.objects.filter(review_date__lt=F('employee__date_of_joining')).exists())
+
+    def test_seed_data_is_repeatable(self):
+        call_command('seed_data', employees=5, days=2, stdout=StringIO())
+        call_command('seed_data', employees=5, days=2, stdout=StringIO())
+        self.assertEqual(Department.objects.count(), 10)
+        self.assertEqual(Employee.objects.count(), 10)
+
+
+class ListQueryCountTest(ListQueryCountMixin, TestCase):
+    def add_rows(self, start, stop):
+        for i in range(start, stop):
+            user = User.objects.create_user(username=f'user{i}', password='testpassword')
+            UserProfile.objects.create(user=user, department=self.department)
+            Employee.objects.create(
+                name=f'Employee {i}',
+                email=f'employee{i}@example.com',
+                phone_number='1234567890',
+                address='Test Address',
+                department=self.department,
+                user=user
+            )
+
+    def test_employee_list(self):
+        self.assertConstantQueries(reverse('employee-list'))
+
+    def test_profile_list(self):
+        self.assertConstantQueries(reverse('userprofile-list'))
+
+
+@override_settings(AUTH_TOKEN_CACHE_TIMEOUT=300)
+class CachedTokenAuthenticationTest(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.client = APIClient()
+        self.department = Department.objects.create(name='Test Department')
+        self.user = User.objects.create_user(username='manager', password='testpassword')
+        self.profile = UserProfile.objects.create(user=self.user, is_manager=True)
+        self.token = Token.objects.create(user=self.user)
+        self.client.credentials(HTTP_AUTHORIZATION=f'Token {self.token.key}')
+        self.url = reverse('department-list')
+
+    def test_steady_state_requests_skip_auth_queries(self):
+        self.client.get(self.url)
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(self.url)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertFalse(any('authtoken_token' in q['sql'] or 'employees_userprofile' in q['sql']
+                             for q in queries.captured_queries))
+
+    def test_cached_role_is_used_by_permissions(self):
+        self.client.get(self.url)
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.patch(reverse('department-detail', kwargs={'pk': self.department.pk}),
+                                         {'name': 'Renamed'}, format='json')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertFalse(any('employees_userprofile' in q['sql'] for q in queries.captured_queries))
+
+    def test_deleted_token_is_rejected(self):
+        self.client.get(self.url)
+        self.token.delete()
+        response = self.client.get(self.url)
+        self.assertEqual(response.status_code, status.HTTP_401_UNAUTHORIZED)
+
+    def test_profile_change_invalidates_role(self):
+        detail_url = reverse('department-detail', kwargs={'pk': self.department.pk})
+        self.client.get(self.url)
+        self.profile.is_manager = False
+        self.profile.save()
+        response = self.client.patch(detail_url, {'name': 'Renamed'}, format='json')
+        self.assertEqual(response.status_code, status.HTTP_403_FORBIDDEN)
+
+    def test_deactivated_user_is_rejected(self):
+        self.client.get(self.url)
+        self.user.is_active = False
+        self.user.save()
+        response = self.client.get(self.url)
+        self.assertEqual(response.status_code, status.HTTP_401_UNAUTHORIZED)
+
+    @override_settings(AUTH_TOKEN_CACHE_TIMEOUT=0)
+    def test_zero_timeout_turns_caching_off(self):
+        self.client.get(self.url)
+        self.assertIsNone(cache.get(f'auth-token:{self.token.key}'))
+        self.token.delete()
+        self.assertEqual(self.client.get(self.url).status_code, status.HTTP_401_UNAUTHORIZED)
+
+    def test_entry_holds_no_password_hash(self):
+        self.client.get(self.url)
+        entry = cache.get(f'auth-token:{self.token.key}')
+        self.assertEqual(set(entry['user']), {'id', 'is_active', 'is_staff', 'is_superuser'})
+        user, _ = CachedTokenAuthentication().authenticate_credentials(self.token.key)
+        self.assertEqual(user.pk, self.user.pk)
+        # Other fields load on first access
+        self.assertEqual(user.username, 'manager')
+
+    def test_invalidation_repeats_on_commit(self):
+        self.client.get(self.url)
+        key = f'auth-token:{self.token.key}'
+        stale = cache.get(key)
+        with self.captureOnCommitCallbacks(execute=True):
+            self.user.is_active = False
+            self.user.save()
+            self.assertIsNone(cache.get(key))
+            # A concurrent request still reading the committed row caches it again
+            cache.set(key, stale)
+        self.assertIsNone(cache.get(key))
+
+    def test_employee_link_invalidates_scope(self):
+        employee = Employee.objects.create(
+            name='Linked Employee',
+            email='linked@example.com',
+            phone_number='1234567890',
+            address='Test Address',
+            department=self.department
+        )
+        plain = User.objects.create_user(username='plain', password='testpassword')
+        token = Token.objects.create(user=plain)
+        self.client.credentials(HTTP_AUTHORIZATION=f'Token {token.key}')
+        Attendance.objects.create(employee=employee, date=timezone.now().date(), status='present')
+        attendance_url = reverse('attendance-list')
+        self.assertEqual(self.client.get(attendance_url).data['count'], 0)
+
+        employee.user = plain
+        employee.save()
+        self.assertEqual(self.client.get(attendance_url).data['count'], 1)
+
+
+@override_settings(AUTH_TOKEN_CACHE_TIMEOUT=300)
+class QueryPlanTest(TestCase):
+    """
+    Runs EXPLAIN on every SELECT the filtered and ordered list endpoints
+    issue against a seeded database and fails on sequential scans.
+    """
+    @classmethod
+    def setUpTestData(cls):
+        call_command('seed_data', employees=60, days=20, reviews=3, seed=1, stdout=StringIO())
+        cls.admin = User.objects.create_user(username='admin', password='testpassword', is_staff=True)
+        cls.token = Token.objects.create(user=cls.admin)
+        today = timezone.now().date()
+        for i, employee in enumerate(Employee.objects.order_by('id')):
+            # date_of_joining is auto_now_add, so spread it out with update()
+            Employee.objects.filter(pk=employee.pk).update(
+                date_of_joining=today - timezone.timedelta(days=30 * i),
+                user=User.objects.create(username=f'user{employee.id}') if i % 2 else None
+            )
+        with connection.cursor() as cursor:
+            cursor.execute('ANALYZE')
+
+    def setUp(self):
+        self.client = APIClient()
+        self.client.credentials(HTTP_AUTHORIZATION=f'Token {self.token.key}')
+        self.today = timezone.now().date()
+        self.employee = Employee.objects.order_by('id')[1]
+        self.department = self.employee.department
+
+    def explain(self, sql):
+        with connection.cursor() as cursor:
+            if connection.vendor == 'postgresql':
+                cursor.execute('SET LOCAL enable_seqscan = off')
+            cursor.execute(f'{connection.ops.explain_query_prefix()} {sql}')
+            rows = cursor.fetchall()
+        if connection.vendor == 'sqlite':
+            return [row[-1] for row in rows]
+        return [row[0] for row in rows]
+
+    def is_sequential_scan(self, line):
+        if connection.vendor == 'sqlite':
+            return line.startswith('SCAN ') and ' USING ' not in line
+        return 'Seq Scan' in line
+
+    def assertIndexedQueries(self, url, params):
+        self.client.get(url, params)  # warm the token cache
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(url, params)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        selects = [q['sql'] for q in queries.captured_queries if q['sql'].startswith('SELECT')]
+        self.assertTrue(selects)
+        for sql in selects:
+            plan = self.explain(sql)
+            scans = [line for line in plan if self.is_sequential_scan(line)]
+            self.assertFalse(scans, f'{url} {params} scans sequentially:\n{sql}\n' + '\n'.join(plan))
+
+    def test_attendance_queries(self):
+        url = reverse('attendance-list')
+        for params in [
+            {'date': self.today},
+            {'date': self.today, 'status': 'late'},
+            {'status': 'absent'},
+            {'status': 'absent', 'ordering': '-date'},
+            {'employee': self.employee.id},
+            {'employee': self.employee.id, 'ordering': '-date'},
+            {'date': self.today, 'ordering': 'status'},
+            {'ordering': '-date'},
+            {'pagination': 'keyset'},
+        ]:
+            self.assertIndexedQueries(url, params)
+
+    def test_performance_queries(self):
+        url = reverse('performance-list')
+        review_date = Performance.objects.values_list('review_date', flat=True).first()
+        for params in [
+            {'review_date': review_date},
+            {'review_date': review_date, 'rating': 3},
+            {'rating': 4},
+            {'rating': 4, 'ordering': '-review_date'},
+            {'employee': self.employee.id},
+            {'ordering': 'rating'},
+            {'ordering': '-review_date'},
+            {'pagination': 'keyset'},
+        ]:
+            self.assertIndexedQueries(url, params)
+
+    def test_employee_queries(self):
+        url = reverse('employee-list')
+        for params in [
+            {'department': self.department.id},
+            {'department': self.department.id, 'ordering': 'date_of_joining'},
+            {'date_of_joining': self.employee.date_of_joining},
+            {'ordering': 'name'},
+            {'ordering': 'date_of_joining'},
+            {'ordering': 'department__name'},
+        ]:
+            self.assertIndexedQueries(url, params)
+
+    def test_department_queries(self):
+        with mock.patch.object(DepartmentViewSet, 'cache_responses', False):
+            self.assertIndexedQueries(reverse('department-list'), {'ordering': 'name'})
+
+
+class EmployeeSearchTest(TestCase):
+    def setUp(self):
+        self.client = APIClient()
+        self.user = User.objects.create_user(username='admin', password='testpassword', is_staff=True)
+        self.token = Token.objects.create(user=self.user)
+        self.client.credentials(HTTP_AUTHORIZATION=f'Token {self.token.key}')
+        department = Department.objects.create(name='Test Department')
+        for name, email in [('Annabel Smith', 'asmith@example.com'),
+                            ('Ann', 'ann@example.com'),
+                            ('Joann Lee', 'jlee@example.com'),
+                            ('Bob Stone', 'bob@example.com')]:
+            Employee.objects.create(name=name, email=email, phone_number='1234567890',
+                                    address='Test Address', department=department)
+        self.url = reverse('employee-list')
+
+    def test_search_is_ranked_by_relevance(self):
+        response = self.client.get(self.url, {'search': 'ann'})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        names = [row['name'] for row in response.data['results']]
+        self.assertEqual(names, ['Ann', 'Annabel Smith', 'Joann Lee'])
+
+    def test_search_matches_email(self):
+        response = self.client.get(self.url, {'search': 'bob@'})
+        self.assertEqual([row['name'] for row in response.data['results']], ['Bob Stone'])
+
+    def test_explicit_ordering_overrides_rank(self):
+        response = self.client.get(self.url, {'search': 'ann', 'ordering': '-name'})
+        names = [row['name'] for row in response.data['results']]
+        self.assertEqual(names, ['Joann Lee', 'Annabel Smith', 'Ann'])
+
+
+@override_settings(AUTH_TOKEN_CACHE_TIMEOUT=300)
+class DepartmentResponseCacheTest(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.client = APIClient()
+        self.user = User.objects.create_user(username='admin', password='testpassword', is_staff=True)
+        self.token = Token.objects.create(user=self.user)
+        self.client.credentials(HTTP_AUTHORIZATION=f'Token {self.token.key}')
+        self.department = Department.objects.create(name='Engineering')
+        self.url = reverse('department-list')
+        self.detail_url = reverse('department-detail', kwargs={'pk': self.department.pk})
+
+    def test_repeated_reads_are_served_from_cache(self):
+        first = self.client.get(self.url)
+        with self.assertNumQueries(0):
+            second = self.client.get(self.url)
+        self.assertEqual(first.data, second.data)
+        self.client.get(self.detail_url)
+        with self.assertNumQueries(0):
+            self.client.get(self.detail_url)
+
+    def test_query_string_is_part_of_the_key(self):
+        Department.objects.create(name='Sales')
+        self.client.get(self.url)
+        response = self.client.get(self.url, {'search': 'sales'})
+        self.assertEqual([row['name'] for row in response.data['results']], ['Sales'])
+
+    def test_writes_invalidate_cached_responses(self):
+        self.client.get(self.url)
+        self.client.get(self.detail_url)
+        self.client.patch(self.detail_url, {'name': 'Platform'}, format='json')
+        self.assertEqual(self.client.get(self.url).data['results'][0]['name'], 'Platform')
+        self.assertEqual(self.client.get(self.detail_url).data['name'], 'Platform')
+
+        Department.objects.create(name='Sales')
+        self.assertEqual(self.client.get(self.url).data['count'], 2)
+        self.department.delete()
+        self.assertEqual(self.client.get(self.url).data['count'], 1)
+
+    def test_version_moves_again_on_commit(self):
+        self.client.get(self.url)
+        with self.captureOnCommitCallbacks(execute=True):
+            self.department.name = 'Platform'
+            self.department.save()
+            # A concurrent request caches the committed (old) list under the new version
+            key = self.get_list_cache_key()
+            cache.set(key, {'data': {'stale': True}, 'headers': {}})
+        self.assertNotEqual(self.get_list_cache_key(), key)
+        self.assertEqual(self.client.get(self.url).data['results'][0]['name'], 'Platform')
+
+    def get_list_cache_key(self):
+        view = DepartmentViewSet()
+        view.action = 'list'
+        return view.get_response_cache_key(RequestFactory().get(self.url))
+
+    def test_errors_are_not_cached(self):
+        missing_url = reverse('department-detail', kwargs={'pk': 999})
+        self.assertEqual(self.client.get(missing_url).status_code, status.HTTP_404_NOT_FOUND)
+        department = Department(pk=999, name='Late arrival')
+        department.save()
+        self.assertEqual(self.client.get(missing_url).status_code, status.HTTP_200_OK)
+
+
+class ConditionalGetTest(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.client = APIClient()
+        self.user = User.objects.create_user(username='admin', password='testpassword', is_staff=True)
+        self.token = Token.objects.create(user=self.user)
+        self.client.credentials(HTTP_AUTHORIZATION=f'Token {self.token.key}')
+        self.department = Department.objects.create(name='Engineering')
+        self.employee = Employee.objects.create(
+            name='Test Employee',
+            email='test@example.com',
+            phone_number='1234567890',
+            address='Test Address',
+            department=self.department
+        )
+        self.url = reverse('employee-list')
+        self.detail_url = reverse('employee-detail', kwargs={'pk': self.employee.pk})
+
+    def revalidate(self, url, etag):
+        return self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+
+    def test_list_returns_304_when_unchanged(self):
+        etag = self.client.get(self.url)['ETag']
+        response = self.revalidate(self.url, etag)
+        self.assertEqual(response.status_code, status.HTTP_304_NOT_MODIFIED)
+        self.assertEqual(response['ETag'], etag)
+        self.assertFalse(response.content)
+
+    def test_list_etag_changes_on_update_create_and_delete(self):
+        etag = self.client.get(self.url)['ETag']
+        self.employee.name = 'Renamed'
+        self.employee.save()
+        response = self.revalidate(self.url, etag)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+        etag = response['ETag']
+        other = Employee.objects.create(name='Other', email='other@example.com', phone_number='1',
+                                        address='Test Address', department=self.department)
+        response = self.revalidate(self.url, etag)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+        etag = response['ETag']
+        other.delete()
+        self.assertEqual(self.revalidate(self.url, etag).status_code, status.HTTP_200_OK)
+
+    def test_related_changes_move_the_etag(self):
+        etag = self.client.get(self.detail_url)['ETag']
+        self.department.name = 'Platform'
+        self.department.save()
+        response = self.revalidate(self.detail_url, etag)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data['department_name'], 'Platform')
+
+        etag = response['ETag']
+        user = User.objects.create_user(username='linked', password='testpassword')
+        self.employee.user = user
+        self.employee.save()
+        etag = self.revalidate(self.detail_url, etag)['ETag']
+        user.first_name = 'Linked'
+        user.save()
+        self.assertEqual(self.revalidate(self.detail_url, etag).status_code, status.HTTP_200_OK)
+
+    def test_filters_change_the_etag(self):
+        etag = self.client.get(self.url)['ETag']
+        response = self.revalidate(f'{self.url}?search=nobody', etag)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+    def test_not_modified_list_skips_serialization(self):
+        etag = self.client.get(self.url)['ETag']
+        with mock.patch.object(EmployeeSerializer, 'to_representation') as to_representation:
+            self.revalidate(self.url, etag)
+        to_representation.assert_not_called()
+
+    def test_department_detail_honours_if_modified_since(self):
+        detail_url = reverse('department-detail', kwargs={'pk': self.department.pk})
+        last_modified = self.client.get(detail_url)['Last-Modified']
+        response = self.client.get(detail_url, HTTP_IF_MODIFIED_SINCE=last_modified)
+        self.assertEqual(response.status_code, status.HTTP_304_NOT_MODIFIED)
+
+    def test_cached_department_list_still_revalidates(self):
+        url = reverse('department-list')
+        etag = self.client.get(url)['ETag']
+        self.assertEqual(self.revalidate(url, etag).status_code, status.HTTP_304_NOT_MODIFIED)
+        Department.objects.create(name='Sales')
+        self.assertEqual(self.revalidate(url, etag).status_code, status.HTTP_200_OK)
+
+
+class EmployeeSparseFieldsetTest(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.client = APIClient()
+        self.user = User.objects.create_user(username='admin', password='testpassword', is_staff=True)
+        self.token = Token.objects.create(user=self.user)
+        self.client.credentials(HTTP_AUTHORIZATION=f'Token {self.token.key}')
+        self.department = Department.objects.create(name='Engineering')
+        self.linked = User.objects.create_user(username='linked', password='testpassword')
+        self.employee = Employee.objects.create(
+            name='Test Employee',
+            email='test@example.com',
+            phone_number='1234567890',
+            address='Test Address',
+            department=self.department,
+            user=self.linked
+        )
+        self.url = reverse('employee-list')
+
+    def get(self, params, url=None):
+        self.client.get(url or self.url, params)  # warm the token cache
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(url or self.url, params)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        return response, [q['sql'] for q in queries.captured_queries]
+
+    def test_fields_limit_output_and_columns(self):
+        response, queries = self.get({'fields': 'id,name'})
+        self.assertEqual(response.data['results'], [{'id': self.employee.id, 'name': 'Test Employee'}])
+        page_query = queries[-1]
+        self.assertNotIn('"address"', page_query)
+        self.assertNotIn('JOIN', page_query)
+
+    def test_department_name_joins_only_the_department(self):
+        response, queries = self.get({'fields': 'id,department_name'})
+        self.assertEqual(response.data['results'][0], {'id': self.employee.id, 'department_name': 'Engineering'})
+        self.assertIn('employees_department', queries[-1])
+        self.assertNotIn('auth_user', queries[-1])
+
+    def test_expand_department(self):
+        response, _ = self.get({'fields': 'id', 'expand': 'department'})
+        row = response.data['results'][0]
+        self.assertEqual(set(row), {'id', 'department'})
+        self.assertEqual(row['department']['name'], 'Engineering')
+
+    def test_expand_user_details(self):
+        response, _ = self.get({'fields': 'id', 'expand': 'user_details'})
+        self.assertEqual(response.data['results'][0]['user_details']['username'], 'linked')
+
+    def test_sparse_retrieve(self):
+        url = reverse('employee-detail', kwargs={'pk': self.employee.pk})
+        response, _ = self.get({'fields': 'email'}, url=url)
+        self.assertEqual(response.data, {'email': 'test@example.com'})
+
+    def test_default_output_is_unchanged(self):
+        response, _ = self.get({})
+        self.assertEqual(response.data['results'][0],
+                         EmployeeSerializer(Employee.objects.get(pk=self.employee.pk)).data)
+
+    def test_fields_do_not_affect_writes(self):
+        url = reverse('employee-detail', kwargs={'pk': self.employee.pk})
+        response = self.client.patch(f'{url}?fields=id', {'name': 'Renamed'}, format='json')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data['name'], 'Renamed')
+
+
+class EmployeeFastReadTest(TestCase):
+    def setUp(self):
+        self.client = APIClient()
+        self.user = User.objects.create_user(username='admin', password='testpassword', is_staff=True)
+        self.token = Token.objects.create(user=self.user)
+        self.client.credentials(HTTP_AUTHORIZATION=f'Token {self.token.key}')
+        department = Department.objects.create(name='Engineering')
+        linked = User.objects.create_user(username='linked', password='testpassword', first_name='Linked')
+        self.employees = [
+            Employee.objects.create(name='Linked Employee', email='linked@example.com',
+                                    phone_number='1234567890', address='Test Address',
+                                    department=department, user=linked),
+            # No linked user: the nested user must come out as None
+            Employee.objects.create(name='Loose Employee', email='loose@example.com',
+                                    phone_number='1234567890', address='Test Address',
+                                    department=department),
+        ]
+
+    def test_list_matches_serializer(self):
+        response = self.client.get(reverse('employee-list'), {'ordering': 'name'})
+        expected = EmployeeSerializer(Employee.objects.order_by('name'), many=True).data
+        self.assertEqual(response.json()['results'], json.loads(json.dumps(expected)))
+        self.assertIsNone(response.data['results'][1]['user_details'])
+
+    def test_retrieve_matches_serializer(self):
+        for employee in self.employees:
+            response = self.client.get(reverse('employee-detail', kwargs={'pk': employee.pk}))
+            self.assertEqual(response.json(), json.loads(json.dumps(EmployeeSerializer(employee).data)))
+
+    def test_bench_serialization_command(self):
+        out = StringIO()
+        call_command('bench_serialization', rows=10, repeat=1, stdout=out, stderr=StringIO())
+        self.assertIn('employees', out.getvalue())
+        self.assertIn('rows/s', out.getvalue())
+
+
+class AsyncReadViewTest(TestCase):
+    """
+    The async read endpoints return the same payloads as their synchronous
+    counterparts.
+    """
+    def setUp(self):
+        self.user = User.objects.create_user(username='admin', password='testpassword', is_staff=True)
+        self.token = Token.objects.create(user=self.user)
+        self.auth = {'headers': {'Authorization': f'Token {self.token.key}'}}
+        self.department = Department.objects.create(name='Engineering')
+        self.employee_user = User.objects.create_user(username='employee', password='testpassword')
+        self.employee_token = Token.objects.create(user=self.employee_user)
+        for i in range(12):
+            Employee.objects.create(name=f'Employee {i}', email=f'employee{i}@example.com',
+                                    phone_number='1234567890', address='Test Address',
+                                    department=self.department,
+                                    user=self.employee_user if i == 0 else None)
+        UserProfile.objects.create(user=self.user, is_manager=True, department=self.department)
+        self.sync_client = APIClient()
+        self.sync_client.credentials(HTTP_AUTHORIZATION=f'Token {self.token.key}')
+
+    def sync_json(self, url, params=None):
+        return self.sync_client.get(url, params or {}).json()
+
+    async def test_viewset_permissions_apply(self):
+        with mock.patch.object(EmployeeViewSet, 'get_permissions', lambda view: [IsAdminUser()]):
+            response = await self.async_client.get(
+                reverse('async-employee-list'), headers={'Authorization': f'Token {self.employee_token.key}'})
+            self.assertEqual(response.status_code, status.HTTP_403_FORBIDDEN)
+            response = await self.async_client.get(reverse('async-employee-list'), **self.auth)
+            self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+    def test_read_is_abstract(self):
+        with self.assertRaises(TypeError):
+            AsyncReadView()
+
+    async def test_employee_list_matches_sync(self):
+        response = await self.async_client.get(reverse('async-employee-list'), {'ordering': 'name'}, **self.auth)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        expected = await sync_to_async(self.sync_json)(reverse('employee-list'), {'ordering': 'name'})
+        body = response.json()
+        self.assertEqual(body['results'], expected['results'])
+        self.assertEqual(body['count'], 12)
+        self.assertIn('page=2', body['next'])
+
+        response = await self.async_client.get(body['next'], **self.auth)
+        self.assertEqual(len(response.json()['results']), 2)
+        self.assertIsNone(response.json()['next'])
+
+    async def test_employee_detail_matches_sync(self):
+        employee = await Employee.objects.afirst()
+        response = await self.async_client.get(
+            reverse('async-employee-detail', kwargs={'pk': employee.pk}), **self.auth)
+        expected = await sync_to_async(self.sync_json)(reverse('employee-detail', kwargs={'pk': employee.pk}))
+        self.assertEqual(response.json(), expected)
+
+        response = await self.async_client.get(reverse('async-employee-detail', kwargs={'pk': 0}), **self.auth)
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+
+    async def test_attendance_list_is_scoped_to_the_employee(self):
+        employees = [employee async for employee in Employee.objects.order_by('pk')[:2]]
+        today = timezone.now().date()
+        for employee in employees:
+            await Attendance.objects.acreate(employee=employee, date=today, status='present')
+        response = await self.async_client.get(reverse('async-attendance-list'),
+                                               headers={'Authorization': f'Token {self.employee_token.key}'})
+        results = response.json()['results']
+        self.assertEqual([row['employee'] for row in results], [employees[0].pk])
+
+    async def test_my_profile(self):
+        response = await self.async_client.get(reverse('async-my-profile'), **self.auth)
+        self.assertEqual(response.json()['user']['username'], 'admin')
+        self.assertTrue(response.json()['is_manager'])
+
+        response = await self.async_client.get(reverse('async-my-profile'),
+                                               headers={'Authorization': f'Token {self.employee_token.key}'})
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+
+    async def test_authentication_required(self):
+        response = await self.async_client.get(reverse('async-employee-list'))
+        self.assertEqual(response.status_code, status.HTTP_401_UNAUTHORIZED)
+        response = await self.async_client.get(reverse('async-employee-list'), headers={'Authorization': 'Token invalid'})
+        self.assertEqual(response.status_code, status.HTTP_401_UNAUTHORIZED)
+        self.assertEqual(response['WWW-Authenticate'], 'Token')
+
+
+class RequestMetricsTest(TestCase):
+    def setUp(self):
+        registry.reset()
+        self.client = APIClient()
+        self.user = User.objects.create_user(username='admin', password='testpassword', is_staff=True)
+        self.token = Token.objects.create(user=self.user)
+        self.client.credentials(HTTP_AUTHORIZATION=f'Token {self.token.key}')
+        Department.objects.create(name='Engineering')
+
+    def test_server_timing_header(self):
+        response = self.client.get(reverse('employee-list'))
+        self.assertRegex(response['Server-Timing'], r'^app;dur=[\d.]+, db;dur=[\d.]+;desc="\d+ queries"$')
+
+    def test_metrics_aggregate_by_view_and_action(self):
+        cache.clear()
+        with CaptureQueriesContext(connection) as queries:
+            self.client.get(reverse('employee-list'))
+        self.client.get(reverse('employee-list'))
+        self.client.get(reverse('department-detail', kwargs={'pk': 0}))
+
+        body = self.client.get(reverse('metrics')).content.decode()
+        labels = 'view="employee-list",action="list",method="GET"'
+        self.assertIn(f'http_request_duration_seconds_count{{{labels}}} 2', body)
+        self.assertIn(f'http_request_duration_seconds_bucket{{{labels},le="+Inf"}} 2', body)
+        self.assertIn('view="department-detail",action="retrieve",method="GET"', body)
+        # The first request ran len(queries) queries, the second hit the token cache
+        match = re.search(rf'http_request_db_queries_total{{{labels}}} (\d+)', body)
+        self.assertGreaterEqual(int(match.group(1)), len(queries))
+
+    def test_unknown_methods_share_one_series(self):
+        for method in ['FOO', 'BAR']:
+            self.client.generic(method, reverse('employee-list'))
+        body = self.client.get(reverse('metrics')).content.decode()
+        self.assertIn('http_request_duration_seconds_count{view="employee-list",action="",method="other"} 2', body)
+        self.assertNotIn('FOO', body)
+
+    def test_async_views_are_measured(self):
+        async_client = self.async_client
+        response = async_to_sync(async_client.get)(
+            reverse('async-employee-list'), headers={'Authorization': f'Token {self.token.key}'})
+        self.assertIn('queries', response['Server-Timing'])
+        self.assertNotIn('desc="0 queries"', response['Server-Timing'])
+
+    def test_metrics_endpoint_is_staff_only(self):
+        user = User.objects.create_user(username='employee', password='testpassword')
+        token = Token.objects.create(user=user)
+        self.client.credentials(HTTP_AUTHORIZATION=f'Token {token.key}')
+        self.assertEqual(self.client.get(reverse('metrics')).status_code, status.HTTP_403_FORBIDDEN)
+
+
+class BenchApiCommandTest(TestCase):
+    def test_reports_every_endpoint_and_rolls_back(self):
+        with tempfile.TemporaryDirectory() as directory:
+            output = os.path.join(directory, 'bench.json')
+            call_command('bench_api', employees=5, days=3, reviews=1, iterations=2,
+                         output=output, stdout=StringIO(), stderr=StringIO())
+            with open(output) as handle:
+                report = json.load(handle)
+
+            self.assertEqual(report['meta']['employees'], 5)
+            self.assertEqual(report['results']['employees.list admin']['status'], 200)
+            self.assertEqual(report['results']['attendances.bulk employee']['status'], 403)
+            for role in ['admin', 'manager', 'employee']:
+                result = report['results'][f'attendances.list {role}']
+                self.assertLessEqual(result['p50_ms'], result['p95_ms'])
+                self.assertGreater(result['bytes'], 0)
+            self.assertFalse(Employee.objects.exists())
+            self.assertFalse(User.objects.filter(username__startswith='bench-').exists())
+
+            # Compared with itself, only timing noise could be flagged
+            out = StringIO()
+            call_command('bench_api', employees=5, days=3, reviews=1, iterations=2,
+                         baseline=output, tolerance=1000, stdout=out, stderr=StringIO())
+            self.assertIn('No regressions', out.getvalue())
+
+
+class EmployeeImportTest(TestCase):
+    HEADER = 'name,email,phone_number,address,department,position\n'
+
+    def setUp(self):
+        self.client = APIClient()
+        self.user = User.objects.create_user(username='admin', password='testpassword', is_staff=True)
+        self.token = Token.objects.create(user=self.user)
+        self.client.credentials(HTTP_AUTHORIZATION=f'Token {self.token.key}')
+        self.department = Department.objects.create(name='Engineering')
+        Employee.objects.create(name='Existing Employee', email='existing@example.com',
+                                phone_number='1234567890', address='Test Address', department=self.department)
+
+    def upload(self, text, **params):
+        url = reverse('employee-import-csv')
+        if params:
+            url += '?' + '&'.join(f'{name}={value}' for name, value in params.items())
+        return self.client.post(url, {'file': SimpleUploadedFile('employees.csv', text.encode())},
+                                format='multipart')
+
+    def test_creates_valid_rows_and_reports_invalid_ones(self):
+        response = self.upload(self.HEADER
+                               + 'Ada,ada@example.com,123,Street 1,Engineering,Engineer\n'
+                               + 'Bob,not-an-email,123,Street 2,Engineering,\n'
+                               + 'Cy,existing@example.com,123,Street 3,Engineering,\n'
+                               + 'Di,ada@example.com,123,Street 4,Engineering,\n'
+                               + 'Ed,ed@example.com,123,Street 5,Marketing,\n'
+                               + 'Flo,flo@example.com,123,Street 6,Engineering,\n')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data['created'], 2)
+        self.assertEqual(response.data['invalid'], 4)
+        errors = {error['line']: error['errors'] for error in response.data['errors']}
+        self.assertEqual(sorted(errors), [3, 4, 5, 6])
+        self.assertIn('email', errors[3])
+        self.assertEqual(errors[4]['email'], ['Employee with this email already exists.'])
+        self.assertEqual(errors[5]['email'], ['Duplicate of line 2.'])
+        self.assertIn('department', errors[6])
+
+        flo = Employee.objects.get(email='flo@example.com')
+        self.assertEqual(flo.department, self.department)
+        self.assertIsNone(flo.position)
+        self.assertEqual(Employee.objects.get(email='ada@example.com').position, 'Engineer')
+
+    def test_dry_run_writes_nothing(self):
+        response = self.upload(self.HEADER + 'Ada,ada@example.com,123,Street 1,Engineering,\n', dry_run=1)
+        self.assertEqual(response.data['created'], 1)
+        self.assertTrue(response.data['dry_run'])
+        self.assertFalse(Employee.objects.filter(email='ada@example.com').exists())
+
+    def test_create_departments(self):
+        response = self.upload(self.HEADER + 'Ed,ed@example.com,123,Street 5,Marketing,\n',
+                               create_departments=1)
+        self.assertEqual(response.data['created'], 1)
+        self.assertEqual(Employee.objects.get(email='ed@example.com').department.name, 'Marketing')
+
+    def test_existing_emails_checked_in_one_query(self):
+        rows = ''.join(f'Row {number},row{number}@example.com,123,Street,Engineering,\n' for number in range(50))
+        with CaptureQueriesContext(connection) as captured:
+            self.upload(self.HEADER + rows)
+        selects = [query['sql'] for query in captured.captured_queries
+                   if '"employees_employee"."email" IN' in query['sql']]
+        self.assertEqual(len(selects), 1)
+        self.assertEqual(Employee.objects.count(), 51)
+
+    def test_missing_columns_rejected(self):
+        response = self.upload('name,email\nAda,ada@example.com\n')
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertIn('department', response.data['detail'])
+
+    def test_admin_only(self):
+        user = User.objects.create_user(username='employee', password='testpassword')
+        UserProfile.objects.create(user=user, department=self.department)
+        self.client.credentials(HTTP_AUTHORIZATION=f'Token {Token.objects.create(user=user).key}')
+        response = self.upload(self.HEADER + 'Ada,ada@example.com,123,Street 1,Engineering,\n')
+        self.assertEqual(response.status_code, status.HTTP_403_FORBIDDEN)
+
+    def test_import_employees_command(self):
+        with tempfile.NamedTemporaryFile('w', suffix='.csv', delete=False) as handle:
+            handle.write(self.HEADER + 'Ada,ada@example.com,123,Street 1,Engineering,\n'
+                         + 'Bob,bob@example.com,123,Street 2,Nowhere,\n')
+        self.addCleanup(os.remove, handle.name)
+        out = StringIO()
+        call_command('import_employees', handle.name, stdout=out, stderr=StringIO())
+        self.assertIn('Created 1 employees, skipped 1 invalid rows', out.getvalue())
+        self.assertIn('line 3', out.getvalue())
+        self.assertTrue(Employee.objects.filter(email='ada@example.com').exists())
+
+
+class UserProvisioningTest(TestCase):
+    def setUp(self):
+        self.client = APIClient()
+        self.user = User.objects.create_user(username='admin', password='testpassword', is_staff=True)
+        self.token = Token.objects.create(user=self.user)
+        self.client.credentials(HTTP_AUTHORIZATION=f'Token {self.token.key}')
+        self.department = Department.objects.create(name='Engineering')
+        self.employee = Employee.objects.create(name='Test Employee', email='ada@example.com',
+                                                phone_number='1234567890', address='Test Address',
+                                                department=self.department)
+
+    def test_register_links_employee_in_one_transaction(self):
+        client = APIClient()
+        with CaptureQueriesContext(connection) as captured:
+            response = client.post(reverse('register'), {
+                'username': 'ada', 'email': 'ada@example.com', 'password': 'secret-password',
+            }, format='json')
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(response.data['user']['username'], 'ada')
+        self.assertFalse(response.data['profile']['is_manager'])
+        self.assertIsNone(response.data['profile']['department'])
+
+        user = User.objects.get(username='ada')
+        self.assertTrue(user.check_password('secret-password'))
+        self.employee.refresh_from_db()
+        self.assertEqual(self.employee.user, user)
+        # Username check, user, profile, employee lookup and link
+        statements = [query['sql'] for query in captured.captured_queries
+                      if 'SAVEPOINT' not in query['sql'] and query['sql'] not in ['BEGIN', 'COMMIT']]
+        self.assertEqual(len(statements), 5)
+
+    def test_register_refuses_roles(self):
+        response = APIClient().post(reverse('register'), {
+            'username': 'ada', 'email': 'ada@example.com', 'password': 'secret-password',
+            'department': self.department.pk, 'is_manager': True,
+        }, format='json')
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertIn('is_manager', response.data)
+        self.assertIn('department', response.data)
+        self.assertFalse(User.objects.filter(username='ada').exists())
+        self.assertIsNone(Employee.objects.get(pk=self.employee.pk).user)
+
+    def test_register_does_not_take_over_linked_employee(self):
+        owner = User.objects.create_user(username='owner', password='testpassword')
+        self.employee.user = owner
+        self.employee.save()
+        response = APIClient().post(reverse('register'), {
+            'username': 'mallory', 'email': 'ada@example.com', 'password': 'secret-password',
+        }, format='json')
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(Employee.objects.get(pk=self.employee.pk).user, owner)
+
+    def test_register_validates_password(self):
+        response = APIClient().post(reverse('register'), {'username': 'ada', 'password': 'password'},
+                                    format='json')
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertIn('password', response.data)
+        self.assertFalse(User.objects.filter(username='ada').exists())
+
+    def test_register_rejects_taken_username(self):
+        response = APIClient().post(reverse('register'), {'username': 'admin', 'password': 'secret-password'},
+                                    format='json')
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertIn('username', response.data)
+
+    def test_bulk_provision(self):
+        response = self.client.post(reverse('userprofile-bulk-provision'), [
+            {'username': 'ada', 'email': 'ada@example.com', 'password': 'secret-password',
+             'department': self.department.pk},
+            {'username': 'bob', 'email': 'bob@example.com', 'password': 'secret-password', 'is_manager': True},
+        ], format='json')
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        self.assertEqual([profile['user']['username'] for profile in response.data], ['ada', 'bob'])
+        self.assertTrue(UserProfile.objects.get(user__username='bob').is_manager)
+        self.assertEqual(Employee.objects.get(pk=self.employee.pk).user.username, 'ada')
+
+    def test_bulk_provision_is_all_or_nothing(self):
+        response = self.client.post(reverse('userprofile-bulk-provision'), [
+            {'username': 'ada', 'password': 'secret-password'},
+            {'username': 'ada', 'password': 'secret-password'},
+            {'username': 'admin', 'password': 'secret-password'},
+            {'username': 'bob', 'password': 'secret-password', 'department': 999},
+            {'username': 'cy'},
+        ], format='json')
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        errors = {error['index']: error['errors'] for error in response.data['errors']}
+        self.assertEqual(sorted(errors), [1, 2, 3, 4])
+        self.assertEqual(errors[1]['username'], ['Duplicate of entry 0.'])
+        self.assertIn('username', errors[2])
+        self.assertIn('department', errors[3])
+        self.assertIn('password', errors[4])
+        self.assertFalse(User.objects.filter(username__in=['ada', 'bob', 'cy']).exists())
+
+    def test_bulk_provision_admin_only(self):
+        user = User.objects.create_user(username='manager', password='testpassword')
+        UserProfile.objects.create(user=user, is_manager=True, department=self.department)
+        self.client.credentials(HTTP_AUTHORIZATION=f'Token {Token.objects.create(user=user).key}')
+        response = self.client.post(reverse('userprofile-bulk-provision'),
+                                    [{'username': 'ada', 'password': 'secret-password'}], format='json')
+        self.assertEqual(response.status_code, status.HTTP_403_FORBIDDEN)
+
+    def test_provision_users_command_with_process_pool(self):
+        with tempfile.NamedTemporaryFile('w', suffix='.csv', delete=False) as handle:
+            handle.write('username,email,password,is_manager,department\n'
+                         f'ada,ada@example.com,secret-one,,{self.department.pk}\n'
+                         'bob,,secret-two,true,\n')
+        self.addCleanup(os.remove, handle.name)
+        out = StringIO()
+        call_command('provision_users', handle.name, processes=2, stdout=out, stderr=StringIO())
+        self.assertIn('Created 2 users', out.getvalue())
+        self.assertTrue(User.objects.get(username='ada').check_password('secret-one'))
+        self.assertTrue(User.objects.get(username='bob').check_password('secret-two'))
+        self.assertTrue(UserProfile.objects.get(user__username='bob').is_manager)
+        self.assertEqual(Employee.objects.get(pk=self.employee.pk).user.username, 'ada')
+
+
+class DepartmentHeadcountTest(TestCase):
+    def setUp(self):
+        self.client = APIClient()
+        self.user = User.objects.create_user(username='admin', password='testpassword', is_staff=True)
+        self.token = Token.objects.create(user=self.user)
+        self.client.credentials(HTTP_AUTHORIZATION=f'Token {self.token.key}')
+        self.engineering = Department.objects.create(name='Engineering')
+        self.sales = Department.objects.create(name='Sales')
+
+    def create_employee(self, number, department):
+        return Employee.objects.create(name=f'Employee {number}', email=f'employee{number}@example.com',
+                                       phone_number='1234567890', address='Test Address', department=department)
+
+    def headcounts(self):
+        return dict(Department.objects.values_list('name', 'headcount'))
+
+    def test_create_move_and_delete(self):
+        employees = [self.create_employee(number, self.engineering) for number in range(3)]
+        self.assertEqual(self.headcounts(), {'Engineering': 3, 'Sales': 0})
+
+        employees[0].department = self.sales
+        employees[0].save()
+        # Saving without moving leaves the counts alone
+        employees[1].name = 'Renamed'
+        employees[1].save()
+        self.assertEqual(self.headcounts(), {'Engineering': 2, 'Sales': 1})
+
+        employees[2].delete()
+        self.assertEqual(self.headcounts(), {'Engineering': 1, 'Sales': 1})
+
+    def test_drifted_count_does_not_block_delete(self):
+        employee = self.create_employee(1, self.engineering)
+        # A queryset update moves the employee behind the signals' back
+        Employee.objects.filter(pk=employee.pk).update(department=self.sales)
+        employee.delete()
+        self.assertEqual(self.headcounts(), {'Engineering': 0, 'Sales': 0})
+
+    def test_previous_department_is_read_under_lock(self):
+        employee = self.create_employee(1, self.engineering)
+        employee.department = self.sales
+        with mock.patch.object(QuerySet, 'select_for_update', autospec=True,
+                               side_effect=QuerySet.select_for_update) as lock:
+            employee.save()
+        lock.assert_called_once()
+        self.assertEqual(self.headcounts(), {'Engineering': 0, 'Sales': 1})
+
+    def test_department_delete_handles_employees_in_bulk(self):
+        keys = []
+        for number in range(3):
+            employee = self.create_employee(number, self.engineering)
+            employee.user = User.objects.create_user(username=f'user{number}', password='testpassword')
+            employee.save()
+            keys.append(Token.objects.create(user=employee.user).key)
+            cache.set(f'auth-token:{keys[-1]}', {})
+        with CaptureQueriesContext(connection) as queries:
+            self.engineering.delete()
+        sql = [query['sql'] for query in queries.captured_queries]
+        self.assertFalse([query for query in sql if query.startswith('UPDATE "employees_department"')])
+        self.assertEqual(len([query for query in sql if 'FROM "authtoken_token"' in query]), 1)
+        self.assertEqual(cache.get_many([f'auth-token:{key}' for key in keys]), {})
+
+    def test_exposed_read_only_and_orderable(self):
+        self.create_employee(1, self.sales)
+        response = self.client.get(reverse('department-list'), {'ordering': '-headcount'})
+        self.assertEqual([(row['name'], row['headcount']) for row in response.data['results']],
+                         [('Sales', 1), ('Engineering', 0)])
+
+        response = self.client.patch(reverse('department-detail', kwargs={'pk': self.sales.pk}),
+                                     {'headcount': 50}, format='json')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data['headcount'], 1)
+
+    def test_cached_list_sees_new_employees(self):
+        self.client.get(reverse('department-list'))
+        self.create_employee(1, self.sales)
+        response = self.client.get(reverse('department-list'), {'ordering': 'name'})
+        self.assertEqual([row['headcount'] for row in response.data['results']], [0, 1])
+
+    def test_import_counts_bulk_created_employees(self):
+        upload = SimpleUploadedFile('employees.csv', b'name,email,phone_number,address,department\n'
+                                                     b'Ada,ada@example.com,123,Street,Sales\n'
+                                                     b'Bob,bob@example.com,123,Street,Sales\n')
+        self.client.post(reverse('employee-import-csv'), {'file': upload}, format='multipart')
+        self.assertEqual(self.headcounts(), {'Engineering': 0, 'Sales': 2})
+
+    def test_reconcile_repairs_drift(self):
+        self.create_employee(1, self.sales)
+        Department.objects.filter(pk=self.sales.pk).update(headcount=7)
+        Department.objects.filter(pk=self.engineering.pk).update(headcount=2)
+
+        out = StringIO()
+        call_command('reconcile_headcounts', dry_run=True, stdout=out)
+        self.assertIn('Found 2 drifted', out.getvalue())
+        self.assertEqual(self.headcounts(), {'Engineering': 2, 'Sales': 7})
+
+        out = StringIO()
+        call_command('reconcile_headcounts', stdout=out)
+        self.assertIn('Sales: stored 7, actual 1', out.getvalue())
+        self.assertEqual(self.headcounts(), {'Engineering': 0, 'Sales': 1})
+
+
+@override_settings(DATABASE_REPLICAS=['replica'])
+class ReplicaRoutingTest(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.factory = RequestFactory()
+
+    def route(self, method, **meta):
+        """
+        Where a read inside a request through the middleware would go.
+        """
+        seen = []
+
+        def get_response(request):
+            seen.append(router.db_for_read(Employee))
+            return HttpResponse()
+
+        ReplicaRoutingMiddleware(get_response)(self.factory.generic(method, '/api/employees/list/', **meta))
+        return seen[0]
+
+    def test_safe_requests_read_from_replicas(self):
+        self.assertEqual(self.route('GET', HTTP_AUTHORIZATION='Token a'), 'replica')
+        self.assertEqual(self.route('POST', HTTP_AUTHORIZATION='Token a'), 'default')
+        self.assertEqual(router.db_for_read(Employee), 'default')
+        self.assertEqual(router.db_for_write(Employee), 'default')
+
+    def test_writer_is_pinned_to_primary(self):
+        self.route('PATCH', HTTP_AUTHORIZATION='Token a', REMOTE_ADDR='10.0.0.1')
+        self.assertEqual(self.route('GET', HTTP_AUTHORIZATION='Token a', REMOTE_ADDR='10.0.0.1'), 'default')
+        # Other clients behind the same address keep using the replicas
+        self.assertEqual(self.route('GET', HTTP_AUTHORIZATION='Token b', REMOTE_ADDR='10.0.0.1'), 'replica')
+
+    def test_anonymous_write_pins_anonymous_reads_from_its_address(self):
+        self.route('POST', REMOTE_ADDR='10.0.0.2')
+        self.assertEqual(self.route('GET', REMOTE_ADDR='10.0.0.2'), 'default')
+        self.assertEqual(self.route('GET', REMOTE_ADDR='10.0.0.3'), 'replica')
+        # Authenticated clients behind the same proxy keep using the replicas
+        self.assertEqual(self.route('GET', HTTP_AUTHORIZATION='Token a', REMOTE_ADDR='10.0.0.2'), 'replica')
+
+    @override_settings(DATABASE_REPLICAS=['replica1', 'replica2'])
+    def test_a_request_reads_from_one_replica(self):
+        seen = []
+
+        def get_response(request):
+            seen.extend(router.db_for_read(Employee) for _ in range(20))
+            return HttpResponse()
+
+        ReplicaRoutingMiddleware(get_response)(self.factory.get('/api/employees/list/'))
+        self.assertEqual(len(set(seen)), 1)
+        self.assertIn(seen[0], ['replica1', 'replica2'])
+
+    def test_new_tokens_are_looked_up_on_the_primary(self):
+        user = User.objects.create_user(username='fresh', password='testpassword')
+        key = Token.objects.create(user=user).key
+        seen = []
+
+        def get_response(request):
+            # The 'replica' alias has no connection, so a lookup there would raise
+            seen.append(CachedTokenAuthentication().authenticate_credentials(key)[0])
+            return HttpResponse()
+
+        ReplicaRoutingMiddleware(get_response)(self.factory.get('/api/employees/list/',
+                                                                HTTP_AUTHORIZATION=f'Token {key}'))
+        self.assertEqual(seen, [user])
+
+    def test_replicas_are_never_migrated(self):
+        self.assertFalse(router.allow_migrate('replica', 'employees'))
+        self.assertTrue(router.allow_migrate('default', 'employees'))
+
+    def test_pin_expires(self):
+        with override_settings(REPLICA_PIN_SECONDS=0):
+            self.route('POST', HTTP_AUTHORIZATION='Token a')
+        self.assertEqual(self.route('GET', HTTP_AUTHORIZATION='Token a'), 'replica')
+
+    def test_async_requests(self):
+        seen = []
+
+        async def get_response(request):
+            seen.append(await sync_to_async(router.db_for_read)(Employee))
+            return HttpResponse()
+
+        middleware = ReplicaRoutingMiddleware(get_response)
+        async_to_sync(middleware)(self.factory.get('/api/employees/async/list/'))
+        async_to_sync(middleware)(self.factory.delete('/api/employees/list/1/'))
+        async_to_sync(middleware)(self.factory.get('/api/employees/async/list/'))
+        self.assertEqual(seen, ['replica', 'default', 'default'])
+
+    @override_settings(DATABASE_REPLICAS=[])
+    def test_without_replicas_everything_uses_the_primary(self):
+        self.assertEqual(self.route('GET'), 'default')
+
+    def test_cached_responses_are_built_from_the_primary(self):
+        seen = []
+
+        def get_response(request):
+            with use_primary():
+                seen.append(router.db_for_read(Department))
+            seen.append(router.db_for_read(Department))
+            return HttpResponse()
+
+        ReplicaRoutingMiddleware(get_response)(self.factory.get('/api/employees/departments/'))
+        self.assertEqual(seen, ['default', 'replica'])
+
+
+class EmployeeSyncTest(TestCase):
+    def setUp(self):
+        self.client = APIClient()
+        self.user = User.objects.create_user(username='admin', password='testpassword', is_staff=True)
+        self.client.credentials(HTTP_AUTHORIZATION=f'Token {Token.objects.create(user=self.user).key}')
+        self.department = Department.objects.create(name='Engineering')
+        self.employee = Employee.objects.create(name='Test Employee', email='test@example.com',
+                                                phone_number='1234567890', address='Test Address',
+                                                department=self.department)
+
+    def test_deleting_an_employee_leaves_tombstones(self):
+        Attendance.objects.create(employee=self.employee, date=timezone.now().date(), status='present')
+        since = timezone.now().isoformat()
+        employee_id = self.employee.pk
+        self.employee.delete()
+        self.assertEqual(sorted(Tombstone.objects.values_list('model', 'employee_id')),
+                         [('attendance.attendance', employee_id), ('employees.employee', employee_id)])
+
+        with mock.patch.object(EmployeeViewSet, 'sync_settle_seconds', 0):
+            response = self.client.get(reverse('employee-sync'), {'updated_since': since})
+        self.assertEqual(response.data['deleted'], [employee_id])
+        self.assertEqual(response.data['changed'], [])
+
+    def test_cascades_record_tombstones_in_bulk(self):
+        for day in range(1, 6):
+            Attendance.objects.create(employee=self.employee, date=date(2024, 1, day), status='present')
+            Performance.objects.create(employee=self.employee, review_date=date(2024, 1, day), rating=3)
+        with CaptureQueriesContext(connection) as captured:
+            self.employee.delete()
+        inserts = [query['sql'] for query in captured.captured_queries
+                   if query['sql'].startswith('INSERT INTO "employees_tombstone"')]
+        self.assertEqual(len(inserts), 3)
+        self.assertEqual(dict(Tombstone.objects.values_list('model').annotate(Count('id')).order_by()),
+                         {'attendance.attendance': 5, 'performance.performance': 5, 'employees.employee': 1})
+
+        other = Employee.objects.create(name='Other Employee', email='other@example.com',
+                                        phone_number='1234567890', address='Test Address',
+                                        department=self.department)
+        Attendance.objects.create(employee=other, date=date(2024, 1, 1), status='present')
+        self.department.delete()
+        self.assertEqual(Tombstone.objects.filter(object_id=other.pk, model='employees.employee').count(), 1)
+        self.assertEqual(Tombstone.objects.filter(employee_id=other.pk).count(), 2)
+
+    @override_settings(DATABASE_REPLICAS=['replica'])
+    def test_sync_reads_from_the_primary(self):
+        seen = []
+
+        def get_response(request):
+            with mock.patch.object(EmployeeViewSet, 'get_sync_response',
+                                   lambda view, request: seen.append(router.db_for_read(Employee))):
+                EmployeeViewSet().sync(request)
+            seen.append(router.db_for_read(Employee))
+            return HttpResponse()
+
+        ReplicaRoutingMiddleware(get_response)(RequestFactory().get('/api/employees/list/sync/'))
+        self.assertEqual(seen, ['default', 'replica'])
+
+    def test_prune_tombstones_command(self):
+        self.employee.delete()
+        Tombstone.objects.update(deleted_at=timezone.now() - timezone.timedelta(days=100))
+        out = StringIO()
+        call_command('prune_tombstones', days=90, stdout=out)
+        self.assertIn('Deleted 1 tombstones', out.getvalue())
+        self.assertFalse(Tombstone.objects.exists())
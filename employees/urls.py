@@ -1,14 +1,19 @@
 from django.urls import path, include
 from rest_framework.routers import DefaultRouter
-from .views import DepartmentViewSet, EmployeeViewSet, UserProfileViewSet, ChartsView, register_user
+from .views import (DepartmentViewSet, EmployeeViewSet, UserProfileViewSet, AnalyticsViewSet, ChartsView, register_user,
+                    AsyncEmployeeListView, AsyncEmployeeDetailView, AsyncMyProfileView)
 
 router = DefaultRouter()
 router.register(r'departments', DepartmentViewSet)
 router.register(r'list', EmployeeViewSet)
 router.register(r'profiles', UserProfileViewSet)
+router.register(r'analytics', AnalyticsViewSet, basename='analytics')
 
 urlpatterns = [
     path('', include(router.urls)),
+    path('async/list/', AsyncEmployeeListView.as_view(), name='async-employee-list'),
+    path('async/list/<int:pk>/', AsyncEmployeeDetailView.as_view(), name='async-employee-detail'),
+    path('async/profiles/my_profile/', AsyncMyProfileView.as_view(), name='async-my-profile'),
     path('charts/', ChartsView.as_view(), name='charts'),
     path('register/', register_user, name='register'),
 ]
\ No newline at end of file
@@ -1,19 +1,36 @@
+import csv
+import io
+from datetime import timedelta
 from rest_framework import viewsets, filters, status
 from rest_framework.decorators import action, api_view, permission_classes
+from rest_framework.parsers import MultiPartParser
 from rest_framework.response import Response
 from rest_framework.permissions import AllowAny, IsAuthenticated
 from django_filters.rest_framework import DjangoFilterBackend
 from django.contrib.auth.models import User
+from django.db.models import Count, Q, Sum
+from django.utils import timezone
+from django.utils.dateparse import parse_date
+from attendance.models import Attendance, DailyAttendanceSummary
+from .filters import EmployeeSearchFilter
+from .imports import ImportFormatError, import_employees
 from .models import Department, Employee, UserProfile
+from .provisioning import provision_users, validate_users
 from .serializers import DepartmentSerializer, EmployeeSerializer, UserProfileSerializer, UserSerializer
-from employee_project.permissions import IsAdminUser, IsManagerUser, IsEmployeeUser, IsOwnerOrAdmin
+from employee_project.async_views import AsyncDetailView, AsyncListView
+from employee_project.caching import VersionedCacheMixin
+from employee_project.conditional import ConditionalGetMixin
+from employee_project.fastread import FastReadMixin
+from employee_project.permissions import IsAdminUser, IsManagerUser, IsEmployeeUser, IsOwnerOrAdmin, get_role
+from employee_project.sync import DeltaSyncMixin
 
-class DepartmentViewSet(viewsets.ModelViewSet):
+class DepartmentViewSet(VersionedCacheMixin, ConditionalGetMixin, viewsets.ModelViewSet):
     queryset = Department.objects.all()
     serializer_class = DepartmentSerializer
+    cache_models = [Department]
     filter_backends = [filters.SearchFilter, filters.OrderingFilter]
     search_fields = ['name']
-    ordering_fields = ['name', 'created_at']
+    ordering_fields = ['name', 'created_at', 'headcount']
     
     def get_permissions(self):
         if self.action in ['create', 'update', 'partial_update', 'destroy']:
@@ -22,29 +39,56 @@ class DepartmentViewSet(viewsets.ModelViewSet):
             permission_classes = [IsEmployeeUser]
         return [permission() for permission in permission_classes]
 
-class EmployeeViewSet(viewsets.ModelViewSet):
-    queryset = Employee.objects.all()
+class EmployeeViewSet(FastReadMixin, ConditionalGetMixin, DeltaSyncMixin, viewsets.ModelViewSet):
+    queryset = Employee.objects.select_related('department', 'user')
     serializer_class = EmployeeSerializer
-    filter_backends = [DjangoFilterBackend, filters.SearchFilter, filters.OrderingFilter]
+    conditional_related = ['department']
+    conditional_version_models = [User]
+    filter_backends = [DjangoFilterBackend, EmployeeSearchFilter, filters.OrderingFilter]
     filterset_fields = ['department', 'date_of_joining']
     search_fields = ['name', 'email']
     ordering_fields = ['name', 'date_of_joining', 'department__name']
+    import_batch_size = 1000
     
     def get_permissions(self):
-        if self.action in ['create', 'destroy']:
+        if self.action in ['create', 'destroy', 'import_csv']:
             permission_classes = [IsAdminUser]
         elif self.action in ['update', 'partial_update']:
             permission_classes = [IsAdminUser|IsManagerUser|IsOwnerOrAdmin]
         else:
             permission_classes = [IsEmployeeUser]
         return [permission() for permission in permission_classes]
+    
+    @action(detail=False, methods=['post'], url_path='import', parser_classes=[MultiPartParser])
+    def import_csv(self, request):
+        """
+        Create employees from an uploaded CSV (multipart field ``file``)
+        with columns name, email, phone_number, address, department (by
+        name) and optionally position. Valid rows are created, invalid
+        ones reported by line. ``?dry_run=1`` only validates;
+        ``?create_departments=1`` creates unknown departments.
+        """
+        upload = request.FILES.get('file')
+        if upload is None:
+            return Response({"detail": "Upload the CSV as the 'file' field"},
+                            status=status.HTTP_400_BAD_REQUEST)
+        flags = {name: request.query_params.get(name) in ['1', 'true']
+                 for name in ['dry_run', 'create_departments']}
+        stream = io.TextIOWrapper(upload.file, encoding='utf-8-sig', newline='')
+        try:
+            report = import_employees(stream, batch_size=self.import_batch_size, **flags)
+        except (ImportFormatError, UnicodeDecodeError, csv.Error) as exc:
+            return Response({"detail": f"Cannot read CSV: {exc}"}, status=status.HTTP_400_BAD_REQUEST)
+        return Response(report, status=status.HTTP_200_OK)
 
-class UserProfileViewSet(viewsets.ModelViewSet):
-    queryset = UserProfile.objects.all()
+class UserProfileViewSet(FastReadMixin, ConditionalGetMixin, viewsets.ModelViewSet):
+    queryset = UserProfile.objects.select_related('user')
     serializer_class = UserProfileSerializer
+    conditional_version_models = [User]
+    provision_max_items = 1000
     
     def get_permissions(self):
-        if self.action in ['create', 'destroy']:
+        if self.action in ['create', 'destroy', 'bulk_provision']:
             permission_classes = [IsAdminUser]
         elif self.action in ['update', 'partial_update']:
             permission_classes = [IsAdminUser|IsOwnerOrAdmin]
@@ -55,47 +99,141 @@ class UserProfileViewSet(viewsets.ModelViewSet):
     @action(detail=False, methods=['get'])
     def my_profile(self, request):
         try:
-            profile = UserProfile.objects.get(user=request.user)
+            profile = self.get_queryset().get(user=request.user)
             serializer = self.get_serializer(profile)
             return Response(serializer.data)
         except UserProfile.DoesNotExist:
             return Response({"detail": "Profile not found"}, status=status.HTTP_404_NOT_FOUND)
 
+    @action(detail=False, methods=['post'], url_path='bulk-provision')
+    def bulk_provision(self, request):
+        """
+        Create many users with their profiles and employee links at once.
+        Either every entry is created or, if any is invalid, none are and
+        the invalid entries are returned by index.
+        """
+        items = request.data
+        if not isinstance(items, list):
+            return Response({"detail": "Expected a list of users"}, status=status.HTTP_400_BAD_REQUEST)
+        if len(items) > self.provision_max_items:
+            return Response({"detail": f"At most {self.provision_max_items} users per request"},
+                            status=status.HTTP_400_BAD_REQUEST)
+        entries, errors = validate_users(items, assign_roles=True)
+        if errors:
+            return Response({'errors': errors}, status=status.HTTP_400_BAD_REQUEST)
+        profiles = provision_users(entries)
+        return Response(self.get_serializer(profiles, many=True).data, status=status.HTTP_201_CREATED)
+
+class AsyncEmployeeListView(AsyncListView):
+    viewset_class = EmployeeViewSet
+
+class AsyncEmployeeDetailView(AsyncDetailView):
+    viewset_class = EmployeeViewSet
+
+class AsyncMyProfileView(AsyncDetailView):
+    viewset_class = UserProfileViewSet
+
+    def get_object_filter(self, view, **kwargs):
+        return {'user_id': view.request.user.pk}
+
+    def get_not_found_message(self, view):
+        return 'Profile not found'
+
+class AnalyticsViewSet(viewsets.ViewSet):
+    """
+    Aggregated figures for the charts dashboard, computed with GROUP BY
+    queries so the client never has to page through raw records.
+    """
+    permission_classes = [IsEmployeeUser]
+    default_window_days = 30
+    max_window_days = 366
+
+    @action(detail=False, methods=['get'], url_path='department-headcount')
+    def department_headcount(self, request):
+        departments = Department.objects.values('id', 'name', 'headcount').order_by('name')
+        return Response({
+            'total': sum(dept['headcount'] for dept in departments),
+            'results': list(departments),
+        })
+
+    @action(detail=False, methods=['get'], url_path='attendance-summary')
+    def attendance_summary(self, request):
+        end_date = request.query_params.get('end_date')
+        start_date = request.query_params.get('start_date')
+        try:
+            end_date = parse_date(end_date) if end_date else timezone.now().date()
+            start_date = (parse_date(start_date) if start_date
+                          else end_date - timedelta(days=self.default_window_days - 1))
+        except ValueError:
+            start_date = end_date = None
+        if start_date is None or end_date is None:
+            return Response({"detail": "Dates must be in YYYY-MM-DD format"},
+                            status=status.HTTP_400_BAD_REQUEST)
+        if start_date > end_date:
+            return Response({"detail": "start_date must not be after end_date"},
+                            status=status.HTTP_400_BAD_REQUEST)
+        if (end_date - start_date).days >= self.max_window_days:
+            return Response({"detail": f"Date window is limited to {self.max_window_days} days"},
+                            status=status.HTTP_400_BAD_REQUEST)
+
+        role = get_role(request.user)
+        if role.is_staff or role.is_manager:
+            # Company-wide figures come from the pre-aggregated summary table
+            rows = (DailyAttendanceSummary.objects
+                    .filter(date__range=(start_date, end_date))
+                    .values('date')
+                    .annotate(present=Sum('present'), absent=Sum('absent'), late=Sum('late'))
+                    .order_by('date'))
+        else:
+            # Regular employees only get figures for their own records
+            queryset = Attendance.objects.filter(date__range=(start_date, end_date))
+            if role.employee_id is not None:
+                queryset = queryset.filter(employee_id=role.employee_id)
+            else:
+                queryset = queryset.none()
+            rows = (queryset
+                    .values('date')
+                    .annotate(present=Count('id', filter=Q(status='present')),
+                              absent=Count('id', filter=Q(status='absent')),
+                              late=Count('id', filter=Q(status='late')))
+                    .order_by('date'))
+        by_date = {row['date']: row for row in rows}
+
+        # Fill in days without records so the series is contiguous
+        results = []
+        for offset in range((end_date - start_date).days + 1):
+            day = start_date + timedelta(days=offset)
+            row = by_date.get(day, {'present': 0, 'absent': 0, 'late': 0})
+            results.append({
+                'date': day.isoformat(),
+                'present': row['present'],
+                'absent': row['absent'],
+                'late': row['late'],
+            })
+
+        return Response({
+            'start_date': start_date.isoformat(),
+            'end_date': end_date.isoformat(),
+            'results': results,
+        })
+
 @api_view(['POST'])
 @permission_classes([AllowAny])
 def register_user(request):
-    user_serializer = UserSerializer(data=request.data)
-    if user_serializer.is_valid():
-        user = user_serializer.save()
-        user.set_password(request.data.get('password'))
-        user.save()
-        
-        # Create user profile
-        profile_data = {
-            'user': user.id,
-            'is_manager': request.data.get('is_manager', False),
-            'department': request.data.get('department', None)
-        }
-        profile_serializer = UserProfileSerializer(data=profile_data)
-        if profile_serializer.is_valid():
-            profile_serializer.save()
-            
-            # Link to employee if email matches
-            try:
-                employee = Employee.objects.get(email=user.email)
-                employee.user = user
-                employee.save()
-            except Employee.DoesNotExist:
-                pass
-                
-            return Response({
-                'user': user_serializer.data,
-                'profile': profile_serializer.data
-            }, status=status.HTTP_201_CREATED)
-        else:
-            user.delete()
-            return Response(profile_serializer.errors, status=status.HTTP_400_BAD_REQUEST)
-    return Response(user_serializer.errors, status=status.HTTP_400_BAD_REQUEST)
+    """
+    Create a user with their profile, linking the unclaimed employee with
+    the same email, in one transaction. Self-registered users are never
+    managers and get no department; administrators assign those through
+    ``bulk-provision``. See ``employees.provisioning``.
+    """
+    entries, errors = validate_users([request.data])
+    if errors:
+        return Response(errors[0]['errors'], status=status.HTTP_400_BAD_REQUEST)
+    profile, = provision_users(entries)
+    return Response({
+        'user': UserSerializer(profile.user).data,
+        'profile': UserProfileSerializer(profile).data,
+    }, status=status.HTTP_201_CREATED)
 
 # Add this to the existing views.py file
 from django.views.generic import TemplateView
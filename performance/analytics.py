@@ -0,0 +1,101 @@
+import math
+from django.db.models import Avg, Count, F, RowRange, Window
+from django.db.models.functions import ExtractQuarter, ExtractYear
+
+RATINGS = range(1, 6)
+PERCENTILES = [25, 50, 75, 90]
+
+
+def rolling_averages(queryset, window):
+    """
+    Annotate each review with the average of the employee's last ``window``
+    ratings up to and including it, and its running review number.
+    """
+    order_by = [F('review_date').asc(), F('id').asc()]
+    return (queryset
+            .annotate(rolling_average=Window(Avg('rating'), partition_by=[F('employee_id')],
+                                             order_by=order_by, frame=RowRange(start=-(window - 1), end=0)),
+                      review_number=Window(Count('id'), partition_by=[F('employee_id')],
+                                           order_by=order_by, frame=RowRange(start=None, end=0)))
+            .values('employee_id', 'employee__name', 'review_date', 'rating', 'rolling_average', 'review_number')
+            .order_by('employee_id', 'review_date', 'id'))
+
+
+def percentile(counts, percent):
+    """
+    Nearest-rank percentile over a ``{rating: count}`` histogram.
+    """
+    total = sum(counts.values())
+    rank = max(math.ceil(percent / 100 * total), 1)
+    seen = 0
+    for rating in sorted(counts):
+        seen += counts[rating]
+        if seen >= rank:
+            return rating
+    return None
+
+
+def rating_distribution(queryset):
+    """
+    Per-department rating histogram, average and percentiles from a single
+    GROUP BY (department, rating) query. Ratings are whole numbers from 1
+    to 5, so the histogram is exact and the percentiles need no raw rows.
+    """
+    rows = (queryset
+            .values('employee__department_id', 'employee__department__name', 'rating')
+            .annotate(reviews=Count('id'))
+            .order_by('employee__department__name', 'employee__department_id', 'rating'))
+    departments = {}
+    for row in rows:
+        department = departments.setdefault(row['employee__department_id'], {
+            'department': row['employee__department_id'],
+            'department_name': row['employee__department__name'],
+            'counts': dict.fromkeys(RATINGS, 0),
+        })
+        department['counts'][row['rating']] = row['reviews']
+
+    results = []
+    for department in departments.values():
+        counts = department.pop('counts')
+        reviews = sum(counts.values())
+        results.append({
+            **department,
+            'reviews': reviews,
+            'average': round(sum(rating * count for rating, count in counts.items()) / reviews, 2),
+            'distribution': {str(rating): count for rating, count in counts.items()},
+            'percentiles': {f'p{percent}': percentile(counts, percent) for percent in PERCENTILES},
+        })
+    return results
+
+
+def quarterly_change(queryset):
+    """
+    Average rating per department and calendar quarter, with the change
+    from the department's previous quarter that had reviews.
+
+    The previous quarter is taken in a pass over the ordered result rather
+    than with ``LAG()``. Django groups by every selected window expression,
+    and databases reject an aggregate in GROUP BY.
+    """
+    rows = (queryset
+            .annotate(year=ExtractYear('review_date'), quarter=ExtractQuarter('review_date'))
+            .values('employee__department_id', 'employee__department__name', 'year', 'quarter')
+            .annotate(average=Avg('rating'), reviews=Count('id'))
+            .order_by('employee__department__name', 'employee__department_id', 'year', 'quarter'))
+    results = []
+    previous = {}
+    for row in rows:
+        department_id = row['employee__department_id']
+        average = round(row['average'], 2)
+        previous_average = previous.get(department_id)
+        results.append({
+            'department': department_id,
+            'department_name': row['employee__department__name'],
+            'quarter': f"{row['year']}-Q{row['quarter']}",
+            'reviews': row['reviews'],
+            'average': average,
+            'previous_average': previous_average,
+            'change': round(average - previous_average, 2) if previous_average is not None else None,
+        })
+        previous[department_id] = average
+    return results
@@ -0,0 +1,17 @@
+# Generated by Django 4.2.22 on 2026-10-18 15:56
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('performance', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='performance',
+            index=models.Index(fields=['review_date', 'id'], name='performance_date_id_idx'),
+        ),
+    ]
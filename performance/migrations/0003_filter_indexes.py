@@ -0,0 +1,21 @@
+# Generated by Django 4.2.22 on 2026-10-18 16:00
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('performance', '0002_performance_performance_date_id_idx'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='performance',
+            index=models.Index(fields=['review_date', 'rating'], name='performance_date_rating_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='performance',
+            index=models.Index(fields=['rating', 'review_date'], name='performance_rating_date_idx'),
+        ),
+    ]
@@ -0,0 +1,17 @@
+# Generated by Django 4.2.22 on 2026-10-18 16:48
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('performance', '0003_filter_indexes'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='performance',
+            index=models.Index(fields=['updated_at', 'id'], name='performance_updated_id_idx'),
+        ),
+    ]
@@ -12,6 +12,15 @@ class Performance(models.Model):
     
     class Meta:
         unique_together = ['employee', 'review_date']
+        indexes = [
+            # Keyset pagination seeks on (review_date, id)
+            models.Index(fields=['review_date', 'id'], name='performance_date_id_idx'),
+            # ?review_date=&rating= filters and ?rating= ordered by review_date
+            models.Index(fields=['review_date', 'rating'], name='performance_date_rating_idx'),
+            models.Index(fields=['rating', 'review_date'], name='performance_rating_date_idx'),
+            # Delta sync pages through changes by (updated_at, id)
+            models.Index(fields=['updated_at', 'id'], name='performance_updated_id_idx'),
+        ]
         
     def __str__(self):
         return f"{self.employee.name} - {self.review_date} - Rating: {self.rating}"
@@ -0,0 +1,18 @@
+from django.db.models.signals import pre_delete, post_delete
+from django.dispatch import receiver
+from employee_project.sync import is_cascade, record_tombstone, record_tombstones
+from employees.models import Employee
+from .models import Performance
+
+
+@receiver(post_delete, sender=Performance)
+def record_deleted_review(sender, instance, origin=None, **kwargs):
+    if is_cascade(sender, origin):
+        return
+    record_tombstone(instance, instance.employee_id)
+
+
+@receiver(pre_delete, sender=Employee)
+def record_cascaded_reviews(sender, instance, **kwargs):
+    # One INSERT for the reviews the employee's delete is about to cascade to
+    record_tombstones(Performance, Performance.objects.filter(employee=instance).values_list('id', 'employee_id'))
@@ -1,4 +1,7 @@
-from django.test import TestCase
+import csv
+from django.db import connection
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
 from django.urls import reverse
 from rest_framework.test import APIClient
 from rest_framework import status
@@ -6,6 +9,7 @@ from rest_framework.authtoken.models import Token
 from django.contrib.auth.models import User
 from django.utils import timezone
 from employees.models import Department, Employee
+from employees.testing import ListQueryCountMixin
 from .models import Performance
 from .serializers import PerformanceSerializer
 
@@ -127,3 +131,151 @@ class PerformanceAPITest(TestCase):
         response = self.client.get(url)
         self.assertEqual(response.status_code, status.HTTP_200_OK)
         self.assertEqual(len(response.data['results']), 1)
+
+
+class ListQueryCountTest(ListQueryCountMixin, TestCase):
+    def add_rows(self, start, stop):
+        for i in range(start, stop):
+            employee = Employee.objects.create(
+                name=f'Employee {i}',
+                email=f'employee{i}@example.com',
+                phone_number='1234567890',
+                address='Test Address',
+                department=self.department
+            )
+            Performance.objects.create(employee=employee, review_date=self.today - timezone.timedelta(days=i), rating=3)
+
+    def test_performance_list(self):
+        self.assertConstantQueries(reverse('performance-list'))
+
+
+class PerformanceKeysetPaginationTest(TestCase):
+    def setUp(self):
+        self.client = APIClient()
+        self.user = User.objects.create_user(username='admin', password='testpassword', is_staff=True)
+        self.token = Token.objects.create(user=self.user)
+        self.client.credentials(HTTP_AUTHORIZATION=f'Token {self.token.key}')
+
+        self.today = timezone.now().date()
+        department = Department.objects.create(name='Test Department')
+        for i in range(2):
+            employee = Employee.objects.create(
+                name=f'Employee {i}',
+                email=f'employee{i}@example.com',
+                phone_number='1234567890',
+                address='Test Address',
+                department=department
+            )
+            for day in range(8):
+                Performance.objects.create(employee=employee,
+                                           review_date=self.today - timezone.timedelta(days=day),
+                                           rating=3)
+
+    def test_keyset_walks_every_row_once_in_order(self):
+        url = f"{reverse('performance-list')}?pagination=keyset&page_size=5"
+        ids = []
+        while url:
+            response = self.client.get(url)
+            self.assertEqual(response.status_code, status.HTTP_200_OK)
+            ids.extend(row['id'] for row in response.data['results'])
+            url = response.data['next']
+        expected = list(Performance.objects.order_by('-review_date', '-id').values_list('id', flat=True))
+        self.assertEqual(ids, expected)
+
+
+class PerformanceExportTest(TestCase):
+    def setUp(self):
+        self.client = APIClient()
+        self.user = User.objects.create_user(username='admin', password='testpassword', is_staff=True)
+        self.token = Token.objects.create(user=self.user)
+        self.client.credentials(HTTP_AUTHORIZATION=f'Token {self.token.key}')
+        department = Department.objects.create(name='Test Department')
+        employee = Employee.objects.create(
+            name='Test Employee',
+            email='test@example.com',
+            phone_number='1234567890',
+            address='Test Address',
+            department=department
+        )
+        Performance.objects.create(employee=employee, review_date=timezone.now().date(),
+                                   rating=5, comments='Great, "as usual"')
+
+    def test_csv_export(self):
+        response = self.client.get(reverse('performance-export'))
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response['Content-Type'], 'text/csv')
+        rows = list(csv.reader(b''.join(response.streaming_content).decode().splitlines()))
+        self.assertEqual(rows[0][:5], ['id', 'employee', 'employee_name', 'rating', 'review_date'])
+        self.assertEqual(rows[1][2:4], ['Test Employee', '5'])
+        self.assertEqual(rows[1][5], 'Great, "as usual"')
+
+
+@override_settings(AUTH_TOKEN_CACHE_TIMEOUT=300)
+class PerformanceAnalyticsTest(TestCase):
+    def setUp(self):
+        self.client = APIClient()
+        self.user = User.objects.create_user(username='admin', password='testpassword', is_staff=True)
+        self.token = Token.objects.create(user=self.user)
+        self.client.credentials(HTTP_AUTHORIZATION=f'Token {self.token.key}')
+        self.engineering = Department.objects.create(name='Engineering')
+        self.sales = Department.objects.create(name='Sales')
+        self.linked = User.objects.create_user(username='linked', password='testpassword')
+        self.alice = Employee.objects.create(name='Alice', email='alice@example.com', phone_number='1234567890',
+                                             address='Test Address', department=self.engineering, user=self.linked)
+        self.bob = Employee.objects.create(name='Bob', email='bob@example.com', phone_number='1234567890',
+                                           address='Test Address', department=self.sales)
+        # Alice: Q1 ratings 2 and 4, Q2 rating 5; Bob: Q1 rating 1
+        for employee, review_date, rating in [
+            (self.alice, '2024-01-10', 2),
+            (self.alice, '2024-02-10', 4),
+            (self.alice, '2024-04-10', 5),
+            (self.bob, '2024-03-01', 1),
+        ]:
+            Performance.objects.create(employee=employee, review_date=review_date, rating=rating)
+
+    def url(self, name):
+        return reverse(f'performance-{name}')
+
+    def test_rolling_average(self):
+        response = self.client.get(self.url('rolling-average'), {'window': 2, 'employee': self.alice.pk})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual([row['rolling_average'] for row in response.data['results']], [2.0, 3.0, 4.5])
+        self.assertEqual([row['review_number'] for row in response.data['results']], [1, 2, 3])
+
+    def test_rolling_average_rejects_bad_window(self):
+        response = self.client.get(self.url('rolling-average'), {'window': 0})
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_department_distribution(self):
+        response = self.client.get(self.url('department-distribution'))
+        engineering, sales = response.data['results']
+        self.assertEqual(engineering['department_name'], 'Engineering')
+        self.assertEqual(engineering['reviews'], 3)
+        self.assertEqual(engineering['average'], 3.67)
+        self.assertEqual(engineering['distribution'], {'1': 0, '2': 1, '3': 0, '4': 1, '5': 1})
+        self.assertEqual(engineering['percentiles'], {'p25': 2, 'p50': 4, 'p75': 5, 'p90': 5})
+        self.assertEqual(sales['percentiles']['p50'], 1)
+
+    def test_quarterly_change(self):
+        response = self.client.get(self.url('quarterly-change'), {'department': self.engineering.pk})
+        self.assertEqual(response.data['results'], [
+            {'department': self.engineering.pk, 'department_name': 'Engineering', 'quarter': '2024-Q1',
+             'reviews': 2, 'average': 3.0, 'previous_average': None, 'change': None},
+            {'department': self.engineering.pk, 'department_name': 'Engineering', 'quarter': '2024-Q2',
+             'reviews': 1, 'average': 5.0, 'previous_average': 3.0, 'change': 2.0},
+        ])
+
+    def test_single_query_per_report(self):
+        for name in ['department-distribution', 'quarterly-change']:
+            self.client.get(self.url(name))  # warm the token cache
+            with CaptureQueriesContext(connection) as queries:
+                self.client.get(self.url(name))
+            self.assertEqual(len(queries), 1)
+
+    def test_scoped_to_own_reviews_for_employees(self):
+        token = Token.objects.create(user=self.linked)
+        self.client.credentials(HTTP_AUTHORIZATION=f'Token {token.key}')
+        response = self.client.get(self.url('department-distribution'))
+        self.assertEqual([row['department_name'] for row in response.data['results']], ['Engineering'])
+        response = self.client.get(self.url('rolling-average'))
+        self.assertEqual({row['employee'] for row in response.data['results']}, {self.alice.pk})
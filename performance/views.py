@@ -1,15 +1,42 @@
-from rest_framework import viewsets, filters
+from rest_framework import viewsets, filters, status
+from rest_framework.decorators import action
+from rest_framework.pagination import PageNumberPagination
+from rest_framework.response import Response
 from django_filters.rest_framework import DjangoFilterBackend
+from django.utils.dateparse import parse_date
+from . import analytics
 from .models import Performance
 from .serializers import PerformanceSerializer
-from employee_project.permissions import IsAdminUser, IsManagerUser, IsEmployeeUser, IsOwnerOrAdmin
+from employee_project.conditional import ConditionalGetMixin
+from employee_project.exports import ExportMixin
+from employee_project.fastread import FastReadMixin
+from employee_project.pagination import PageNumberOrKeysetPagination
+from employee_project.permissions import IsAdminUser, IsManagerUser, IsEmployeeUser, IsOwnerOrAdmin, get_role
+from employee_project.sync import DeltaSyncMixin
 
-class PerformanceViewSet(viewsets.ModelViewSet):
-    queryset = Performance.objects.all()
+class PerformanceViewSet(FastReadMixin, ConditionalGetMixin, ExportMixin, DeltaSyncMixin, viewsets.ModelViewSet):
+    queryset = Performance.objects.select_related('employee')
     serializer_class = PerformanceSerializer
+    conditional_related = ['employee']
+    sync_scope_tombstones = True
     filter_backends = [DjangoFilterBackend, filters.OrderingFilter]
     filterset_fields = ['employee', 'rating', 'review_date']
     ordering_fields = ['rating', 'review_date']
+    pagination_class = PageNumberOrKeysetPagination
+    keyset_ordering = ['-review_date', '-id']
+    export_fields = [
+        ('id', 'id'),
+        ('employee', 'employee'),
+        ('employee_name', 'employee__name'),
+        ('rating', 'rating'),
+        ('review_date', 'review_date'),
+        ('comments', 'comments'),
+        ('created_at', 'created_at'),
+        ('updated_at', 'updated_at'),
+    ]
+    export_filename = 'performance'
+    rolling_window = 3
+    max_rolling_window = 12
     
     def get_permissions(self):
         if self.action in ['create', 'destroy']:
@@ -22,14 +49,96 @@ class PerformanceViewSet(viewsets.ModelViewSet):
     
     def get_queryset(self):
         queryset = super().get_queryset()
-        user = self.request.user
+        role = get_role(self.request.user)
         
         # If user is admin or manager, return all records
-        if user.is_staff or (hasattr(user, 'profile') and user.profile.is_manager):
+        if role.is_staff or role.is_manager:
             return queryset
             
         # For regular employees, only return their own records
-        if hasattr(user, 'employee'):
-            return queryset.filter(employee=user.employee)
+        if role.employee_id is not None:
+            return queryset.filter(employee_id=role.employee_id)
             
         return Performance.objects.none()
+
+    def get_analytics_queryset(self, request):
+        """
+        Role-scoped reviews narrowed by the optional ``employee``,
+        ``department``, ``start_date`` and ``end_date`` parameters.
+        Returns ``(queryset, error_response)``.
+        """
+        queryset = self.get_queryset()
+        params = request.query_params
+        try:
+            for param, lookup in [('employee', 'employee_id'), ('department', 'employee__department_id')]:
+                if params.get(param):
+                    queryset = queryset.filter(**{lookup: int(params[param])})
+        except ValueError:
+            return None, Response({"detail": "employee and department must be ids"},
+                                  status=status.HTTP_400_BAD_REQUEST)
+        for param, lookup in [('start_date', 'review_date__gte'), ('end_date', 'review_date__lte')]:
+            if not params.get(param):
+                continue
+            try:
+                value = parse_date(params[param])
+            except ValueError:
+                value = None
+            if value is None:
+                return None, Response({"detail": "Dates must be in YYYY-MM-DD format"},
+                                      status=status.HTTP_400_BAD_REQUEST)
+            queryset = queryset.filter(**{lookup: value})
+        return queryset, None
+
+    @action(detail=False, methods=['get'], url_path='rolling-average')
+    def rolling_average(self, request):
+        """
+        Each review with the employee's rolling average over the last
+        ``window`` reviews (default 3, at most 12), computed with a window
+        function. Page-number paginated.
+        """
+        try:
+            window = int(request.query_params.get('window', self.rolling_window))
+        except ValueError:
+            window = 0
+        if not 1 <= window <= self.max_rolling_window:
+            return Response({"detail": f"window must be between 1 and {self.max_rolling_window}"},
+                            status=status.HTTP_400_BAD_REQUEST)
+        queryset, error = self.get_analytics_queryset(request)
+        if error is not None:
+            return error
+
+        # Keyset cursors would filter rows out before the window is computed
+        paginator = PageNumberPagination()
+        page = paginator.paginate_queryset(analytics.rolling_averages(queryset, window), request, view=self)
+        return paginator.get_paginated_response([
+            {
+                'employee': row['employee_id'],
+                'employee_name': row['employee__name'],
+                'review_date': row['review_date'].isoformat(),
+                'rating': row['rating'],
+                'rolling_average': round(row['rolling_average'], 2),
+                'review_number': row['review_number'],
+            }
+            for row in page
+        ])
+
+    @action(detail=False, methods=['get'], url_path='department-distribution')
+    def department_distribution(self, request):
+        """
+        Rating histogram, average and p25/p50/p75/p90 per department.
+        """
+        queryset, error = self.get_analytics_queryset(request)
+        if error is not None:
+            return error
+        return Response({'results': analytics.rating_distribution(queryset)})
+
+    @action(detail=False, methods=['get'], url_path='quarterly-change')
+    def quarterly_change(self, request):
+        """
+        Average rating per department and quarter, with the change from the
+        previous quarter.
+        """
+        queryset, error = self.get_analytics_queryset(request)
+        if error is not None:
+            return error
+        return Response({'results': analytics.quarterly_change(queryset)})